@@ -0,0 +1,102 @@
+"""Measure `uses:` classification throughput.
+
+Classifies `--count` values drawn from a skewed mix like a real org's workflows (a few
+actions in nearly every file, a long tail of others, plus local and Docker references):
+
+  - sequential: strip, skip local/docker, split the @ref, then `classify_target`'s
+    workflow and action regexes in turn (how the offline index classified before)
+  - combined: the single alternation regex, uncached
+  - combined + LRU: `classify_uses_many`, as the index uses it now
+
+    uv run python benchmarks/bench_classify.py --count 1000000
+"""
+
+import argparse
+import random
+import time
+
+from action_tools.uses import (
+    USES_REGEX,
+    classify_target,
+    classify_uses,
+    classify_uses_many,
+)
+
+COMMON = [
+    "actions/checkout@v4",
+    "actions/setup-python@v5",
+    "actions/setup-node@v4",
+    "actions/cache@v4",
+    "actions/upload-artifact@v4",
+]
+
+
+def sample(count: int) -> list[str]:
+    rng = random.Random(0)
+    values = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.7:
+            values.append(rng.choice(COMMON))
+        elif roll < 0.8:
+            values.append(f"./.github/actions/step-{rng.randrange(20)}")
+        elif roll < 0.83:
+            values.append(f"docker://alpine:3.{rng.randrange(20)}")
+        elif roll < 0.9:
+            values.append(
+                f"org-{rng.randrange(50)}/workflows/.github/workflows/"
+                f"build-{rng.randrange(20)}.yml@v{rng.randrange(3)}"
+            )
+        else:
+            values.append(
+                f"org-{rng.randrange(200)}/action-{rng.randrange(100)}"
+                f"/sub@{rng.getrandbits(160):040x}"
+            )
+    return values
+
+
+def sequential(values):
+    for uses in values:
+        uses = uses.strip()
+        if uses.startswith(("./", "docker://")):
+            continue
+        target, _, ref = uses.partition("@")
+        try:
+            classify_target(target)
+        except ValueError:
+            pass
+
+
+def combined(values):
+    for uses in values:
+        USES_REGEX.match(uses.strip())
+
+
+def combined_cached(values):
+    classify_uses.cache_clear()
+    for _ in classify_uses_many(values):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    values = sample(args.count)
+    print(f"{args.count} uses: values, {len(set(values))} distinct")
+    for label, classify in [
+        ("sequential regexes", sequential),
+        ("combined regex (match only)", combined),
+        ("combined regex + LRU", combined_cached),
+    ]:
+        start = time.perf_counter()
+        classify(values)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<28} {elapsed:6.2f}s {args.count / elapsed:>12,.0f}/s")
+    info = classify_uses.cache_info()
+    print(f"  LRU hit rate {info.hits / (info.hits + info.misses):.1%}")
+
+
+if __name__ == "__main__":
+    main()
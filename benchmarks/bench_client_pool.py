@@ -0,0 +1,94 @@
+"""Compare per-request latency of a fresh HTTP client per request vs. the pooled `github.Client`.
+
+Runs against a local HTTP server that delays every *new* connection by
+`--handshake-ms` to stand in for the TCP+TLS round-trips a fresh connection to
+api.github.com costs (a respx mock never opens a connection, so it can't show this).
+
+    uv run python benchmarks/bench_client_pool.py --requests 200 --handshake-ms 30
+"""
+
+import argparse
+import http.server
+import statistics
+import threading
+import time
+
+import httpx
+
+from action_tools.github import Client
+
+BODY = b'[{"name": "action.yml", "type": "file"}]'
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    handshake_delay = 0.0
+
+    def setup(self):
+        # called once per connection, not per request
+        time.sleep(self.handshake_delay)
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def fresh_client_per_request(base_url: str, endpoint: str) -> None:
+    # what `Client._get` used to do
+    with httpx.Client() as client:
+        client.get(base_url + endpoint).raise_for_status()
+
+
+def timed(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<24} mean={statistics.mean(samples):7.2f}ms "
+        f"p50={statistics.median(samples):7.2f}ms "
+        f"p95={statistics.quantiles(samples, n=20)[-1]:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--handshake-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    Handler.handshake_delay = args.handshake_ms / 1000
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    endpoint = "/repos/org/repo/contents/some-action"
+
+    try:
+        report(
+            "fresh client/request",
+            timed(lambda: fresh_client_per_request(base_url, endpoint), args.requests),
+        )
+        with Client(token="fake-token", base_url=base_url) as client:
+            report(
+                "pooled Client",
+                timed(lambda: client._get(endpoint), args.requests),
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
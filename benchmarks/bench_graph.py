@@ -0,0 +1,71 @@
+"""Measure building the `uses:` dependency graph and answering transitive queries.
+
+Builds synthetic graphs with `--edges` edges and twice that, to show building stays
+linear: layers of reusable workflows and composite actions, each using a few from the
+layer below, over a base of leaf actions that every consumer repository pulls in.
+
+    uv run python benchmarks/bench_graph.py --edges 50000
+"""
+
+import argparse
+import random
+import time
+
+from action_tools.graph import UsageGraph
+
+LAYERS = 4
+
+
+def files(edges: int) -> list[tuple[str, str, list[str]]]:
+    rng = random.Random(0)
+    per_layer = max(1, edges // (LAYERS * 4 * 3))
+    built = []
+    below = [f"leaf/action-{i}" for i in range(per_layer)]
+    for layer in range(LAYERS):
+        path = ".github/workflows/shared.yml"
+        current = [f"layer{layer}/repo-{i}" for i in range(per_layer)]
+        for repo in current:
+            built.append((repo, path, rng.sample(below, min(3, len(below)))))
+        below = [f"{repo}/{path}" for repo in current]
+    consumers = (edges - len(built) * 3) // 3
+    for i in range(max(consumers, 0)):
+        built.append(
+            (f"app/repo-{i}", ".github/workflows/ci.yml", rng.sample(below, 3))
+        )
+    return built
+
+
+def measure(edges: int) -> None:
+    inputs = files(edges)
+    start = time.perf_counter()
+    graph = UsageGraph()
+    for repo, path, targets in inputs:
+        graph.add_file(repo, path, targets)
+    graph._reverse()
+    built = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dependents = graph.dependents("leaf/action-0")
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    graph.dependents("leaf/action-0")
+    memoized = time.perf_counter() - start
+    print(
+        f"{graph.edges:>8} edges {len(graph):>7} nodes: build {built * 1000:7.1f}ms "
+        f"({built / graph.edges * 1e6:.2f}µs/edge), "
+        f"blast radius of {len(dependents)} files {first * 1000:6.1f}ms, "
+        f"memoized {memoized * 1000:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=50_000)
+    args = parser.parse_args()
+
+    for edges in (args.edges, args.edges * 2):
+        measure(edges)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Measure how the offline index's parse stage scales with the number of processes.
+
+Generates a synthetic corpus of workflow files (default 10k, a quarter of them with
+no `uses:` at all) and times `parse_files` over it at 1, 2, 4, ... processes, then a
+full `UsageIndex.update` at the highest process count.
+
+    uv run python benchmarks/bench_index_parse.py --files 10000
+"""
+
+import argparse
+import os
+import pathlib
+import random
+import tempfile
+import time
+
+from action_tools.index import UsageIndex, parse_files
+
+ACTIONS = [
+    "actions/checkout@v4",
+    "actions/setup-python@v5",
+    "actions/cache@v4",
+    "my-org/shared-actions/lint@v1.2.3",
+    "my-org/shared-actions/deploy@54a43938e6d916589114e065d055a5d42c131e70",
+]
+
+
+def synthetic_workflow(rng: random.Random, n: int) -> str:
+    if n % 4 == 0:
+        # a workflow made entirely of `run:` steps
+        return (
+            "on: push\njobs:\n  test:\n    runs-on: ubuntu-latest\n    steps:\n"
+            + "".join(
+                f"      - run: make step-{step}\n" for step in range(rng.randint(3, 15))
+            )
+        )
+    lines = ["on: [push, pull_request]", "jobs:"]
+    for job in range(rng.randint(1, 4)):
+        lines += [f"  job-{job}:", "    runs-on: ubuntu-latest", "    steps:"]
+        for step in range(rng.randint(3, 12)):
+            if rng.random() < 0.5:
+                lines += [f"      - uses: {rng.choice(ACTIONS)}", "        with:"]
+                lines += [
+                    "          fetch-depth: 0",
+                    "          token: ${{ github.token }}",
+                ]
+            else:
+                lines.append(f"      - run: echo step {step}")
+    lines += [
+        "  reusable:",
+        "    uses: my-org/workflows/.github/workflows/build.yml@v2",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def make_corpus(root: pathlib.Path, files: int, per_repo: int = 50) -> None:
+    rng = random.Random(0)
+    for n in range(files):
+        repo = root / f"repo-{n // per_repo}"
+        workflows = repo / ".github" / "workflows"
+        if not workflows.exists():
+            workflows.mkdir(parents=True)
+            (repo / ".git").mkdir()
+        (workflows / f"workflow-{n}.yml").write_text(synthetic_workflow(rng, n))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=10_000)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = pathlib.Path(tmp) / "repos"
+        make_corpus(root, args.files)
+        items = [
+            ("bench/repo", path.name, str(path))
+            for path in root.glob("*/.github/workflows/*.yml")
+        ]
+        print(f"{len(items)} workflow files, {os.cpu_count()} CPUs")
+
+        jobs_counts = sorted(
+            {1, *(2**n for n in range(1, 8) if 2**n <= args.max_jobs), args.max_jobs}
+        )
+        baseline = None
+        for jobs in jobs_counts:
+            start = time.perf_counter()
+            references = sum(len(refs) for _, _, refs in parse_files(items, jobs=jobs))
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"parse_files jobs={jobs:<3} {elapsed:6.2f}s "
+                f"{len(items) / elapsed:8.0f} files/s speedup={baseline / elapsed:4.2f}x "
+                f"({references} references)"
+            )
+
+        with UsageIndex(pathlib.Path(tmp) / "index.sqlite3") as usage_index:
+            start = time.perf_counter()
+            stats = usage_index.update(root, jobs=args.max_jobs)
+            print(f"full index build  {time.perf_counter() - start:6.2f}s ({stats})")
+            start = time.perf_counter()
+            usage_index.update(root, jobs=args.max_jobs)
+            print(f"no-op reindex     {time.perf_counter() - start:6.2f}s")
+            start = time.perf_counter()
+            repos = usage_index.find_usage("actions/checkout")
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"query             {elapsed:6.2f}ms ({len(repos)} repos)")
+
+
+if __name__ == "__main__":
+    main()
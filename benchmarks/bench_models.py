@@ -0,0 +1,82 @@
+"""Compare the cost of building references as pydantic models vs. the slotted models.
+
+Builds `--count` references (default a million) each way, timing construction and
+measuring the memory held per million with tracemalloc:
+
+  - pydantic: the `Action`/`Workflow` models as they were, a pydantic `BaseModel`
+  - Resource: today's `Action`/`Workflow` (frozen, slotted dataclasses)
+  - UsesReference: the (target, ref) NamedTuple the offline index extracts
+  - tuple: a bare tuple, as a floor
+
+    uv run python benchmarks/bench_models.py --count 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from pydantic import BaseModel
+
+from action_tools.models import Action, UsesReference
+
+
+class PydanticAction(BaseModel):
+    org: str
+    repo: str
+    subpath: str
+
+
+def build_pydantic(n):
+    return [PydanticAction(org="org", repo=f"repo-{i}", subpath="/sub") for i in n]
+
+
+def build_resource(n):
+    return [Action(org="org", repo=f"repo-{i}", subpath="/sub") for i in n]
+
+
+def build_uses_reference(n):
+    return [UsesReference(f"org/repo-{i}/sub", "v1") for i in n]
+
+
+def build_tuple(n):
+    return [(f"org/repo-{i}/sub", "v1") for i in n]
+
+
+def measure(build, count: int) -> tuple[float, float]:
+    gc.collect()
+    start = time.perf_counter()
+    build(range(count))
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    built = build(range(count))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    per_million = 1_000_000 / args.count
+    print(f"{args.count} references, scaled per million:")
+    for label, build in [
+        ("pydantic BaseModel", build_pydantic),
+        ("Resource (slots dataclass)", build_resource),
+        ("UsesReference (NamedTuple)", build_uses_reference),
+        ("tuple", build_tuple),
+    ]:
+        elapsed, size = measure(build, args.count)
+        print(
+            f"  {label:<28} {elapsed * per_million:6.2f}s "
+            f"{size * per_million / 2**20:7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Measure loading and rendering the README template, cold and warm.
+
+Cold starts run in a fresh interpreter each time, as `gendocs action` does: with no
+bytecode cache, with a warm bytecode cache, and with templates compiled ahead of time.
+Warm renders compare building an `Environment` per README against the cached one.
+
+    uv run python benchmarks/bench_templates.py --runs 20
+"""
+
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemLoader
+
+from action_tools.gendocs import (
+    TEMPLATE_NAME,
+    TEMPLATES_DIR,
+    compile_templates,
+    load_template,
+)
+
+CONTEXT = {
+    "name": "Hello World",
+    "description": "Minimal GitHub Action",
+    "inputs": {},
+    "outputs": {},
+}
+
+COLD_START = """
+import pathlib, sys, time
+start = time.perf_counter()
+from action_tools import gendocs
+if sys.argv[1]:
+    gendocs.COMPILED_TEMPLATES_DIR = pathlib.Path(sys.argv[1])
+loaded = time.perf_counter()
+gendocs.load_template().render(**CONTEXT)
+print(loaded - start, time.perf_counter() - loaded)
+"""
+
+
+def cold_start(runs: int, cache_home: str, compiled: str = "") -> list[float]:
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", f"CONTEXT = {CONTEXT!r}\n{COLD_START}", compiled],
+            env={**os.environ, "XDG_CACHE_HOME": cache_home or tempfile.mkdtemp()},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(result.stdout.split()[1]))
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    print(
+        f"{label:<34} median {statistics.median(timings) * 1000:7.2f}ms "
+        f"min {min(timings) * 1000:7.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--renders", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_home = pathlib.Path(tmp) / "cache"
+        compiled = pathlib.Path(tmp) / "compiled"
+        compile_templates(compiled)
+
+        print("cold start, load + first render:")
+        report("  no bytecode cache", cold_start(args.runs, ""))
+        cold_start(1, str(cache_home))  # warm the bytecode cache
+        report("  warm bytecode cache", cold_start(args.runs, str(cache_home)))
+        report(
+            "  compiled ahead of time",
+            cold_start(args.runs, tempfile.mkdtemp(dir=tmp), str(compiled)),
+        )
+
+    print(f"warm, per README over {args.renders} renders:")
+    timings = []
+    for _ in range(args.renders):
+        start = time.perf_counter()
+        env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)))
+        env.get_template(TEMPLATE_NAME).render(**CONTEXT)
+        timings.append(time.perf_counter() - start)
+    report("  new Environment per README", timings)
+    timings = []
+    for _ in range(args.renders):
+        start = time.perf_counter()
+        load_template().render(**CONTEXT)
+        timings.append(time.perf_counter() - start)
+    report("  cached Environment", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""A local stand-in for the parts of the GitHub REST API the benchmarks exercise.
+
+Serves code search (paginated with `link:` headers, honouring `size:` qualifiers so
+searches over the 1000 result cap get sharded), repository contents, and
+`x-ratelimit-*` headers on every response, after an optional delay per request:
+
+    with FakeGitHub(search_results=2500, latency=0.005) as server:
+        client = Client(token="fake-token", base_url=server.base_url)
+"""
+
+import http.server
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlencode, urlparse
+
+SIZE_QUALIFIER = re.compile(r"\bsize:(\d+)\.\.(\d+)")
+USES_QUERY = re.compile(r"uses:\s*([^\s\"]+)")
+
+# per-resource budgets, as GitHub gives an authenticated token
+RATE_LIMITS = {"code_search": 10, "core": 5000}
+
+
+class FakeGitHub:
+    """Serves a synthetic org from a background thread until closed.
+
+    `search_results` files match every search, spread over sizes up to 64 KiB. Code
+    search reports its limit as `search_limit` requests a minute; keep it above what a
+    benchmark needs unless waiting on the rate limit is what's being measured.
+    Repositories named `missing-*` don't exist.
+    """
+
+    def __init__(
+        self,
+        search_results: int = 1000,
+        latency: float = 0.0,
+        search_limit: int = 100_000,
+    ):
+        self.search_results = search_results
+        self.latency = latency
+        self.limits = {**RATE_LIMITS, "code_search": search_limit}
+        self.requests = 0
+        self._used: dict[str, int] = {}
+        self._window = time.time() + 60
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._handler()
+        )
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "FakeGitHub":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def file_size(self, n: int) -> int:
+        return n * 7919 % 65536
+
+    def rate_limit_headers(self, resource: str) -> dict[str, str]:
+        with self._lock:
+            self.requests += 1
+            if time.time() >= self._window:
+                self._used.clear()
+                self._window = time.time() + 60
+            used = self._used[resource] = self._used.get(resource, 0) + 1
+        limit = self.limits[resource]
+        return {
+            "x-ratelimit-limit": str(limit),
+            "x-ratelimit-remaining": str(max(limit - used, 0)),
+            "x-ratelimit-reset": str(int(self._window)),
+            "x-ratelimit-resource": resource,
+        }
+
+    def search(self, params: dict[str, str]) -> tuple[dict, dict[str, str]]:
+        query = params.get("q", "")
+        per_page = int(params.get("per_page", 30))
+        page = int(params.get("page", 1))
+        matches = range(self.search_results)
+        if bounds := SIZE_QUALIFIER.search(query):
+            low, high = map(int, bounds.groups())
+            matches = [n for n in matches if low <= self.file_size(n) <= high]
+        uses = USES_QUERY.search(query)
+        target = uses.group(1) if uses else "org/action"
+        # like the real thing, only the first 1000 results can be paged through
+        reachable = matches[:1000]
+        items = [
+            {
+                "name": "ci.yml",
+                "path": ".github/workflows/ci.yml",
+                "sha": f"{n:040x}",
+                "html_url": f"https://github.com/consumer/repo-{n}/blob/main/ci.yml",
+                "repository": {"full_name": f"consumer/repo-{n}"},
+                "text_matches": [{"fragment": f"uses: {target}@v{n % 3 + 1}"}],
+            }
+            for n in reachable[(page - 1) * per_page : page * per_page]
+        ]
+        body = {
+            "total_count": len(matches),
+            "incomplete_results": False,
+            "items": items,
+        }
+        last = max(1, -(-len(reachable) // per_page))
+        links = []
+        if page < last:
+            links.append(("next", page + 1))
+        links.append(("last", last))
+        link = ", ".join(
+            f"<{self.base_url}/search/code?{urlencode({**params, 'page': n})}>; "
+            f'rel="{rel}"'
+            for rel, n in links
+        )
+        return body, {"link": link}
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlparse(self.path)
+                params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                status, body, headers = 404, {"message": "Not Found"}, {}
+                if url.path == "/search/code":
+                    resource = "code_search"
+                    status = 200
+                    body, headers = server.search(params)
+                else:
+                    resource = "core"
+                    parts = url.path.split("/")
+                    if (
+                        parts[1:2] == ["repos"]
+                        and parts[4:5] == ["contents"]
+                        and not parts[3].startswith("missing-")
+                    ):
+                        status = 200
+                        body = [
+                            {"name": "action.yml", "type": "file"},
+                            {"name": "README.md", "type": "file"},
+                        ]
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in {
+                    **server.rate_limit_headers(resource),
+                    **headers,
+                }.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
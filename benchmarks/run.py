@@ -0,0 +1,215 @@
+"""Run the benchmark suite, save the results as JSON and flag regressions.
+
+Everything that talks to GitHub runs against `fake_github.FakeGitHub`, a local server
+with `--latency-ms` of delay per request, so results don't depend on the network or
+use up a token's rate limit:
+
+  - usage: `action-tools usage` end to end, validating the target then searching
+    for it over `--search-results` results (sharded once over the 1000 result cap)
+  - search_code: following `link:` headers through 10 pages of code search
+  - validate_exists: checking 50 action targets, one request each
+  - classify_target: parsing 100k targets, with no requests at all
+  - gendocs_cold/gendocs_warm: `generate_action_docs` on synthetic action.yml files
+    with 10, 100 and 1000 inputs, with the template environment reloaded before each
+    render (cold) or kept between them (warm)
+
+Each benchmark reports the median of `--rounds` runs. Results are compared against
+`--baseline` when it exists, and any median more than `--threshold` slower than its
+baseline fails the run. `--save-baseline` records this run as the new baseline.
+
+    uv run python benchmarks/run.py --rounds 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from fake_github import FakeGitHub
+
+from action_tools import gendocs
+from action_tools.github import Client
+from action_tools.usage import _usage, validate_exists
+from action_tools.uses import classify_target
+
+HERE = pathlib.Path(__file__).parent
+TARGET = "some-org/some-action"
+INPUT_COUNTS = (10, 100, 1000)
+
+
+def measure(fn: Callable[[], object], rounds: int) -> dict:
+    fn()  # warm up connections, imports and caches that every later call shares
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "rounds": rounds,
+    }
+
+
+def synthetic_action(inputs: int) -> str:
+    lines = [
+        "name: Synthetic action",
+        "description: An action with a lot of inputs",
+        "inputs:",
+    ]
+    for n in range(inputs):
+        lines += [
+            f"  input-{n}:",
+            f"    description: Input number {n}, which does something",
+            f"    required: {'true' if n % 3 == 0 else 'false'}",
+        ]
+        if n % 2:
+            lines.append(f"    default: value-{n}")
+        else:
+            lines.append(f"    example: example-{n}")
+    lines += ["runs:", "  using: node20", "  main: index.js"]
+    return "\n".join(lines) + "\n"
+
+
+def bench_github(args: argparse.Namespace) -> dict[str, dict]:
+    results = {}
+    with (
+        FakeGitHub(
+            search_results=args.search_results, latency=args.latency_ms / 1000
+        ) as server,
+        Client(token="fake-token", base_url=server.base_url) as client,
+    ):
+
+        def usage():
+            # the sharded search reports its shards on stderr
+            with (
+                contextlib.redirect_stdout(io.StringIO()),
+                contextlib.redirect_stderr(io.StringIO()),
+            ):
+                _usage(TARGET, "fake-token", client)
+
+        results["usage"] = measure(usage, args.rounds)
+        results["search_code"] = measure(
+            lambda: client.search_code(f'"uses: {TARGET}"', max_pages=10), args.rounds
+        )
+        targets = [classify_target(f"some-org/action-{n}") for n in range(50)]
+        results["validate_exists"] = measure(
+            lambda: [validate_exists(target, client) for target in targets],
+            args.rounds,
+        )
+    return results
+
+
+def bench_classify(args: argparse.Namespace) -> dict[str, dict]:
+    targets = [
+        f"org-{n % 100}/repo-{n}/.github/workflows/ci.yml"
+        if n % 4 == 0
+        else f"org-{n % 100}/repo-{n}/path/to/action-{n % 7}"
+        for n in range(100_000)
+    ]
+    return {
+        "classify_target": measure(
+            lambda: [classify_target(target) for target in targets], args.rounds
+        )
+    }
+
+
+def bench_gendocs(args: argparse.Namespace) -> dict[str, dict]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for inputs in INPUT_COUNTS:
+            action = pathlib.Path(tmp, f"action-{inputs}", "action.yml")
+            action.parent.mkdir()
+            action.write_text(synthetic_action(inputs))
+            readme = action.with_name("README.md")
+
+            def cold():
+                gendocs.reload_templates()
+                gendocs.generate_action_docs(action, readme, action_path="org/repo")
+
+            def warm():
+                gendocs.generate_action_docs(action, readme, action_path="org/repo")
+
+            results[f"gendocs_cold[{inputs}]"] = measure(cold, args.rounds)
+            results[f"gendocs_warm[{inputs}]"] = measure(warm, args.rounds)
+    return results
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    found = []
+    for name, result in results["benchmarks"].items():
+        if (before := baseline["benchmarks"].get(name)) is None:
+            continue
+        ratio = result["median"] / before["median"]
+        if ratio > 1 + threshold:
+            found.append(
+                f"{name}: {before['median'] * 1000:.2f}ms -> "
+                f"{result['median'] * 1000:.2f}ms ({ratio:.2f}x)"
+            )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--search-results", type=int, default=1500)
+    parser.add_argument("--output", type=pathlib.Path, default=HERE / "results.json")
+    parser.add_argument("--baseline", type=pathlib.Path, default=HERE / "baseline.json")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="fraction slower than the baseline that counts as a regression",
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    benchmarks = {}
+    for suite in (bench_github, bench_classify, bench_gendocs):
+        for name, result in suite(args).items():
+            print(
+                f"{name:<24} median {result['median'] * 1000:9.2f}ms "
+                f"min {result['min'] * 1000:9.2f}ms"
+            )
+            benchmarks[name] = result
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            "rounds": args.rounds,
+            "latency_ms": args.latency_ms,
+            "search_results": args.search_results,
+        },
+        "benchmarks": benchmarks,
+    }
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"saved baseline to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline to make one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("options") != results["options"]:
+        print("warning: baseline was run with different options", file=sys.stderr)
+    if found := regressions(results, baseline, args.threshold):
+        print(f"regressions over {args.threshold:.0%}:", file=sys.stderr)
+        for line in found:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+    print(f"no regressions over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
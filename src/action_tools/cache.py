@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Optional
+
+# only needed once there are responses to cache; gendocs imports this module just for
+# DEFAULT_CACHE_DIR
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_CACHE_DIR = (
+    pathlib.Path(os.environ.get("XDG_CACHE_HOME", pathlib.Path.home() / ".cache"))
+    / "action-tools"
+)
+DEFAULT_MAX_SIZE = 200 * 1024 * 1024
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# describe the bytes on the wire rather than the decoded body we store
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+@dataclass
+class CachedResponse:
+    key: str
+    headers: list[tuple[str, str]]
+    body: bytes
+
+    def conditional_headers(self) -> dict:
+        headers = dict(self.headers)
+        conditional = {}
+        if etag := headers.get("etag"):
+            conditional["If-None-Match"] = etag
+        if last_modified := headers.get("last-modified"):
+            conditional["If-Modified-Since"] = last_modified
+        return conditional
+
+
+class ResponseCache:
+    """On-disk (SQLite) cache of GitHub API responses, revalidated with conditional requests.
+
+    Only responses carrying an `ETag` or `Last-Modified` are stored. A hit still costs a
+    request, but GitHub answers it with a `304 Not Modified` that isn't counted against
+    the rate limit. Entries are evicted once they haven't been revalidated for `ttl`
+    seconds, and least recently used entries go first when the cache outgrows `max_size`
+    bytes.
+
+    Git blobs never change, so they're also kept by SHA and served without a request,
+    in their own `max_size` bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir: pathlib.Path = DEFAULT_CACHE_DIR,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.path = cache_dir / "http-cache.sqlite3"
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.blob_hits = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                used_at REAL NOT NULL
+            );
+            """
+        )
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    @staticmethod
+    def key(request: "httpx.Request") -> str:
+        # responses differ by what we ask for and who's asking
+        parts = [
+            str(request.url),
+            request.headers.get("accept", ""),
+            request.headers.get("authorization", ""),
+        ]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT headers, body FROM responses WHERE key = ? AND stored_at >= ?",
+                (key, self.clock() - self.ttl),
+            ).fetchone()
+        if row is None:
+            return None
+        headers, body = row
+        return CachedResponse(key, [tuple(pair) for pair in json.loads(headers)], body)
+
+    def resolve(
+        self, key: str, entry: Optional[CachedResponse], response: "httpx.Response"
+    ) -> "httpx.Response":
+        """Serve a `304` from `entry`, or store a fresh response for next time"""
+        import httpx
+
+        now = self.clock()
+        if entry is not None and response.status_code == 304:
+            with self._lock:
+                self.hits += 1
+                self._db.execute(
+                    "UPDATE responses SET stored_at = ?, used_at = ? WHERE key = ?",
+                    (now, now, key),
+                )
+                self._db.commit()
+            return httpx.Response(
+                200, headers=entry.headers, content=entry.body, request=response.request
+            )
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code == 200 and (
+            "etag" in response.headers or "last-modified" in response.headers
+        ):
+            self._store(key, response, now)
+        return response
+
+    def _store(self, key: str, response: "httpx.Response", now: float) -> None:
+        headers = [
+            (name, value)
+            for name, value in response.headers.items()
+            if name not in SKIPPED_HEADERS
+        ]
+        body = response.content
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(headers), body, len(body), now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM responses WHERE stored_at < ?", (now - self.ttl,))
+        self._db.execute(
+            """
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY used_at DESC, key) AS total
+                    FROM responses
+                ) WHERE total > ?
+            )
+            """,
+            (self.max_size,),
+        )
+
+    def get_blob(self, sha: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body FROM blobs WHERE sha = ?", (sha,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.blob_hits += 1
+            self._db.execute(
+                "UPDATE blobs SET used_at = ? WHERE sha = ?", (self.clock(), sha)
+            )
+            self._db.commit()
+        return row[0]
+
+    def put_blob(self, sha: str, body: bytes) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?)",
+                (sha, body, len(body), self.clock()),
+            )
+            self._db.execute(
+                """
+                DELETE FROM blobs WHERE sha IN (
+                    SELECT sha FROM (
+                        SELECT sha, SUM(size) OVER (ORDER BY used_at DESC, sha) AS total
+                        FROM blobs
+                    ) WHERE total > ?
+                )
+                """,
+                (self.max_size,),
+            )
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+        if self.blob_hits:
+            stats["blob_hits"] = self.blob_hits
+        return stats
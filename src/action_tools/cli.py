@@ -1,17 +1,96 @@
+import importlib
+from typing import Optional
+
 import click
 
-from .gendocs import gendocs
-from .usage import usage
+# Each subcommand's module, and the first line of its help for `action-tools --help`.
+# Kept here so listing the subcommands doesn't import them all; a test checks they
+# match the commands themselves.
+SUBCOMMANDS = {
+    "gendocs": (
+        "action_tools.gendocs",
+        "Generate documentation artifacts for GitHub Actions components.",
+    ),
+    "index": (
+        "action_tools.index",
+        "Build an offline index of `uses:` references from local git repositories.",
+    ),
+    "serve": (
+        "action_tools.serve",
+        "Answer `usage` queries over HTTP from a long-running process with warm caches.",
+    ),
+    "usage": (
+        "action_tools.usage",
+        "Search GitHub for repositories that reference a reusable workflow or action.",
+    ),
+}
+
+
+class LazyGroup(click.Group):
+    """A group that only imports a subcommand's module when that subcommand is run"""
+
+    def __init__(self, *args, lazy_subcommands: dict[str, tuple[str, str]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_subcommands = lazy_subcommands
 
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted([*super().list_commands(ctx), *self.lazy_subcommands])
 
-@click.group()
-def main():
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.lazy_subcommands:
+            return super().get_command(ctx, cmd_name)
+        module_name, _ = self.lazy_subcommands[cmd_name]
+        return getattr(importlib.import_module(module_name), cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter):
+        # as click.Group does, but from the stored help rather than the commands
+        names = self.list_commands(ctx)
+        limit = formatter.width - 6 - max(map(len, names), default=0)
+        rows = []
+        for name in names:
+            if name in self.lazy_subcommands:
+                _, help = self.lazy_subcommands[name]
+                command = click.Command(name, help=help)
+                rows.append((name, command.get_short_help_str(limit)))
+            elif not (command := self.commands[name]).hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_subcommands=SUBCOMMANDS)
+@click.option(
+    "--stats",
+    "show_stats",
+    is_flag=True,
+    help="Print the time spent in each operation and HTTP request to stderr",
+)
+@click.option(
+    "--trace-file",
+    type=click.File("w"),
+    help="Write every operation and HTTP request to a JSON trace, as OpenTelemetry-style spans",
+)
+@click.pass_context
+def main(ctx: click.Context, show_stats: bool, trace_file):
     """Action Tools CLI"""
-    pass
+    if not (show_stats or trace_file):
+        return
+    # deferred like the subcommands, though it's light; nothing's recorded otherwise
+    from . import stats
+
+    recorder = stats.Recorder()
 
+    def report():
+        if show_stats:
+            click.echo("\n".join(recorder.summary()), err=True)
+        if trace_file:
+            recorder.write_trace(trace_file)
 
-main.add_command(gendocs)
-main.add_command(usage)
+    # closed in reverse: the span ends, recording stops, then the report
+    ctx.call_on_close(report)
+    ctx.with_resource(stats.recording(recorder))
+    ctx.with_resource(recorder.span(ctx.invoked_subcommand))
 
 
 if __name__ == "__main__":
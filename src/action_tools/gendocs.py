@@ -1,18 +1,52 @@
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import json
+import os
 import pathlib
 import re
 import subprocess
-from typing import Any, Optional
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
 
 import click
-from jinja2 import Environment, FileSystemLoader
-from ruamel.yaml import YAML
 
-from .models import ActionInput, GitHubAction
+from . import stats, watch
+from .cache import DEFAULT_CACHE_DIR
+from .gitmeta import find_git_root, format_remotes, read_remotes
+
+# jinja2, ruamel.yaml, pydantic (via .models) and importlib's resources and metadata
+# are imported where they're used, so `--help` and up to date `--check` runs don't pay
+# for them
+if TYPE_CHECKING:
+    from jinja2 import Environment, Template
+
+    from .models import ActionInput, GitHubAction
 
 GITHUB_REMOTE_REGEX = re.compile(r"github\.com[:/](?P<org_repo>[^/\s.]+/[^/\s.]+)")
 
+ACTION_FILENAMES = ("action.yml", "action.yaml")
+SKIPPED_DIRS = {".git", "node_modules"}
+
+DEFAULT_MANIFEST_NAME = "gendocs-manifest.json"
+
+TEMPLATE_NAME = "action_readme.md.jinja2"
+TEMPLATES_DIR = pathlib.Path(__file__).parent / "templates"
+TEMPLATE_CACHE_DIR = DEFAULT_CACHE_DIR / "jinja"
+
+# Written by `make compile-templates` before building a release, and skipped if the
+# templates have changed since
+COMPILED_TEMPLATES_DIR = pathlib.Path(__file__).parent / "compiled_templates"
+COMPILED_DIGESTS_NAME = "digests.json"
+
 
 def list_git_remotes(git_root: pathlib.Path) -> str:
+    # read .git/config ourselves where we can, rather than spawn a process per call
+    if (remotes := read_remotes(git_root)) is not None:
+        return format_remotes(remotes)
     try:
         result = subprocess.run(
             ["git", "-C", str(git_root), "remote", "-v"],
@@ -27,32 +61,47 @@ def list_git_remotes(git_root: pathlib.Path) -> str:
     return result.stdout
 
 
-def get_action_path(input_path: pathlib.Path) -> str:
-    """Return GitHub 'org/repo[/subdir]' for an action's path inside a Git repo with at least one Github remote"""
-
-    # Walk up to find the first .git directory
-    git_root = None
-    for directory in input_path.parents:
-        if (directory / ".git").exists():
-            git_root = directory.resolve()
-            break
-    if not git_root:
-        raise FileNotFoundError("No .git directory found in any parent directories.")
-
-    org_repo = None
+def get_github_repo(git_root: pathlib.Path) -> str:
+    """Return the 'org/repo' of the first GitHub remote of the repo at `git_root`"""
     for line in list_git_remotes(git_root).splitlines():
         if match := GITHUB_REMOTE_REGEX.search(line):
-            org_repo = match.group("org_repo")
-            break
-    if not org_repo:
-        raise ValueError("No GitHub remote found.")
+            return match.group("org_repo")
+    raise ValueError("No GitHub remote found.")
+
+
+def get_action_path(
+    input_path: pathlib.Path,
+    git_root: Optional[pathlib.Path] = None,
+    org_repo: Optional[str] = None,
+) -> str:
+    """Return GitHub 'org/repo[/subdir]' for an action's path inside a Git repo with at least one Github remote
+
+    `git_root` and `org_repo` are looked up when not given; pass them in to reuse them
+    across many actions in the same repo.
+    """
+    if git_root is None:
+        git_root = find_git_root(input_path.parent)
+    if org_repo is None:
+        org_repo = get_github_repo(git_root)
 
     # Compute relative path from repo root to directory containing action
     rel_path = input_path.resolve().parent.relative_to(git_root)
     return f"{org_repo}/{rel_path}".rstrip("/.")
 
 
-def format_usage_lines(inputs: dict[str, ActionInput]):
+def find_actions(root: pathlib.Path) -> list[pathlib.Path]:
+    """Return every action.yml (or action.yaml) under `root`"""
+    actions = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in SKIPPED_DIRS)
+        for filename in ACTION_FILENAMES:
+            if filename in filenames:
+                actions.append(pathlib.Path(directory) / filename)
+                break
+    return actions
+
+
+def format_usage_lines(inputs: dict[str, "ActionInput"]):
     for key, spec in inputs.items():
         value = str(spec.example if spec.required else spec.default)
         if "\n" in value:
@@ -62,7 +111,7 @@ def format_usage_lines(inputs: dict[str, ActionInput]):
             yield f"    {key}: {value}"
 
 
-def generate_example_usage(action_path: str, inputs: dict[str, ActionInput]) -> str:
+def generate_example_usage(action_path: str, inputs: dict[str, "ActionInput"]) -> str:
     input_usage = [
         "```yaml",
         f"- uses: {action_path}",
@@ -89,7 +138,7 @@ def load_custom_usage_examples(usage_examples_dir: pathlib.Path) -> str:
 
 
 def generate_minimal_usage_example(
-    action_path: str, inputs: dict[str, ActionInput]
+    action_path: str, inputs: dict[str, "ActionInput"]
 ) -> str:
     inputs = {key: spec for key, spec in inputs.items() if spec.required}
     return generate_example_usage(action_path, inputs)
@@ -105,16 +154,167 @@ def generate_defaults_usage_example(action_path: str, inputs: dict[str, Any]) ->
 # =============================================================================
 # Main Action README generator
 # =============================================================================
-def generate_action_docs(
+@functools.cache
+def template_digest(name: str = TEMPLATE_NAME) -> str:
+    import importlib.resources
+
+    source = importlib.resources.files(__package__).joinpath("templates", name)
+    return hashlib.sha256(source.read_bytes()).hexdigest()
+
+
+def compiled_templates_are_current(directory: pathlib.Path) -> bool:
+    """Whether `directory` holds `compile_templates` output for today's template sources"""
+    try:
+        digests = json.loads((directory / COMPILED_DIGESTS_NAME).read_text())
+    except (OSError, ValueError):
+        return False
+    return digests == {TEMPLATE_NAME: template_digest(TEMPLATE_NAME)}
+
+
+def compile_templates(target: pathlib.Path) -> None:
+    """Compile the templates ahead of time into Python modules in `target`"""
+    from jinja2 import Environment, PackageLoader
+
+    env = Environment(loader=PackageLoader(__package__, "templates"))
+    target.mkdir(parents=True, exist_ok=True)
+    env.compile_templates(str(target), zip=None, ignore_errors=False)
+    digests = {TEMPLATE_NAME: template_digest(TEMPLATE_NAME)}
+    (target / COMPILED_DIGESTS_NAME).write_text(json.dumps(digests))
+
+
+@functools.cache
+def get_environment() -> "Environment":
+    """Return the process-wide Jinja environment, which keeps compiled templates around.
+
+    Templates compiled ahead of time are loaded as plain Python modules when present and
+    current. Otherwise templates are loaded from the package, with their compiled
+    bytecode cached on disk so only the first run after a change parses them.
+    """
+    from jinja2 import (
+        ChoiceLoader,
+        Environment,
+        FileSystemBytecodeCache,
+        ModuleLoader,
+        PackageLoader,
+    )
+
+    loader = PackageLoader(__package__, "templates")
+    if compiled_templates_are_current(COMPILED_TEMPLATES_DIR):
+        loader = ChoiceLoader([ModuleLoader(COMPILED_TEMPLATES_DIR), loader])
+    try:
+        TEMPLATE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(TEMPLATE_CACHE_DIR))
+    except OSError:
+        bytecode_cache = None
+    return Environment(loader=loader, bytecode_cache=bytecode_cache)
+
+
+def load_template() -> "Template":
+    return get_environment().get_template(TEMPLATE_NAME)
+
+
+def reload_templates() -> None:
+    """Forget loaded templates, so the next `load_template` picks up changes to them"""
+    template_digest.cache_clear()
+    get_environment.cache_clear()
+
+
+def docs_fingerprint(
     input_path: pathlib.Path,
-    output_path: pathlib.Path,
-    usage_examples_dir: Optional[pathlib.Path] = None,
-) -> None:
+    usage_examples_dir: Optional[pathlib.Path],
+    action_path: str,
+    template_name: str = TEMPLATE_NAME,
+) -> str:
+    """Hash everything a README is rendered from: the action, its usage examples, the
+    action path, and the template and version of action-tools rendering it"""
+    import importlib.metadata
+
+    parts = [
+        importlib.metadata.version("action-tools").encode(),
+        template_digest(template_name).encode(),
+        action_path.encode(),
+        input_path.read_bytes(),
+    ]
+    if usage_examples_dir and usage_examples_dir.is_dir():
+        for file_path in sorted(usage_examples_dir.glob("*.md")):
+            parts += [file_path.name.encode(), file_path.read_bytes()]
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class DocsManifest:
+    """Fingerprints of the inputs and output of each README we've generated.
+
+    A README is current if its inputs hash to the same fingerprint as last time and
+    the file on disk still hashes to what we wrote, so hand edits are caught too.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            self.entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def __enter__(self) -> "DocsManifest":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.save()
+
+    def is_current(self, output_path: pathlib.Path, fingerprint: str) -> bool:
+        with self._lock:
+            entry = self.entries.get(str(output_path.resolve()))
+        if not entry or entry["inputs"] != fingerprint:
+            return False
+        try:
+            output = output_path.read_bytes()
+        except OSError:
+            return False
+        return hashlib.sha256(output).hexdigest() == entry["output"]
+
+    def record(self, output_path: pathlib.Path, fingerprint: str, output: bytes):
+        entry = {"inputs": fingerprint, "output": hashlib.sha256(output).hexdigest()}
+        with self._lock:
+            self.entries[str(output_path.resolve())] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+            os.replace(temp_path, self.path)
+            self._dirty = False
+
+
+def load_action(input_path: pathlib.Path) -> "GitHubAction":
+    from ruamel.yaml import YAML
+
+    from .models import GitHubAction
+
     yaml = YAML()
     data = yaml.load(input_path.read_text())
-    action = GitHubAction(**data)
+    return GitHubAction(**data)
+
+
+def render_action_docs(
+    input_path: pathlib.Path,
+    action_path: str,
+    template: "Template",
+    usage_examples_dir: Optional[pathlib.Path] = None,
+    action: Optional["GitHubAction"] = None,
+) -> str:
+    if action is None:
+        action = load_action(input_path)
     # get inputs and generate example usage
-    action_path = get_action_path(input_path)
     minimal_usage_example = generate_minimal_usage_example(action_path, action.inputs)
     defaults_usage_example = generate_defaults_usage_example(action_path, action.inputs)
 
@@ -123,10 +323,7 @@ def generate_action_docs(
     if usage_examples_dir:
         custom_usage_examples = load_custom_usage_examples(usage_examples_dir)
 
-    # build template and write out README
-    env = Environment(loader=FileSystemLoader("src/action_tools/templates"))
-    template = env.get_template("action_readme.md.jinja2")
-    output = template.render(
+    return template.render(
         name=action.name,
         description=action.description,
         inputs=action.inputs,
@@ -135,7 +332,245 @@ def generate_action_docs(
         defaults_usage_example=defaults_usage_example,
         custom_usage_examples=custom_usage_examples,
     )
-    output_path.write_text(output)
+
+
+@stats.timed("generate_action_docs")
+def generate_action_docs(
+    input_path: pathlib.Path,
+    output_path: pathlib.Path,
+    usage_examples_dir: Optional[pathlib.Path] = None,
+    action_path: Optional[str] = None,
+    template: Optional["Template"] = None,
+    manifest: Optional[DocsManifest] = None,
+    check: bool = False,
+    action: Optional["GitHubAction"] = None,
+) -> bool:
+    """Render a README for an action, writing it only if it differs from `output_path`.
+
+    With a `manifest`, rendering is skipped entirely when nothing it depends on changed.
+    With `check`, nothing is written. Returns whether the README changed (or, with
+    `check`, would have). `action` is the already parsed `input_path`, if at hand.
+    """
+    if action_path is None:
+        action_path = get_action_path(input_path)
+
+    fingerprint = None
+    if manifest is not None:
+        fingerprint = docs_fingerprint(
+            input_path,
+            usage_examples_dir,
+            action_path,
+            template.name if template else TEMPLATE_NAME,
+        )
+        if manifest.is_current(output_path, fingerprint):
+            return False
+
+    if template is None:
+        template = load_template()
+    output = render_action_docs(
+        input_path, action_path, template, usage_examples_dir, action
+    ).encode()
+    return write_action_docs(output_path, output, manifest, fingerprint, check)
+
+
+def write_action_docs(
+    output_path: pathlib.Path,
+    output: bytes,
+    manifest: Optional[DocsManifest] = None,
+    fingerprint: Optional[str] = None,
+    check: bool = False,
+) -> bool:
+    """Write a rendered README unless `output_path` already has it, as
+    `generate_action_docs` does"""
+    try:
+        changed = output_path.read_bytes() != output
+    except OSError:
+        changed = True
+    if changed and not check:
+        output_path.write_bytes(output)
+    if manifest is not None and (not changed or not check):
+        manifest.record(output_path, fingerprint, output)
+    return changed
+
+
+@dataclass
+class ActionDocs:
+    """Where one action's README comes from and goes"""
+
+    input_path: pathlib.Path
+    output_path: pathlib.Path
+    action_path: str
+    usage_examples_dir: Optional[pathlib.Path] = None
+
+    def generate(self, template: Optional["Template"] = None, **kwargs) -> bool:
+        return generate_action_docs(
+            input_path=self.input_path,
+            output_path=self.output_path,
+            usage_examples_dir=self.usage_examples_dir,
+            action_path=self.action_path,
+            template=template,
+            **kwargs,
+        )
+
+    def fingerprint(self) -> str:
+        return docs_fingerprint(
+            self.input_path, self.usage_examples_dir, self.action_path
+        )
+
+
+def render_docs(doc: ActionDocs) -> Union[bytes, Exception]:
+    """Render one action's README, or return the error rendering it. Runs in worker
+    processes, so it takes and returns only what pickles."""
+    try:
+        return render_action_docs(
+            doc.input_path, doc.action_path, load_template(), doc.usage_examples_dir
+        ).encode()
+    except Exception as e:
+        return e
+
+
+def render_all_docs(
+    docs: list[ActionDocs], jobs: int = 1
+) -> list[Union[bytes, Exception]]:
+    """Render READMEs for many actions, spread across `jobs` processes.
+
+    Spans can't be carried into worker processes, so those renders are timed as one
+    `render_all_docs` span; rendered here, each also gets a `render_docs` span.
+    """
+    jobs = min(jobs, len(docs))
+    with stats.span("render_all_docs", actions=len(docs), jobs=max(jobs, 1)):
+        if jobs <= 1:
+            outputs = []
+            for doc in docs:
+                with stats.span("render_docs", action=doc.action_path):
+                    outputs.append(render_docs(doc))
+            return outputs
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+            # one chunk per worker, so each loads the template once
+            return list(pool.map(render_docs, docs, chunksize=-(-len(docs) // jobs)))
+
+
+def find_all_docs(
+    root: pathlib.Path, usage_examples_dir_name: Optional[str] = None
+) -> list[ActionDocs]:
+    """Return the README.md to generate next to every action under `root`.
+
+    The git root and GitHub remote are resolved once and shared by every action.
+    """
+    git_root = find_git_root(root)
+    org_repo = get_github_repo(git_root)
+    docs = []
+    for input_path in find_actions(root):
+        usage_examples_dir = None
+        if usage_examples_dir_name:
+            usage_examples_dir = input_path.parent / usage_examples_dir_name
+            if not usage_examples_dir.is_dir():
+                usage_examples_dir = None
+        docs.append(
+            ActionDocs(
+                input_path=input_path,
+                output_path=input_path.parent / "README.md",
+                action_path=get_action_path(input_path, git_root, org_repo),
+                usage_examples_dir=usage_examples_dir,
+            )
+        )
+    return docs
+
+
+def generate_all_docs(
+    root: pathlib.Path,
+    usage_examples_dir_name: Optional[str] = None,
+    jobs: int = 1,
+    manifest: Optional[DocsManifest] = None,
+    check: bool = False,
+) -> dict[pathlib.Path, Union[bool, Exception]]:
+    """Generate a README.md next to every action under `root`.
+
+    Rendering is CPU bound, so READMEs the manifest doesn't show to be current are
+    rendered across `jobs` processes, and written and recorded in the manifest here.
+    Returns, for each action, whether its README changed (see `generate_action_docs`),
+    or the error generating it.
+    """
+    docs = find_all_docs(root, usage_examples_dir_name)
+    results: dict[pathlib.Path, Union[bool, Exception]] = {}
+    fingerprints: dict[pathlib.Path, str] = {}
+    stale = []
+    for doc in docs:
+        if manifest is not None:
+            try:
+                fingerprints[doc.input_path] = doc.fingerprint()
+            except OSError as e:
+                results[doc.input_path] = e
+                continue
+            if manifest.is_current(doc.output_path, fingerprints[doc.input_path]):
+                results[doc.input_path] = False
+                continue
+        stale.append(doc)
+
+    for doc, output in zip(stale, render_all_docs(stale, jobs)):
+        if isinstance(output, Exception):
+            results[doc.input_path] = output
+            continue
+        try:
+            results[doc.input_path] = write_action_docs(
+                doc.output_path,
+                output,
+                manifest,
+                fingerprints.get(doc.input_path),
+                check,
+            )
+        except OSError as e:
+            results[doc.input_path] = e
+    return {doc.input_path: results[doc.input_path] for doc in docs}
+
+
+def watch_docs(
+    docs: list[ActionDocs],
+    manifest: Optional[DocsManifest] = None,
+    echo: Callable[..., None] = click.echo,
+    **poll_kwargs,
+) -> None:
+    """Regenerate READMEs as their action.yml, usage examples or the template change.
+
+    Parsed actions and the compiled template are kept in memory between changes, so
+    only what changed is re-read and only the affected READMEs are re-rendered. Runs
+    until interrupted.
+    """
+    template = load_template()
+    template_path = TEMPLATES_DIR / TEMPLATE_NAME
+    actions: dict[pathlib.Path, "GitHubAction"] = {}
+    affects: dict[pathlib.Path, list[ActionDocs]] = {template_path: list(docs)}
+    for doc in docs:
+        affects.setdefault(doc.input_path, []).append(doc)
+        if doc.usage_examples_dir:
+            affects.setdefault(doc.usage_examples_dir, []).append(doc)
+
+    for changed in watch.poll(affects, **poll_kwargs):
+        if template_path in changed:
+            reload_templates()
+            template = load_template()
+        stale = {}
+        for path in changed:
+            actions.pop(path, None)
+            # files inside a usage examples dir affect the dir's actions
+            for doc in affects.get(path, affects.get(path.parent, [])):
+                stale[doc.output_path] = doc
+        for doc in stale.values():
+            start = time.perf_counter()
+            try:
+                if doc.input_path not in actions:
+                    actions[doc.input_path] = load_action(doc.input_path)
+                updated = doc.generate(
+                    template, manifest=manifest, action=actions[doc.input_path]
+                )
+            except Exception as e:
+                echo(f"{doc.input_path}: {e}", err=True)
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            status = "updated" if updated else "unchanged"
+            echo(f"{doc.output_path} {status} in {elapsed:.1f}ms")
+        if manifest is not None:
+            manifest.save()
 
 
 # =============================================================================
@@ -147,6 +582,22 @@ def gendocs():
     pass
 
 
+def open_manifest(cache_dir: pathlib.Path, no_cache: bool):
+    if no_cache:
+        return contextlib.nullcontext()
+    return DocsManifest(cache_dir / DEFAULT_MANIFEST_NAME)
+
+
+def watch_until_interrupted(
+    docs: list[ActionDocs], manifest: Optional[DocsManifest]
+) -> None:
+    click.echo(f"Watching {len(docs)} action(s), press Ctrl+C to stop", err=True)
+    try:
+        watch_docs(docs, manifest)
+    except KeyboardInterrupt:
+        pass
+
+
 @gendocs.command()
 @click.option(
     "--input",
@@ -170,15 +621,142 @@ def gendocs():
     required=False,
     help="Path to directory containing custom usage examples to include",
 )
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Exit non-zero if the README is out of date, without writing it",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(path_type=pathlib.Path, file_okay=False),
+    default=DEFAULT_CACHE_DIR,
+    show_default="~/.cache/action-tools",
+    help="Directory for the manifest used to skip unchanged READMEs",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Always re-render instead of using the manifest"
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running, regenerating the README when action.yml, the usage examples "
+    "or the template change",
+)
 def action(
     input_path,
     output_path,
     usage_examples_dir,
+    check,
+    cache_dir,
+    no_cache,
+    watch,
 ):
     """Generate README.md from GitHub Actions action.yml"""
 
-    generate_action_docs(
+    if check and watch:
+        raise click.UsageError("--check and --watch can't be used together")
+    doc = ActionDocs(
         input_path=input_path,
         output_path=output_path,
+        action_path=get_action_path(input_path),
         usage_examples_dir=usage_examples_dir,
     )
+    with open_manifest(cache_dir, no_cache) as manifest:
+        changed = doc.generate(manifest=manifest, check=check)
+        if watch:
+            watch_until_interrupted([doc], manifest)
+    if check and changed:
+        raise click.ClickException(f"{output_path} is out of date")
+
+
+def report_all_docs(
+    results: dict[pathlib.Path, Union[bool, Exception]],
+) -> tuple[int, int]:
+    """Print the READMEs that changed and the actions that failed, and count them"""
+    failed = changed = 0
+    for input_path, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            click.echo(f"{input_path}: {result}", err=True)
+        elif result:
+            changed += 1
+            click.echo(input_path.parent / "README.md")
+    return failed, changed
+
+
+@gendocs.command(
+    "all",
+    epilog="""\b
+    Example Usage:
+      action-tools gendocs all
+      action-tools gendocs all actions/ --usage-examples-dir-name usage-examples
+      action-tools gendocs all --check
+      action-tools gendocs all --watch
+    """,
+)
+@click.argument(
+    "root",
+    type=click.Path(path_type=pathlib.Path, exists=True, file_okay=False),
+    default=".",
+)
+@click.option(
+    "--usage-examples-dir-name",
+    metavar="NAME",
+    help="Include custom usage examples from a directory with this name next to "
+    "each action.yml, where there is one",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="number of CPUs",
+    help="Number of processes to render READMEs with",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Exit non-zero if any README is out of date, without writing any",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(path_type=pathlib.Path, file_okay=False),
+    default=DEFAULT_CACHE_DIR,
+    show_default="~/.cache/action-tools",
+    help="Directory for the manifest used to skip unchanged READMEs",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Always re-render instead of using the manifest"
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running, regenerating READMEs as their action.yml, usage examples or "
+    "the template change",
+)
+def all_actions(root, usage_examples_dir_name, jobs, check, cache_dir, no_cache, watch):
+    """Generate a README.md next to every action.yml under ROOT.
+
+    Only READMEs that changed are written, and their paths printed.
+    """
+
+    if check and watch:
+        raise click.UsageError("--check and --watch can't be used together")
+    with open_manifest(cache_dir, no_cache) as manifest:
+        results = generate_all_docs(
+            root, usage_examples_dir_name, jobs, manifest=manifest, check=check
+        )
+        if watch and results:
+            report_all_docs(results)
+            watch_until_interrupted(
+                find_all_docs(root, usage_examples_dir_name), manifest
+            )
+            return
+    if not results:
+        raise click.ClickException(f"No action.yml found under {root}")
+    failed, changed = report_all_docs(results)
+    if failed:
+        raise click.ClickException(f"{failed} of {len(results)} actions failed")
+    if check and changed:
+        raise click.ClickException(
+            f"{changed} of {len(results)} READMEs are out of date"
+        )
@@ -1,9 +1,16 @@
+import asyncio
+import itertools
 import re
-from typing import Optional
+import time
+from typing import AsyncIterator, Iterator, Optional, Sequence
 from urllib.parse import parse_qsl, urlparse
 
 import httpx
 
+from . import stats
+from .cache import CachedResponse, ResponseCache
+from .ratelimit import RateLimitScheduler, resource_for
+
 
 class ClientStatusError(Exception):
     def __init__(
@@ -19,71 +26,505 @@ class ClientStatusError(Exception):
         self.response = response
 
 
+class GraphQLError(Exception):
+    def __init__(self, message: str, errors: list[dict]):
+        super().__init__(message)
+        self.errors = errors
+
+
 MAX_PER_PAGE = 100
 
+# Adds `text_matches` to search results: the fragments of each file that matched
+# https://docs.github.com/en/rest/search/search?apiVersion=2022-11-28#text-match-metadata
+TEXT_MATCH_MEDIA_TYPE = "application/vnd.github.text-match+json"
+
+# Returns a file's contents as-is instead of base64 encoded in JSON
+RAW_MEDIA_TYPE = "application/vnd.github.raw+json"
+
+# Lookups per GraphQL query in `get_objects`. Each is a cheap single-node lookup, so
+# this is bounded by query size rather than GitHub's point cost.
+GRAPHQL_BATCH_SIZE = 50
+
+# `object` lookups per alias; trees list their entry names so actions can be
+# recognized by their `action.yml` without another request
+OBJECT_FIELDS = "__typename ... on Tree { entries { name } }"
+
+# Keep enough idle connections around to cover a sweep of concurrent requests
+# against api.github.com without re-handshaking for every page or target.
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0
+)
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# used to match the `link:` headers as described here
+# https://docs.github.com/en/rest/using-the-rest-api/using-pagination-in-the-rest-api?apiVersion=2022-11-28#using-link-headers
+LINK_REGEX = re.compile(r'<(?P<url>[^>]+)>;\s*rel="(?P<rel>\w+)"')
+
+
+def parse_link_header(link_header: Optional[str]) -> dict[str, tuple[str, dict]]:
+    """Map each `rel` in a `link:` header to the (endpoint, params) it points at"""
+    links = {}
+    for match in LINK_REGEX.finditer(link_header or ""):
+        parsed = urlparse(match.group("url"))
+        links[match.group("rel")] = (parsed.path, dict(parse_qsl(parsed.query)))
+    return links
+
+
+def _raise_for_status(resp: httpx.Response) -> httpx.Response:
+    try:
+        resp.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        raise ClientStatusError(
+            str(exc),
+            status_code=exc.response.status_code,
+            request=exc.request,
+            response=exc.response,
+        ) from exc
+    return resp
+
+
+def _objects_query(lookups: Sequence[tuple[str, str, str]]) -> tuple[str, dict]:
+    """Build one query looking up each (owner, name, expression) under its own alias"""
+    params, fields, variables = [], [], {}
+    for i, (owner, name, expression) in enumerate(lookups):
+        params.append(f"$owner{i}: String!, $name{i}: String!, $expr{i}: String!")
+        fields.append(
+            f"r{i}: repository(owner: $owner{i}, name: $name{i}) "
+            f"{{ object(expression: $expr{i}) {{ {OBJECT_FIELDS} }} }}"
+        )
+        variables.update({f"owner{i}": owner, f"name{i}": name, f"expr{i}": expression})
+    return f"query({', '.join(params)}) {{ {' '.join(fields)} }}", variables
+
+
+def _objects_from(data: dict, count: int) -> list[Optional[dict]]:
+    return [(data.get(f"r{i}") or {}).get("object") for i in range(count)]
+
+
+def _graphql_data(resp: httpx.Response) -> dict:
+    body = resp.json()
+    # a repository that doesn't exist (or that the token can't see) is reported as a
+    # NOT_FOUND error alongside a null node; anything else fails the whole query
+    errors = [e for e in body.get("errors") or [] if e.get("type") != "NOT_FOUND"]
+    if errors or body.get("data") is None:
+        errors = errors or body.get("errors") or []
+        message = "; ".join(e.get("message", "") for e in errors)
+        raise GraphQLError(message or "GraphQL query returned no data", errors)
+    return body["data"]
+
+
+class _BaseClient:
+    _asynchronous = False
 
-class Client:
     def __init__(
         self,
         token: str,
-        base_url: str = "https://api.github.com",
+        base_url: str,
+        scheduler: Optional[RateLimitScheduler],
+        cache: Optional[ResponseCache],
     ):
         self.token = token
         self.base_url = base_url
+        self.scheduler = scheduler or RateLimitScheduler()
+        self.cache = cache
 
-    def _get(self, endpoint: str, params: Optional[dict] = None) -> httpx.Response:
-        with httpx.Client() as client:
-            headers = {
+    def _session_options(
+        self, limits: Optional[httpx.Limits], http2: bool, timeout: httpx.Timeout
+    ) -> dict:
+        # `http2=True` requires the `h2` package (`action-tools[http2]`)
+        return dict(
+            headers={
                 "Authorization": f"Bearer {self.token}",
                 "Accept": "application/vnd.github+json",
-            }
-            resp = client.get(self.base_url + endpoint, headers=headers, params=params)
-            try:
-                resp.raise_for_status()
-            except httpx.HTTPStatusError as exc:
-                raise ClientStatusError(
-                    str(exc),
-                    status_code=exc.response.status_code,
-                    request=exc.request,
-                    response=exc.response,
-                ) from exc
+            },
+            limits=limits or DEFAULT_LIMITS,
+            http2=http2,
+            timeout=timeout,
+        )
+
+    def _build_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict],
+        json: Optional[dict],
+        headers: Optional[dict],
+    ) -> tuple[httpx.Request, Optional[CachedResponse]]:
+        request = self._session.build_request(
+            method, self.base_url + endpoint, params=params, json=json, headers=headers
+        )
+        cached = None
+        if method != "GET" or not self.cache:
+            return request, cached
+        if cached := self.cache.get(self.cache.key(request)):
+            request.headers.update(cached.conditional_headers())
+        return request, cached
+
+    def _start_trace(
+        self,
+        request: httpx.Request,
+        endpoint: str,
+        resource: str,
+        attempt: int,
+        waited: float,
+    ) -> Optional[stats.RequestTrace]:
+        if (recorder := stats.active()) is None:
+            return None
+        trace = recorder.start_request(
+            request.method, endpoint, resource, attempt, waited
+        )
+        request.extensions["trace"] = trace.atrace if self._asynchronous else trace
+        return trace
+
+    @staticmethod
+    def _finish_trace(
+        trace: Optional[stats.RequestTrace],
+        cached: Optional[CachedResponse],
+        resp: Optional[httpx.Response],
+    ) -> None:
+        if trace is None:
+            return
+        if resp is None:
+            trace.finish()
+            return
+        cache_hit = cached is not None and resp.status_code == 304
+        trace.finish(resp.status_code, resp.num_bytes_downloaded, cache_hit)
+
+    def _resolve_cached(
+        self, cached: Optional[CachedResponse], resp: httpx.Response
+    ) -> httpx.Response:
+        if self.cache and resp.request.method == "GET":
+            resp = self.cache.resolve(self.cache.key(resp.request), cached, resp)
         return resp
 
-    def _paginate(
-        self, endpoint: str, params: Optional[dict] = None, max_pages: int = 10
-    ) -> list:
-        items = []
+
+class Client(_BaseClient):
+    """GitHub REST client backed by a single pooled, keep-alive HTTP session.
+
+    Requests are paced by `scheduler` to stay within GitHub's rate limits; its
+    `state()` reports the remaining budget and time spent waiting. With a `cache`,
+    responses are stored on disk and revalidated with conditional requests. Use as a
+    context manager (or call `close()`) to release pooled connections.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://api.github.com",
+        limits: Optional[httpx.Limits] = None,
+        http2: bool = False,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        scheduler: Optional[RateLimitScheduler] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        super().__init__(token, base_url, scheduler, cache)
+        self._session = httpx.Client(**self._session_options(limits, http2, timeout))
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> httpx.Response:
+        resource = resource_for(endpoint)
+        for attempt in itertools.count():
+            waited = 0.0
+            while wait := self.scheduler.reserve(resource):
+                time.sleep(wait)
+                waited += wait
+            request, cached = self._build_request(
+                method, endpoint, params, json, headers
+            )
+            trace = self._start_trace(request, endpoint, resource, attempt, waited)
+            resp = None
+            try:
+                resp = self._session.send(request)
+            finally:
+                self._finish_trace(trace, cached, resp)
+            self.scheduler.update(resource, resp)
+            if (delay := self.scheduler.retry_delay(resp, attempt)) is None:
+                return _raise_for_status(self._resolve_cached(cached, resp))
+            time.sleep(delay)
+
+    def _get(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> httpx.Response:
+        return self._request("GET", endpoint, params=params, headers=headers)
+
+    def graphql(self, query: str, variables: Optional[dict] = None) -> dict:
+        """Run a GraphQL query, returning its `data`"""
+        body = {"query": query, "variables": variables or {}}
+        return _graphql_data(self._request("POST", "/graphql", json=body))
+
+    def get_objects(
+        self,
+        lookups: Sequence[tuple[str, str, str]],
+        batch_size: int = GRAPHQL_BATCH_SIZE,
+    ) -> list[Optional[dict]]:
+        """Look up git objects by (owner, repo, expression), e.g. `HEAD:path/to/file`,
+        `batch_size` to a query. Missing repositories and paths come back as None."""
+        objects = []
+        for start in range(0, len(lookups), batch_size):
+            batch = lookups[start : start + batch_size]
+            objects.extend(
+                _objects_from(self.graphql(*_objects_query(batch)), len(batch))
+            )
+        return objects
+
+    def _iter_pages(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        max_pages: int = 10,
+        headers: Optional[dict] = None,
+    ) -> Iterator[dict]:
         pages_fetched = 0
         current_endpoint = endpoint
         current_params = params or {}
 
         while current_endpoint and pages_fetched < max_pages:
-            resp = self._get(current_endpoint, params=current_params)
-
-            data = resp.json()
-            items.extend(data.get("items", []))
+            with stats.span("page", endpoint=endpoint):
+                resp = self._get(
+                    current_endpoint, params=current_params, headers=headers
+                )
+            yield resp.json()
             pages_fetched += 1
 
-            link_header = resp.headers.get("link")
-            if not link_header:
-                break
-            # used to match the `link:` headers as described here
-            # https://docs.github.com/en/rest/using-the-rest-api/using-pagination-in-the-rest-api?apiVersion=2022-11-28#using-link-headers
-            if match := re.search(r'<(?P<next_url>[^>]+)>;\s*rel="next"', link_header):
-                parsed = urlparse(match.group("next_url"))
-                current_endpoint = parsed.path
-                current_params = dict(parse_qsl(parsed.query))
-            else:
+            next_link = parse_link_header(resp.headers.get("link")).get("next")
+            if not next_link:
                 break
-
-        return items
+            current_endpoint, current_params = next_link
 
     def get_repo_contents(self, org: str, repo: str, subpath: str = "") -> list:
         endpoint = f"/repos/{org}/{repo}/contents{subpath}"
         return self._get(endpoint).json()
 
+    def get_file(self, org: str, repo: str, path: str) -> str:
+        """The contents of the file at `path` on the repository's default branch"""
+        endpoint = f"/repos/{org}/{repo}/contents/{path.lstrip('/')}"
+        return self._get(endpoint, headers={"Accept": RAW_MEDIA_TYPE}).text
+
+    def get_blob(self, org: str, repo: str, sha: str) -> bytes:
+        """The contents of a git blob, from the cache if we've fetched it before"""
+        if self.cache and (content := self.cache.get_blob(sha)) is not None:
+            return content
+        endpoint = f"/repos/{org}/{repo}/git/blobs/{sha}"
+        content = self._get(endpoint, headers={"Accept": RAW_MEDIA_TYPE}).content
+        if self.cache:
+            self.cache.put_blob(sha, content)
+        return content
+
+    def iter_tags(self, org: str, repo: str, max_pages=10) -> Iterator[dict]:
+        """Yield the repository's tags, each with the `commit` it points at"""
+        endpoint = f"/repos/{org}/{repo}/tags"
+        params = {"per_page": MAX_PER_PAGE}
+        for page in self._iter_pages(endpoint, params=params, max_pages=max_pages):
+            yield from page
+
+    def iter_search_code_pages(
+        self, query: str, max_pages=10, text_match: bool = False
+    ) -> Iterator[dict]:
+        """Yield raw search response pages, including `total_count`.
+        With `text_match`, each result includes its matching `text_matches` fragments."""
+        endpoint = "/search/code"
+        params = {"q": query, "per_page": MAX_PER_PAGE}
+        headers = {"Accept": TEXT_MATCH_MEDIA_TYPE} if text_match else None
+        yield from self._iter_pages(endpoint, params, max_pages, headers)
+
+    def iter_search_code(self, query: str, max_pages=10) -> Iterator[dict]:
+        """Yield search results as each page arrives, without holding earlier pages"""
+        for page in self.iter_search_code_pages(query, max_pages=max_pages):
+            yield from page.get("items", [])
+
     def search_code(self, query: str, max_pages=10) -> list:
+        return list(self.iter_search_code(query, max_pages=max_pages))
+
+
+class AsyncClient(_BaseClient):
+    """Async counterpart of `Client` with the same `search_code`/`get_repo_contents` surface.
+
+    Once the first page of a paginated endpoint is back, the `rel="last"` link tells us
+    every remaining page URL, so those are fetched concurrently (at most
+    `max_concurrency` in flight) instead of following `rel="next"` one page at a time.
+    """
+
+    _asynchronous = True
+
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://api.github.com",
+        limits: Optional[httpx.Limits] = None,
+        http2: bool = False,
+        timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+        max_concurrency: int = 5,
+        scheduler: Optional[RateLimitScheduler] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        super().__init__(token, base_url, scheduler, cache)
+        self.max_concurrency = max_concurrency
+        self._session = httpx.AsyncClient(
+            **self._session_options(limits, http2, timeout)
+        )
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._session.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[dict] = None,
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> httpx.Response:
+        resource = resource_for(endpoint)
+        for attempt in itertools.count():
+            waited = 0.0
+            while wait := self.scheduler.reserve(resource):
+                await asyncio.sleep(wait)
+                waited += wait
+            request, cached = self._build_request(
+                method, endpoint, params, json, headers
+            )
+            trace = self._start_trace(request, endpoint, resource, attempt, waited)
+            resp = None
+            try:
+                resp = await self._session.send(request)
+            finally:
+                self._finish_trace(trace, cached, resp)
+            self.scheduler.update(resource, resp)
+            if (delay := self.scheduler.retry_delay(resp, attempt)) is None:
+                return _raise_for_status(self._resolve_cached(cached, resp))
+            await asyncio.sleep(delay)
+
+    async def _get(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ) -> httpx.Response:
+        return await self._request("GET", endpoint, params=params, headers=headers)
+
+    async def graphql(self, query: str, variables: Optional[dict] = None) -> dict:
+        body = {"query": query, "variables": variables or {}}
+        return _graphql_data(await self._request("POST", "/graphql", json=body))
+
+    async def get_objects(
+        self,
+        lookups: Sequence[tuple[str, str, str]],
+        batch_size: int = GRAPHQL_BATCH_SIZE,
+    ) -> list[Optional[dict]]:
+        """As `Client.get_objects`, with the batches queried concurrently"""
+        batches = [
+            lookups[start : start + batch_size]
+            for start in range(0, len(lookups), batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(batch) -> list[Optional[dict]]:
+            async with semaphore:
+                data = await self.graphql(*_objects_query(batch))
+            return _objects_from(data, len(batch))
+
+        results = await asyncio.gather(*(fetch(batch) for batch in batches))
+        return [obj for objects in results for obj in objects]
+
+    async def _iter_pages(
+        self,
+        endpoint: str,
+        params: Optional[dict] = None,
+        max_pages: int = 10,
+        headers: Optional[dict] = None,
+    ) -> AsyncIterator[dict]:
+        with stats.span("page", endpoint=endpoint):
+            resp = await self._get(endpoint, params=params or {}, headers=headers)
+        yield resp.json()
+
+        links = parse_link_header(resp.headers.get("link"))
+        if "next" not in links or max_pages <= 1:
+            return
+        next_endpoint, next_params = links["next"]
+        if "last" not in links or "page" not in next_params:
+            # no way to tell how many pages there are, so walk them one at a time
+            async for page in self._iter_pages(
+                next_endpoint, next_params, max_pages - 1, headers
+            ):
+                yield page
+            return
+
+        _, last_params = links["last"]
+        first_page = int(next_params["page"])
+        last_page = min(int(last_params["page"]), first_page + max_pages - 2)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_page(page: int) -> dict:
+            async with semaphore:
+                with stats.span("page", endpoint=endpoint):
+                    page_resp = await self._get(
+                        next_endpoint,
+                        params={**next_params, "page": str(page)},
+                        headers=headers,
+                    )
+            return page_resp.json()
+
+        tasks = [
+            asyncio.ensure_future(fetch_page(page))
+            for page in range(first_page, last_page + 1)
+        ]
+        try:
+            # pages are yielded in order, each as soon as it and those before it are in
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_repo_contents(self, org: str, repo: str, subpath: str = "") -> list:
+        endpoint = f"/repos/{org}/{repo}/contents{subpath}"
+        return (await self._get(endpoint)).json()
+
+    async def get_blob(self, org: str, repo: str, sha: str) -> bytes:
+        if self.cache and (content := self.cache.get_blob(sha)) is not None:
+            return content
+        endpoint = f"/repos/{org}/{repo}/git/blobs/{sha}"
+        resp = await self._get(endpoint, headers={"Accept": RAW_MEDIA_TYPE})
+        if self.cache:
+            self.cache.put_blob(sha, resp.content)
+        return resp.content
+
+    async def iter_search_code_pages(
+        self, query: str, max_pages=10, text_match: bool = False
+    ) -> AsyncIterator[dict]:
         endpoint = "/search/code"
         params = {"q": query, "per_page": MAX_PER_PAGE}
-        results = self._paginate(endpoint, params=params, max_pages=max_pages)
-        return results
+        headers = {"Accept": TEXT_MATCH_MEDIA_TYPE} if text_match else None
+        async for page in self._iter_pages(endpoint, params, max_pages, headers):
+            yield page
+
+    async def iter_search_code(self, query: str, max_pages=10) -> AsyncIterator[dict]:
+        async for page in self.iter_search_code_pages(query, max_pages=max_pages):
+            for item in page.get("items", []):
+                yield item
+
+    async def search_code(self, query: str, max_pages=10) -> list:
+        return [item async for item in self.iter_search_code(query, max_pages)]
@@ -0,0 +1,128 @@
+import functools
+import pathlib
+import re
+from typing import Optional
+
+# https://git-scm.com/docs/git-config#_syntax
+SECTION_REGEX = re.compile(
+    r'^\[\s*(?P<section>[\w.-]+)(?:\s+"(?P<subsection>[^"\\]*)")?\s*\]'
+)
+VARIABLE_REGEX = re.compile(r"^(?P<name>[A-Za-z][\w-]*)\s*(?:=\s*(?P<value>.*))?$")
+
+# Config we'd have to reimplement git to honour; leave those to `git remote -v`
+EXOTIC_SECTIONS = {"include", "includeif"}
+EXOTIC_VARIABLES = {"insteadof", "pushinsteadof"}
+
+URL_VARIABLES = {"url", "pushurl"}
+
+
+class ExoticConfig(Exception):
+    pass
+
+
+def find_git_root(path: pathlib.Path) -> pathlib.Path:
+    """Return the closest directory at or above `path` that contains a .git directory"""
+    git_root = _find_git_root(path.resolve())
+    if git_root is None:
+        raise FileNotFoundError("No .git directory found in any parent directories.")
+    return git_root
+
+
+@functools.cache
+def _find_git_root(directory: pathlib.Path) -> Optional[pathlib.Path]:
+    # memoized per directory, so actions in sibling directories share the walk up
+    if (directory / ".git").exists():
+        return directory
+    if directory.parent == directory:
+        return None
+    return _find_git_root(directory.parent)
+
+
+def git_dir(git_root: pathlib.Path) -> Optional[pathlib.Path]:
+    """Return the git directory of a checkout, worktree, submodule or bare repository"""
+    dot_git = git_root / ".git"
+    if dot_git.is_dir():
+        return dot_git
+    if dot_git.is_file():
+        # worktrees and submodules: `gitdir: <path>`, relative to the .git file
+        content = dot_git.read_text().strip()
+        if not content.startswith("gitdir:"):
+            return None
+        return (git_root / content.removeprefix("gitdir:").strip()).resolve()
+    if (git_root / "HEAD").is_file() and (git_root / "config").is_file():
+        return git_root
+    return None
+
+
+def common_dir(directory: pathlib.Path) -> pathlib.Path:
+    """Return the directory holding a worktree's shared config, refs and objects"""
+    try:
+        common = (directory / "commondir").read_text().strip()
+    except FileNotFoundError:
+        return directory
+    return (directory / common).resolve()
+
+
+def parse_remotes(config: str) -> dict[str, dict[str, list[str]]]:
+    """Return each remote's `url` and `pushurl` values from the text of a git config file.
+
+    Raises ExoticConfig for anything that would change what `git remote -v` reports
+    but isn't in this file: includes and URL rewrites, plus syntax we don't bother
+    parsing (quoted or continued values and old-style `[remote.name]` sections).
+    """
+    remotes: dict[str, dict[str, list[str]]] = {}
+    section = subsection = None
+    for line in config.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("["):
+            if not (match := SECTION_REGEX.match(line)):
+                raise ExoticConfig(line)
+            section = match.group("section").lower()
+            subsection = match.group("subsection")
+            if section in EXOTIC_SECTIONS or "." in section:
+                raise ExoticConfig(line)
+            line = line[match.end() :].strip()
+            if not line or line.startswith(("#", ";")):
+                continue
+        if not (match := VARIABLE_REGEX.match(line)):
+            raise ExoticConfig(line)
+        name = match.group("name").lower()
+        value = match.group("value") or ""
+        if name in EXOTIC_VARIABLES or '"' in value or "\\" in value:
+            raise ExoticConfig(line)
+        if section == "remote" and subsection is not None and name in URL_VARIABLES:
+            value = re.split(r"\s[#;]", value, maxsplit=1)[0].strip()
+            remote = remotes.setdefault(subsection, {"url": [], "pushurl": []})
+            remote[name].append(value)
+    return remotes
+
+
+@functools.cache
+def read_remotes(git_root: pathlib.Path) -> Optional[dict[str, dict[str, list[str]]]]:
+    """Return each remote's URLs (see `parse_remotes`), read straight from the repo's config.
+
+    Memoized for the life of the process. Returns None when the repo's config isn't
+    enough to know what `git remote -v` would say, so the caller can ask git instead.
+    URL rewrites in the user's global config aren't applied.
+    """
+    directory = git_dir(git_root)
+    if directory is None:
+        return None
+    try:
+        return parse_remotes((common_dir(directory) / "config").read_text())
+    except (OSError, UnicodeDecodeError, ExoticConfig):
+        return None
+
+
+def format_remotes(remotes: dict[str, dict[str, list[str]]]) -> str:
+    """Format remotes the way `git remote -v` does"""
+    lines = []
+    for name, remote in sorted(remotes.items()):
+        if not remote["url"]:
+            continue
+        lines.append(f"{name}\t{remote['url'][0]} (fetch)")
+        for url in remote["pushurl"] or remote["url"]:
+            lines.append(f"{name}\t{url} (push)")
+    return "".join(f"{line}\n" for line in lines)
@@ -0,0 +1,130 @@
+from array import array
+from collections import deque
+from typing import Iterable, NamedTuple, Optional
+
+from .index import WORKFLOWS_DIR, UsageIndex
+from .uses import classify_target, extract_uses
+
+
+class Dependent(NamedTuple):
+    repo: str
+    path: str
+    # `uses:` edges between this file and the target it (indirectly) depends on
+    hops: int
+
+
+def file_target(repo: str, path: str) -> str:
+    """The target other files `uses:` to refer to the workflow or action at `path`"""
+    directory, _, _ = path.rpartition("/")
+    if directory == WORKFLOWS_DIR:
+        return f"{repo}/{path}".lower()
+    return f"{repo}/{directory}".rstrip("/").lower()
+
+
+class UsageGraph:
+    """Directed graph of `uses:` edges between workflows and actions.
+
+    Each file is a node, named by the target that would reference it, with an edge to
+    every target it uses. Node names are interned to ints and the edges kept as flat
+    arrays of ints; on the first query they're turned around into a compressed
+    adjacency list of who uses each node (offsets into one array of users), so
+    building stays linear in the number of edges. Transitive queries are a BFS over
+    that, memoized per target until the graph changes.
+    """
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        # where each node is defined, for nodes seen as files rather than only as targets
+        self._files: dict[int, tuple[str, str]] = {}
+        self._sources = array("I")
+        self._targets = array("I")
+        self._offsets: Optional[array] = None
+        self._users: Optional[array] = None
+        self._dependents: dict[int, list[Dependent]] = {}
+
+    @classmethod
+    def from_index(cls, usage_index: UsageIndex) -> "UsageGraph":
+        graph = cls()
+        for repo, path, targets in usage_index.references():
+            graph.add_file(repo, path, targets)
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def edges(self) -> int:
+        return len(self._targets)
+
+    def _intern(self, name: str) -> int:
+        if (node := self._ids.get(name)) is None:
+            node = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return node
+
+    def add_file(self, repo: str, path: str, targets: Iterable[str]) -> None:
+        """Add the file at `path` in `repo`, with an edge to each target it uses"""
+        source = self._intern(file_target(repo, path))
+        self._files[source] = (repo, path)
+        for target in {target.partition("@")[0].lower() for target in targets}:
+            self._sources.append(source)
+            self._targets.append(self._intern(target))
+        self._offsets = self._users = None
+        self._dependents.clear()
+
+    def add_content(self, repo: str, path: str, content: bytes) -> None:
+        """Add a file from its contents, e.g. as fetched from the GitHub API"""
+        self.add_file(
+            repo, path, [reference.target for reference in extract_uses(content)]
+        )
+
+    def _reverse(self) -> tuple[array, array]:
+        if self._offsets is None:
+            # counting sort of the edges by target
+            offsets = array("I", [0]) * (len(self._names) + 1)
+            for target in self._targets:
+                offsets[target + 1] += 1
+            for node in range(len(self._names)):
+                offsets[node + 1] += offsets[node]
+            users = array("I", [0]) * len(self._targets)
+            filled = array("I", offsets)
+            for source, target in zip(self._sources, self._targets):
+                users[filled[target]] = source
+                filled[target] += 1
+            self._offsets, self._users = offsets, users
+        return self._offsets, self._users
+
+    def _bfs(self, start: int) -> dict[int, int]:
+        offsets, users = self._reverse()
+        hops = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for user in users[offsets[node] : offsets[node + 1]]:
+                if user not in hops:
+                    hops[user] = hops[node] + 1
+                    queue.append(user)
+        del hops[start]
+        return hops
+
+    def dependents(self, target: str) -> list[Dependent]:
+        """Every file that uses `target`, directly or through other workflows and
+        actions, with the fewest hops it's reached by, nearest first"""
+        target, *_ = target.partition("@")
+        node = self._ids.get(classify_target(target).target.lower())
+        if node is None:
+            return []
+        if (found := self._dependents.get(node)) is None:
+            found = [
+                Dependent(*self._files[user], hops)
+                for user, hops in self._bfs(node).items()
+                if user in self._files
+            ]
+            found.sort(key=lambda dependent: (dependent.hops, dependent[:2]))
+            self._dependents[node] = found
+        return found
+
+    def find_usage(self, target: str) -> list[str]:
+        """Repositories affected by a change to `target`, however far away"""
+        return sorted({dependent.repo for dependent in self.dependents(target)})
@@ -0,0 +1,360 @@
+import concurrent.futures
+import itertools
+import os
+import pathlib
+import sqlite3
+import subprocess
+from dataclasses import dataclass
+from typing import Iterator, Union
+
+import click
+
+from .cache import DEFAULT_CACHE_DIR
+from .gendocs import (
+    ACTION_FILENAMES,
+    GITHUB_REMOTE_REGEX,
+    SKIPPED_DIRS,
+    list_git_remotes,
+)
+from .models import UsesReference
+from .uses import classify_target, extract_uses
+
+DEFAULT_INDEX_PATH = DEFAULT_CACHE_DIR / "usage-index.sqlite3"
+
+WORKFLOWS_DIR = ".github/workflows"
+
+
+def is_indexed_path(path: str) -> bool:
+    directory, _, filename = path.rpartition("/")
+    if directory == WORKFLOWS_DIR:
+        return filename.endswith((".yml", ".yaml"))
+    return filename in ACTION_FILENAMES
+
+
+# =============================================================================
+# Finding repositories and the files to index in them
+# =============================================================================
+@dataclass
+class Repository:
+    name: str
+    path: pathlib.Path
+    bare: bool
+
+
+@dataclass
+class IndexedFile:
+    path: str
+    # mtime+size for a checkout, blob SHA for a bare repo
+    fingerprint: str
+
+
+def is_bare_repo(path: pathlib.Path) -> bool:
+    return (path / "HEAD").is_file() and (path / "objects").is_dir()
+
+
+def repository_name(path: pathlib.Path, root: pathlib.Path) -> str:
+    try:
+        remotes = list_git_remotes(path)
+    except RuntimeError:
+        remotes = ""
+    if match := GITHUB_REMOTE_REGEX.search(remotes):
+        return match.group("org_repo")
+    name = path.relative_to(root).as_posix()
+    return name[: -len(".git")] if name.endswith(".git") else name
+
+
+def find_repositories(root: pathlib.Path) -> Iterator[Repository]:
+    """Yield every git checkout or bare repository under `root`, without descending into them"""
+    root = root.resolve()
+    for dirpath, dirnames, _ in os.walk(root):
+        path = pathlib.Path(dirpath)
+        bare = is_bare_repo(path)
+        if bare or ".git" in dirnames or (path / ".git").is_file():
+            yield Repository(repository_name(path, root), path, bare)
+            dirnames.clear()
+        else:
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIPPED_DIRS)
+
+
+def list_checkout_files(repo: pathlib.Path) -> list[IndexedFile]:
+    files = []
+    for dirpath, dirnames, filenames in os.walk(repo):
+        dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRS]
+        for filename in filenames:
+            file_path = pathlib.Path(dirpath) / filename
+            relative = file_path.relative_to(repo).as_posix()
+            if is_indexed_path(relative):
+                stat = file_path.stat()
+                files.append(
+                    IndexedFile(relative, f"{stat.st_mtime_ns}:{stat.st_size}")
+                )
+    return files
+
+
+def list_bare_files(repo: pathlib.Path) -> list[IndexedFile]:
+    result = subprocess.run(
+        ["git", "-C", str(repo), "ls-tree", "-r", "HEAD"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        # e.g. an empty repository with no HEAD commit
+        return []
+    files = []
+    for line in result.stdout.splitlines():
+        info, _, path = line.partition("\t")
+        _, object_type, sha = info.split()
+        if object_type == "blob" and is_indexed_path(path):
+            files.append(IndexedFile(path, sha))
+    return files
+
+
+def read_blobs(repo: pathlib.Path, shas: list[str]) -> dict[str, bytes]:
+    """Read many blobs from one `git cat-file --batch` process"""
+    if not shas:
+        return {}
+    result = subprocess.run(
+        ["git", "-C", str(repo), "cat-file", "--batch"],
+        input="".join(f"{sha}\n" for sha in shas).encode(),
+        capture_output=True,
+        check=True,
+    )
+    blobs = {}
+    output, offset = result.stdout, 0
+    while offset < len(output):
+        header_end = output.index(b"\n", offset)
+        sha, object_type, *size = output[offset:header_end].decode().split()
+        offset = header_end + 1
+        if object_type == "missing":
+            continue
+        end = offset + int(size[0])
+        blobs[sha] = output[offset:end]
+        offset = end + 1
+    return blobs
+
+
+# =============================================================================
+# Parsing files in parallel
+# =============================================================================
+# Files to parse are (repo, path, source), where the source is either a path to read
+# (checkouts) or the file's contents (blobs from bare repos)
+ParseItem = tuple[str, str, Union[str, bytes]]
+ParseResult = tuple[str, str, list[UsesReference]]
+
+PARSE_BATCH_SIZE = 256
+
+
+def parse_batch(batch: list[ParseItem]) -> list[ParseResult]:
+    results = []
+    for repo, path, source in batch:
+        if isinstance(source, str):
+            try:
+                source = pathlib.Path(source).read_bytes()
+            except OSError:
+                # removed since we listed it; the next update will drop it
+                source = b""
+        results.append((repo, path, extract_uses(source)))
+    return results
+
+
+def parse_files(
+    items: list[ParseItem], jobs: int = 1, batch_size: int = PARSE_BATCH_SIZE
+) -> Iterator[ParseResult]:
+    """Extract `uses:` references from many files, spread across `jobs` processes"""
+    batches = [
+        items[start : start + batch_size] for start in range(0, len(items), batch_size)
+    ]
+    if jobs <= 1 or len(batches) <= 1:
+        for batch in batches:
+            yield from parse_batch(batch)
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        for results in pool.map(parse_batch, batches):
+            yield from results
+
+
+# =============================================================================
+# The index itself
+# =============================================================================
+@dataclass
+class IndexStats:
+    repositories: int = 0
+    files: int = 0
+    parsed: int = 0
+    removed: int = 0
+    references: int = 0
+
+
+class UsageIndex:
+    """Inverted index of `uses:` references (target -> repo, file, ref) kept in SQLite.
+
+    Targets are stored lowercased, since GitHub owner and repository names are
+    case-insensitive. Each file's fingerprint is stored alongside its references so
+    `update` only reparses files that changed since the last run.
+    """
+
+    def __init__(self, path: pathlib.Path = DEFAULT_INDEX_PATH):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                repo TEXT NOT NULL,
+                path TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (repo, path)
+            );
+            CREATE TABLE IF NOT EXISTS refs (
+                target TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                path TEXT NOT NULL,
+                ref TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS refs_by_target ON refs (target);
+            CREATE INDEX IF NOT EXISTS refs_by_file ON refs (repo, path);
+            """
+        )
+
+    def __enter__(self) -> "UsageIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def update(self, root: pathlib.Path, jobs: int = 1) -> IndexStats:
+        """Index every repository under `root`, reparsing only files whose fingerprint changed
+
+        Changed files are parsed across `jobs` processes.
+        """
+        stats = IndexStats()
+        seen_repos = set()
+        fingerprints = {}
+        items = []
+        for repo in find_repositories(root):
+            stats.repositories += 1
+            seen_repos.add(repo.name)
+            for file, source in self._changed_files(repo, stats):
+                fingerprints[repo.name, file.path] = file.fingerprint
+                items.append((repo.name, file.path, source))
+        for (name,) in self._db.execute("SELECT DISTINCT repo FROM files").fetchall():
+            if name not in seen_repos:
+                stats.removed += self._remove_files(
+                    name, list(self._indexed_files(name))
+                )
+
+        for repo_name, path, references in parse_files(items, jobs):
+            self._remove_files(repo_name, [path])
+            self._db.execute(
+                "INSERT INTO files VALUES (?, ?, ?)",
+                (repo_name, path, fingerprints[repo_name, path]),
+            )
+            self._db.executemany(
+                "INSERT INTO refs VALUES (?, ?, ?, ?)",
+                [(target.lower(), repo_name, path, ref) for target, ref in references],
+            )
+            stats.parsed += 1
+            stats.references += len(references)
+        self._db.commit()
+        return stats
+
+    def _indexed_files(self, repo: str) -> dict[str, str]:
+        rows = self._db.execute(
+            "SELECT path, fingerprint FROM files WHERE repo = ?", (repo,)
+        )
+        return dict(rows.fetchall())
+
+    def _remove_files(self, repo: str, paths: list[str]) -> int:
+        for path in paths:
+            self._db.execute(
+                "DELETE FROM refs WHERE repo = ? AND path = ?", (repo, path)
+            )
+            self._db.execute(
+                "DELETE FROM files WHERE repo = ? AND path = ?", (repo, path)
+            )
+        return len(paths)
+
+    def _changed_files(
+        self, repo: Repository, stats: IndexStats
+    ) -> list[tuple[IndexedFile, Union[str, bytes]]]:
+        """Drop files that are gone from `repo`, returning those that need (re)parsing"""
+        files = (
+            list_bare_files(repo.path) if repo.bare else list_checkout_files(repo.path)
+        )
+        stats.files += len(files)
+        indexed = self._indexed_files(repo.name)
+        current = {file.path for file in files}
+        stats.removed += self._remove_files(
+            repo.name, [path for path in indexed if path not in current]
+        )
+
+        changed = [file for file in files if indexed.get(file.path) != file.fingerprint]
+        if not repo.bare:
+            return [(file, str(repo.path / file.path)) for file in changed]
+        blobs = read_blobs(repo.path, [file.fingerprint for file in changed])
+        return [(file, blobs.get(file.fingerprint, b"")) for file in changed]
+
+    def query(self, target: str) -> list[tuple[str, str, str]]:
+        """Return (repo, path, ref) for every indexed file that uses `target`"""
+        target, *_ = target.partition("@")
+        key = classify_target(target).target.lower()
+        rows = self._db.execute(
+            "SELECT repo, path, ref FROM refs WHERE target = ? ORDER BY repo, path",
+            (key,),
+        )
+        return rows.fetchall()
+
+    def find_usage(self, target: str) -> list[str]:
+        return sorted({repo for repo, _, _ in self.query(target)})
+
+    def references(self) -> Iterator[tuple[str, str, list[str]]]:
+        """Yield (repo, path, targets) for every indexed file with references"""
+        rows = self._db.execute(
+            "SELECT repo, path, target FROM refs ORDER BY repo, path"
+        )
+        for (repo, path), group in itertools.groupby(rows, key=lambda row: row[:2]):
+            yield repo, path, [target for _, _, target in group]
+
+
+# =============================================================================
+# CLI Commands
+# =============================================================================
+@click.group()
+def index():
+    """Build an offline index of `uses:` references from local git repositories."""
+    pass
+
+
+@index.command()
+@click.argument(
+    "root", type=click.Path(path_type=pathlib.Path, exists=True, file_okay=False)
+)
+@click.option(
+    "--index",
+    "index_path",
+    type=click.Path(path_type=pathlib.Path, dir_okay=False),
+    default=DEFAULT_INDEX_PATH,
+    show_default="~/.cache/action-tools/usage-index.sqlite3",
+    help="Path to the index database",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="number of CPUs",
+    help="Number of processes to parse changed files with",
+)
+def build(root, index_path, jobs):
+    """Index every git checkout or bare repository under ROOT.
+
+    Re-running only reparses workflow and action files that changed since the last run.
+    """
+    with UsageIndex(index_path) as usage_index:
+        stats = usage_index.update(root, jobs=jobs)
+    click.echo(
+        f"Indexed {stats.repositories} repositories: {stats.files} files, "
+        f"{stats.parsed} parsed, {stats.removed} removed, {stats.references} references"
+    )
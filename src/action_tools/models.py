@@ -1,7 +1,13 @@
-from typing import Optional
+from dataclasses import dataclass
+from typing import NamedTuple, Optional
 
 from pydantic import BaseModel, ConfigDict, model_validator
 
+# Pydantic models validate what we read from action.yml files. What we build in bulk
+# while searching and indexing (one per `uses:`) are plain slotted classes and tuples,
+# which are several times cheaper to create and hold; their inputs are already checked
+# by the regexes that parse them.
+
 
 class ActionInput(BaseModel):
     model_config = ConfigDict(extra="allow")
@@ -30,15 +36,39 @@ class GitHubAction(BaseModel):
     outputs: dict[str, ActionOutput] = {}
 
 
-class Resource(BaseModel):
+@dataclass(frozen=True, slots=True)
+class Resource:
     org: str
     repo: str
     subpath: str
 
+    @property
+    def target(self) -> str:
+        """The 'org/repo[/subpath]' this resource is referenced by in `uses:`"""
+        return f"{self.org}/{self.repo}{self.subpath}"
+
 
+@dataclass(frozen=True, slots=True)
 class Workflow(Resource):
     pass
 
 
+@dataclass(frozen=True, slots=True)
 class Action(Resource):
     pass
+
+
+class Uses(NamedTuple):
+    """A classified `uses:` value"""
+
+    kind: str  # "workflow", "action", "docker" or "local"
+    target: str  # 'org/repo[/subpath]', the image, or the local path
+    ref: str  # after the '@', or "" without one
+    resource: Optional[Resource] = None  # for workflows and actions
+
+
+class UsesReference(NamedTuple):
+    """One remote workflow or action referenced by a `uses:`, split at the '@'"""
+
+    target: str
+    ref: str
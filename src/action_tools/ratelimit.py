@@ -0,0 +1,148 @@
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+import httpx
+
+# Length of each rate limit window, used until a response tells us the real reset time
+# https://docs.github.com/en/rest/using-the-rest-api/rate-limits-for-the-rest-api
+WINDOW_SECONDS = {
+    "code_search": 60.0,
+    "search": 60.0,
+    "core": 3600.0,
+    "graphql": 3600.0,
+}
+
+# Requests sent right as a window resets can still be counted against the old one
+RESET_MARGIN = 1.0
+
+
+def resource_for(endpoint: str) -> str:
+    """Return the rate limit resource GitHub charges a request to `endpoint` against"""
+    # code search has its own, smaller budget than the other search endpoints
+    if endpoint.startswith("/search/code"):
+        return "code_search"
+    if endpoint.startswith("/search/"):
+        return "search"
+    if endpoint.startswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+@dataclass
+class Bucket:
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset: Optional[float] = None
+
+
+class RateLimitScheduler:
+    """Paces requests against GitHub's per-resource rate limits.
+
+    Each resource (`search`, `core`, ...) is a token bucket seeded from the
+    `x-ratelimit-*` headers of the responses we see. Requests draw from their bucket
+    locally, so concurrent requests can't oversubscribe it, and wait for the window to
+    reset once it's empty. Rate limited responses are retried after `retry-after`, the
+    primary limit's reset, or a jittered exponential backoff for secondary limits.
+
+    A scheduler can be shared between clients that use the same token.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self.buckets: dict[str, Bucket] = {}
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, resource: str) -> float:
+        """Take a request from `resource`'s budget, or return how long to wait before asking again"""
+        with self._lock:
+            bucket = self.buckets.setdefault(resource, Bucket())
+            now = self.clock()
+            if bucket.reset is not None and now >= bucket.reset:
+                # the window rolled over; assume a full budget until a response says otherwise
+                bucket.remaining = bucket.limit
+                bucket.reset = now + WINDOW_SECONDS.get(resource, 60.0)
+            if bucket.remaining is None:
+                return 0.0
+            if bucket.remaining <= 0 and bucket.reset is not None:
+                return self._record_wait(bucket.reset - now + RESET_MARGIN)
+            bucket.remaining -= 1
+            return 0.0
+
+    def update(self, resource: str, response: httpx.Response) -> None:
+        """Refresh `resource`'s bucket from a response's `x-ratelimit-*` headers.
+
+        Kept under the caller's `resource` rather than the `x-ratelimit-resource` the
+        response names, so it's the bucket `reserve(resource)` draws from.
+        """
+        headers = response.headers
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            bucket = self.buckets.setdefault(resource, Bucket())
+            if bucket.reset is None or reset > bucket.reset or bucket.remaining is None:
+                bucket.limit, bucket.remaining, bucket.reset = limit, remaining, reset
+            else:
+                # same window: requests still in flight were already taken locally
+                bucket.remaining = min(bucket.remaining, remaining)
+
+    def retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying a rate limited response, or None to give up"""
+        if response.status_code not in {403, 429} or attempt >= self.max_retries:
+            return None
+        headers = response.headers
+        if "retry-after" in headers:
+            delay = float(headers["retry-after"])
+        elif (
+            headers.get("x-ratelimit-remaining") == "0"
+            and "x-ratelimit-reset" in headers
+        ):
+            delay = float(headers["x-ratelimit-reset"]) - self.clock() + RESET_MARGIN
+        elif (
+            response.status_code == 429
+            or "secondary rate limit" in response.text.lower()
+        ):
+            ceiling = min(self.backoff_max, self.backoff_base * 2**attempt)
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        else:
+            # an ordinary 403, e.g. a bad token or missing permissions
+            return None
+        with self._lock:
+            self.retries += 1
+            return self._record_wait(delay)
+
+    def _record_wait(self, delay: float) -> float:
+        delay = max(delay, 0.0)
+        self.waits += 1
+        self.wait_seconds += delay
+        return delay
+
+    def state(self) -> dict:
+        """Snapshot of waits, retries and each resource's remaining budget"""
+        with self._lock:
+            return {
+                "waits": self.waits,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "retries": self.retries,
+                "resources": {
+                    name: asdict(bucket) for name, bucket in self.buckets.items()
+                },
+            }
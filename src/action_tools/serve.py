@@ -0,0 +1,350 @@
+import asyncio
+import contextlib
+import http.server
+import json
+import pathlib
+import socket
+import socketserver
+import stat
+import threading
+import time
+from typing import Callable, Iterator, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+import click
+
+from . import github
+from .cache import DEFAULT_CACHE_DIR, ResponseCache
+from .usage import _existing_targets, usage_record
+
+# (target without its @ref, whether results are verified)
+Key = tuple[str, bool]
+
+TRUE_VALUES = frozenset({"1", "true", "yes"})
+
+
+class UsageService:
+    """Answers usage queries from one long-lived client, remembering each result for
+    `ttl` seconds.
+
+    Lookups of a target already being searched for wait on that search instead of
+    starting another, so a burst of identical queries costs one sweep of the API. At
+    most `concurrency` targets are searched for at once, and with `verify` at most
+    `verify_concurrency` files are fetched at once across all of them. Failed lookups
+    are returned but not remembered. Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        client: github.AsyncClient,
+        ttl: float = 300.0,
+        concurrency: int = 8,
+        verify_concurrency: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        # insertion ordered, and with a single ttl that's also expiry order
+        self._results: dict[Key, tuple[float, dict]] = {}
+        self._inflight: dict[Key, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._verify = asyncio.Semaphore(verify_concurrency)
+
+    def _expire(self) -> None:
+        now = self.clock()
+        while self._results:
+            key, (expires, _) = next(iter(self._results.items()))
+            if expires > now:
+                break
+            del self._results[key]
+
+    def cached(self, target: str, verify: bool = False) -> Optional[dict]:
+        self._expire()
+        entry = self._results.get((target.partition("@")[0], verify))
+        return entry[1] if entry else None
+
+    async def _fetch(self, key: Key, exists: Optional[bool]) -> dict:
+        target, verify = key
+        try:
+            async with self._semaphore:
+                record = await usage_record(
+                    target, self.client, exists, self._verify if verify else None
+                )
+        finally:
+            del self._inflight[key]
+        if "error" not in record and self.ttl > 0:
+            self._results.pop(key, None)
+            self._results[key] = (self.clock() + self.ttl, record)
+        return record
+
+    async def lookup(
+        self, target: str, verify: bool = False, exists: Optional[bool] = None
+    ) -> dict:
+        """The `usage --targets-file` record for `target`. `exists` skips checking
+        the target exists, if that's already known."""
+        key = (target.partition("@")[0], verify)
+        if (record := self.cached(*key)) is not None:
+            self.hits += 1
+            return record
+        if (task := self._inflight.get(key)) is None:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key, exists))
+        else:
+            self.coalesced += 1
+        # shielded, so one caller giving up doesn't cancel the search for the others
+        return await asyncio.shield(task)
+
+    async def lookup_many(self, targets: list[str], verify: bool = False) -> list[dict]:
+        """Records for each of `targets`, in order, checking the existence of those
+        we have to search for in bulk"""
+        uncached = [
+            target
+            for target in targets
+            if self.cached(target, verify) is None
+            and (target.partition("@")[0], verify) not in self._inflight
+        ]
+        existing = await _existing_targets(uncached, self.client) if uncached else {}
+        return list(
+            await asyncio.gather(
+                *(
+                    self.lookup(target, verify, existing.get(target.partition("@")[0]))
+                    for target in targets
+                )
+            )
+        )
+
+    async def stats(self) -> dict:
+        self._expire()
+        return {
+            "results": {
+                "entries": len(self._results),
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            },
+            "rate_limits": self.client.scheduler.state(),
+            "cache": self.client.cache.stats() if self.client.cache else None,
+        }
+
+
+class UsageRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Routes requests to the server's `UsageService`, running on its event loop:
+
+    - `GET /usage?target=TARGET[&verify=true]`: the record for TARGET
+    - `POST /usage` with `{"targets": [...], "verify": false}`: a list of records
+    - `GET /stats`: result cache, rate limit and response cache counts
+    """
+
+    protocol_version = "HTTP/1.1"
+    server: Union["UsageHTTPServer", "UsageUnixServer"]
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.server.loop).result()
+
+    def _send(self, status: int, body) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        service = self.server.service
+        if url.path == "/stats":
+            self._send(200, self._call(service.stats()))
+        elif url.path != "/usage":
+            self._send(404, {"error": f"no such endpoint {url.path}"})
+        elif not (target := params.get("target")):
+            self._send(400, {"error": "missing `target` parameter"})
+        else:
+            verify = params.get("verify", "").lower() in TRUE_VALUES
+            self._send(200, self._call(service.lookup(target, verify)))
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/usage":
+            self._send(404, {"error": f"no such endpoint {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            targets = body["targets"]
+            verify = body.get("verify", False)
+            if (
+                not isinstance(targets, list)
+                or not all(isinstance(target, str) for target in targets)
+                or not isinstance(verify, bool)
+            ):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self._send(
+                400,
+                {"error": 'expected a body like {"targets": ["..."], "verify": false}'},
+            )
+            return
+        self._send(200, self._call(self.server.service.lookup_many(targets, verify)))
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        click.echo(f"{self.address_string()} - {format % args}", err=True)
+
+
+class UsageHTTPServer(http.server.ThreadingHTTPServer):
+    def __init__(self, address, service: UsageService, loop: asyncio.AbstractEventLoop):
+        self.service = service
+        self.loop = loop
+        super().__init__(address, UsageRequestHandler)
+
+
+def _remove_stale_socket(path: pathlib.Path) -> None:
+    """Remove a socket left behind by a previous run that didn't exit cleanly, refusing
+    to touch anything else at `path`, or a socket something is still listening on"""
+    try:
+        mode = path.lstat().st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise click.UsageError(f"--socket {path} already exists and isn't a socket")
+    with socket.socket(socket.AF_UNIX) as sock:
+        try:
+            sock.connect(str(path))
+        except ConnectionRefusedError:
+            path.unlink()
+            return
+    raise click.UsageError(f"--socket {path} is already in use")
+
+
+class UsageUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self, path: pathlib.Path, service: UsageService, loop: asyncio.AbstractEventLoop
+    ):
+        self.service = service
+        self.loop = loop
+        _remove_stale_socket(path)
+        super().__init__(str(path), UsageRequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        pathlib.Path(self.server_address).unlink(missing_ok=True)
+
+
+@contextlib.contextmanager
+def running_loop() -> Iterator[asyncio.AbstractEventLoop]:
+    """An event loop running in a background thread until the block exits"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield loop
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+@click.command(
+    epilog="""\b
+    Example Usage:
+      action-tools serve --port 8787
+      action-tools serve --socket /run/action-tools.sock --ttl 600
+      curl 'localhost:8787/usage?target=my-org/my-action'
+      curl localhost:8787/usage -d '{"targets": ["my-org/my-action"], "verify": true}'
+      curl localhost:8787/stats
+    """
+)
+@click.option("--token", envvar="GITHUB_TOKEN", help="GitHub token for authentication")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to bind")
+@click.option(
+    "--port",
+    type=click.IntRange(0, 65535),
+    default=8787,
+    show_default=True,
+    help="Port to listen on",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(path_type=pathlib.Path, dir_okay=False),
+    help="Listen on a Unix socket at this path instead of --host and --port",
+)
+@click.option(
+    "--ttl",
+    type=click.FloatRange(min=0),
+    default=300.0,
+    show_default=True,
+    help="Seconds to answer from a target's last result before searching again",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of targets to search for at once",
+)
+@click.option(
+    "--verify-concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of files to fetch at once for verified queries",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(path_type=pathlib.Path, file_okay=False),
+    default=DEFAULT_CACHE_DIR,
+    show_default="~/.cache/action-tools",
+    help="Directory for the on-disk cache of GitHub API responses",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Don't read or write the on-disk response cache"
+)
+def serve(
+    token,
+    host,
+    port,
+    socket_path,
+    ttl,
+    concurrency,
+    verify_concurrency,
+    cache_dir,
+    no_cache,
+):
+    """Answer `usage` queries over HTTP from a long-running process with warm caches.
+
+    Results are the JSON records `usage --targets-file` prints, kept for --ttl seconds.
+    Concurrent queries for the same target share one search.
+    """
+    with (
+        contextlib.nullcontext() if no_cache else ResponseCache(cache_dir) as cache,
+        running_loop() as loop,
+    ):
+        client = github.AsyncClient(token, cache=cache)
+        service = UsageService(client, ttl, concurrency, verify_concurrency)
+        if socket_path:
+            server = UsageUnixServer(socket_path, service, loop)
+            address = str(socket_path)
+        else:
+            server = UsageHTTPServer((host, port), service, loop)
+            address = "http://{}:{}".format(*server.server_address[:2])
+        click.echo(
+            f"Serving usage queries on {address}, press Ctrl+C to stop", err=True
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result()
@@ -0,0 +1,211 @@
+import asyncio
+import concurrent.futures
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from . import github, stats
+
+# The Search API returns at most 1000 results for any one query
+SEARCH_RESULT_CAP = 1000
+
+# Code search only indexes files smaller than 384 KB
+MAX_FILE_SIZE = 384 * 1024
+
+# Workflow and action files are mostly a few KB, so the first split is weighted
+# towards small files rather than bisecting the whole range
+FIRST_SPLIT = [0, 1024, 2048, 4096, 8192, 16384, 65536, MAX_FILE_SIZE + 1]
+
+
+@dataclass
+class Shard:
+    """One disjoint slice of a code search, bounded by a `size:low..high` qualifier"""
+
+    low: Optional[int] = None
+    high: Optional[int] = None
+    total_count: int = 0
+    fetched: int = 0
+    incomplete_results: bool = False
+    split: bool = False
+
+    @property
+    def qualifier(self) -> str:
+        if self.low is None:
+            return ""
+        return f"size:{self.low}..{self.high}"
+
+    @property
+    def complete(self) -> bool:
+        return not self.incomplete_results and self.fetched >= self.total_count
+
+    def query(self, query: str) -> str:
+        return f"{query} {self.qualifier}".rstrip()
+
+    def children(self) -> list["Shard"]:
+        if self.low is None:
+            return [
+                Shard(low, high - 1) for low, high in zip(FIRST_SPLIT, FIRST_SPLIT[1:])
+            ]
+        if self.low >= self.high:
+            return []
+        middle = (self.low + self.high) // 2
+        return [Shard(self.low, middle), Shard(middle + 1, self.high)]
+
+    def start(self, first_page: dict) -> list["Shard"]:
+        """Read the first page's counts, returning the sub-shards to search instead if over the cap"""
+        self.total_count = first_page.get("total_count", 0)
+        self.incomplete_results = first_page.get("incomplete_results", False)
+        if self.total_count > SEARCH_RESULT_CAP and (children := self.children()):
+            self.split = True
+            return children
+        return []
+
+    def record(self, page: dict) -> list:
+        items = page.get("items", [])
+        self.fetched += len(items)
+        return items
+
+    def report(self) -> dict:
+        return {
+            "shard": self.qualifier or "all",
+            "total_count": self.total_count,
+            "fetched": self.fetched,
+            "complete": self.complete,
+        }
+
+
+class ShardedSearch:
+    """All results of a code search, even past the Search API's 1000 result cap.
+
+    The unqualified query is tried first. If its `total_count` is over the cap, it's
+    split into disjoint `size:` ranges, recursively, until each shard fits under the cap
+    or can't be split any further. Shards are searched in parallel (at most
+    `max_workers` at a time) and their results yielded as each shard finishes.
+    Results may repeat, since a file can move between shards while we search.
+
+    Iterate over it with a `github.Client`, or `async for` with a `github.AsyncClient`.
+    With `text_match`, results include the `text_matches` fragments that matched.
+    """
+
+    def __init__(
+        self,
+        client: Union[github.Client, github.AsyncClient],
+        query: str,
+        max_workers: int = 4,
+        text_match: bool = False,
+    ):
+        self.client = client
+        self.query = query
+        self.max_workers = max_workers
+        self.text_match = text_match
+        self.shards: list[Shard] = []
+
+    @property
+    def leaves(self) -> list[Shard]:
+        return [shard for shard in self.shards if not shard.split]
+
+    @property
+    def sharded(self) -> bool:
+        return len(self.shards) > 1
+
+    @property
+    def complete(self) -> bool:
+        return all(shard.complete for shard in self.leaves)
+
+    def report(self) -> list[dict]:
+        return [shard.report() for shard in self.leaves]
+
+    def _pages(self, query: str):
+        return self.client.iter_search_code_pages(query, text_match=self.text_match)
+
+    def _add(self, shards: list[Shard]) -> list[Shard]:
+        self.shards.extend(shards)
+        return shards
+
+    def __iter__(self) -> Iterator[dict]:
+        root = self._add([Shard()])[0]
+        pages = self._pages(self.query)
+        if (first_page := next(pages, None)) is None:
+            return
+        if not (children := root.start(first_page)):
+            # the common case: stream pages as they come in
+            yield from root.record(first_page)
+            for page in pages:
+                yield from root.record(page)
+            return
+        pages.close()
+
+        search = stats.carry_context(self._search)
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as pool:
+            pending = {pool.submit(search, shard) for shard in self._add(children)}
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    items, children = future.result()
+                    pending |= {
+                        pool.submit(search, shard) for shard in self._add(children)
+                    }
+                    yield from items
+
+    def _search(self, shard: Shard) -> tuple[list, list[Shard]]:
+        items = []
+        pages = self._pages(shard.query(self.query))
+        for page_number, page in enumerate(pages):
+            if page_number == 0 and (children := shard.start(page)):
+                pages.close()
+                return [], children
+            items.extend(shard.record(page))
+        return items, []
+
+    async def __aiter__(self) -> AsyncIterator[dict]:
+        root = self._add([Shard()])[0]
+        pages = self._pages(self.query)
+        if (first_page := await anext(pages, None)) is None:
+            return
+        if not (children := root.start(first_page)):
+            for item in root.record(first_page):
+                yield item
+            async for page in pages:
+                for item in root.record(page):
+                    yield item
+            return
+        await pages.aclose()
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def search(shard: Shard) -> tuple[list, list[Shard]]:
+            async with semaphore:
+                return await self._asearch(shard)
+
+        pending = {
+            asyncio.ensure_future(search(shard)) for shard in self._add(children)
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    items, children = task.result()
+                    pending |= {
+                        asyncio.ensure_future(search(shard))
+                        for shard in self._add(children)
+                    }
+                    for item in items:
+                        yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _asearch(self, shard: Shard) -> tuple[list, list[Shard]]:
+        items = []
+        pages = self._pages(shard.query(self.query))
+        page_number = 0
+        async for page in pages:
+            if page_number == 0 and (children := shard.start(page)):
+                await pages.aclose()
+                return [], children
+            items.extend(shard.record(page))
+            page_number += 1
+        return items, []
@@ -0,0 +1,297 @@
+import contextlib
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Iterator, Optional, TextIO
+
+# The recorder in use, if any. Everything instrumented checks this first, so with
+# recording off the cost is a global lookup.
+_active: Optional["Recorder"] = None
+
+# The innermost span open in this thread or task, so nested spans and requests know
+# their parent
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+# httpcore trace events bounding each phase of a request
+# https://www.encode.io/httpcore/extensions/#trace
+PHASES = {
+    "connection.connect_tcp": "connect",
+    "connection.connect_unix_socket": "connect",
+    "connection.start_tls": "tls",
+}
+TTFB_START = ("http11.send_request_headers", "http2.send_request_headers")
+TTFB_END = ("http11.receive_response_headers", "http2.receive_response_headers")
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start: float
+    duration: float = 0.0
+    attributes: dict = field(default_factory=dict)
+
+
+@dataclass
+class RequestRecord:
+    """One HTTP request, with the time spent in each phase we could observe.
+
+    `connect` includes DNS resolution, which httpcore doesn't report separately.
+    Phases are 0 when a pooled connection was reused.
+    """
+
+    span_id: int
+    parent_id: Optional[int]
+    method: str
+    endpoint: str
+    resource: str
+    start: float
+    duration: float = 0.0
+    status: int = 0
+    connect: float = 0.0
+    tls: float = 0.0
+    ttfb: float = 0.0
+    bytes: int = 0
+    cache_hit: bool = False
+    attempt: int = 0
+    waited: float = 0.0
+
+
+class RequestTrace:
+    """An httpx `trace` extension timing the phases of one request into `record`"""
+
+    def __init__(self, record: RequestRecord, clock: Callable[[], float]):
+        self.record = record
+        self.clock = clock
+        self._started: dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: dict) -> None:
+        name, _, stage = event_name.rpartition(".")
+        if stage == "started":
+            self._started[name] = self.clock()
+            return
+        if name in PHASES:
+            phase, start = PHASES[name], self._started.pop(name, None)
+        elif name in TTFB_END and stage == "complete":
+            phase = "ttfb"
+            start = next(
+                (self._started[s] for s in TTFB_START if s in self._started), None
+            )
+        else:
+            return
+        if start is not None:
+            setattr(
+                self.record, phase, getattr(self.record, phase) + self.clock() - start
+            )
+
+    async def atrace(self, event_name: str, info: dict) -> None:
+        self(event_name, info)
+
+    def finish(self, status: int = 0, size: int = 0, cache_hit: bool = False) -> None:
+        """Record the response; a status of 0 means the request failed without one"""
+        self.record.duration = self.clock() - self.record.start
+        self.record.status, self.record.bytes = status, size
+        self.record.cache_hit = cache_hit
+
+
+class Recorder:
+    """Records spans around operations, and every HTTP request made while it's active.
+
+    Make it active with `recording(recorder)`; `summary()` and `write_trace()` report
+    what it recorded.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        # wall-clock time at `clock()`'s zero, so traces carry real timestamps
+        self.epoch = time.time() - clock()
+        self.spans: list[Span] = []
+        self.requests: list[RequestRecord] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        span = Span(
+            name, self._next_id(), _current_span.get(), self.clock(), 0.0, attributes
+        )
+        token = _current_span.set(span.span_id)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            span.duration = self.clock() - span.start
+            with self._lock:
+                self.spans.append(span)
+
+    def start_request(
+        self, method: str, endpoint: str, resource: str, attempt: int, waited: float
+    ) -> RequestTrace:
+        """Start recording a request; pass the returned trace as its `trace` extension"""
+        record = RequestRecord(
+            self._next_id(),
+            _current_span.get(),
+            method,
+            endpoint,
+            resource,
+            self.clock(),
+            attempt=attempt,
+            waited=waited,
+        )
+        with self._lock:
+            self.requests.append(record)
+        return RequestTrace(record, self.clock)
+
+    def summary(self) -> list[str]:
+        """A table of the time spent in each operation, and in requests to each rate
+        limit resource"""
+        lines = [f"{'operation':<24} {'calls':>6} {'total ms':>10} {'mean ms':>9}"]
+        by_name: dict[str, list[float]] = {}
+        for span in self.spans:
+            by_name.setdefault(span.name, []).append(span.duration * 1000)
+        for name, durations in by_name.items():
+            total = sum(durations)
+            lines.append(
+                f"{name:<24} {len(durations):>6} {total:>10.1f} "
+                f"{total / len(durations):>9.1f}"
+            )
+
+        lines.append("")
+        lines.append(
+            f"{'requests':<10} {'count':>6} {'total ms':>10} {'connect':>8} "
+            f"{'tls':>8} {'ttfb':>8} {'wait ms':>8} {'KiB':>8} {'cached':>7} "
+            f"{'retries':>8}"
+        )
+        by_resource: dict[str, list[RequestRecord]] = {}
+        for record in self.requests:
+            by_resource.setdefault(record.resource, []).append(record)
+        for resource, records in sorted(by_resource.items()):
+            ms = {
+                attr: sum(getattr(record, attr) for record in records) * 1000
+                for attr in ("duration", "connect", "tls", "ttfb", "waited")
+            }
+            lines.append(
+                f"{resource:<10} {len(records):>6} {ms['duration']:>10.1f} "
+                f"{ms['connect']:>8.1f} {ms['tls']:>8.1f} {ms['ttfb']:>8.1f} "
+                f"{ms['waited']:>8.1f} {sum(r.bytes for r in records) / 1024:>8.1f} "
+                f"{sum(r.cache_hit for r in records):>7} "
+                f"{sum(r.attempt > 0 for r in records):>8}"
+            )
+        return lines
+
+    def write_trace(self, out: TextIO) -> None:
+        """Write every span and request as JSON, shaped like OpenTelemetry spans"""
+        trace_id = os.urandom(16).hex()
+
+        def otel_span(span_id, parent_id, name, start, duration, attributes) -> dict:
+            start_ns = int((self.epoch + start) * 1e9)
+            return {
+                "trace_id": trace_id,
+                "span_id": f"{span_id:016x}",
+                "parent_span_id": f"{parent_id:016x}" if parent_id else None,
+                "name": name,
+                "start_time_unix_nano": start_ns,
+                "end_time_unix_nano": start_ns + int(duration * 1e9),
+                "attributes": attributes,
+            }
+
+        spans = [
+            otel_span(s.span_id, s.parent_id, s.name, s.start, s.duration, s.attributes)
+            for s in self.spans
+        ]
+        for record in self.requests:
+            attributes = asdict(record)
+            for key in ("span_id", "parent_id", "start", "duration"):
+                del attributes[key]
+            spans.append(
+                otel_span(
+                    record.span_id,
+                    record.parent_id,
+                    f"{record.method} {record.endpoint}",
+                    record.start,
+                    record.duration,
+                    attributes,
+                )
+            )
+        spans.sort(key=lambda span: span["start_time_unix_nano"])
+        json.dump({"spans": spans}, out, indent=2)
+        out.write("\n")
+
+
+def active() -> Optional[Recorder]:
+    return _active
+
+
+@contextlib.contextmanager
+def recording(recorder: Optional[Recorder]) -> Iterator[Optional[Recorder]]:
+    """Make `recorder` the active one while in the block; None records nothing"""
+    global _active
+    previous, _active = _active, recorder
+    try:
+        yield recorder
+    finally:
+        _active = previous
+
+
+def span(name: str, **attributes):
+    """A span in the active recorder, or a no-op if nothing's recording"""
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.span(name, **attributes)
+
+
+def carry_context(func):
+    """`func`, run in the caller's current span wherever it's called from, e.g. a worker
+    thread, which otherwise starts outside any span"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # a context can only be entered by one thread at a time, so each call gets a copy
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def timed(name: str):
+    """Record each call of the decorated function as a span, while recording"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _active.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_async(name: str):
+    """`timed`, for coroutine functions"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _active is None:
+                return await func(*args, **kwargs)
+            with _active.span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
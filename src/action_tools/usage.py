@@ -1,38 +1,62 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import csv
+import io
+import json
+import pathlib
 import re
-from typing import Optional
+from collections import Counter
+from typing import Iterable, Iterator, Optional, Sequence, TextIO
 
 import click
+import httpx
 
-from . import github
+from . import github, stats
+from .cache import DEFAULT_CACHE_DIR, ResponseCache
+from .gendocs import ACTION_FILENAMES
+from .graph import UsageGraph
+from .index import UsageIndex
 from .models import Action, Resource, Workflow
+from .shards import ShardedSearch
+from .uses import classify_target, extract_uses
 
-# Captures the way a reusable workflow would be specified in a `uses:` directive in a Github action workflow
-WORKFLOW_REGEX = re.compile(
-    r"^(?P<org>[\w.-]+)/(?P<repo>[\w.-]+)(?P<subpath>/\.github/workflows/.+\.(yaml|yml))(?:@.+)?$"
-)
 
-# Captures the way an action would be specified in a `uses:` directive in a Github action workflow
-ACTION_REGEX = re.compile(
-    r"^(?P<org>[\w.-]+)/(?P<repo>[\w.-]+)(?P<subpath>(?:/[\w.-]+)*)(?:@.+)?$"
-)
+def _unsupported(resource: Resource) -> ValueError:
+    return ValueError(
+        f"Unsupported resource type or invalid path: expected a workflow or action at "
+        f"{resource.org}/{resource.repo}/{resource.subpath}, but none was found. "
+        "Ensure the path exists in the repository and contains a valid GitHub Action "
+        "(with 'action.yml' or 'action.yaml') or a workflow file."
+    )
 
 
-def classify_target(target: str) -> Resource:
-    if match := WORKFLOW_REGEX.match(target):
-        return Workflow(
-            org=match.group("org"),
-            repo=match.group("repo"),
-            subpath=match.group("subpath"),
-        )
-    if match := ACTION_REGEX.match(target):
-        return Action(
-            org=match.group("org"),
-            repo=match.group("repo"),
-            subpath=match.group("subpath"),
-        )
-    raise ValueError(f"target {target} does not appear to be an action or workflow")
+def _contents_match(resource: Resource, contents) -> bool:
+    if isinstance(resource, Workflow):
+        return bool(contents)
+    elif isinstance(resource, Action):
+        return any(file["name"] in ACTION_FILENAMES for file in contents)
+    else:
+        raise _unsupported(resource)
 
 
+def _object_match(resource: Resource, obj: Optional[dict]) -> bool:
+    """As `_contents_match`, for a git object from `github.Client.get_objects`"""
+    if not isinstance(resource, (Workflow, Action)):
+        raise _unsupported(resource)
+    if obj is None:
+        return False
+    entries = obj.get("entries")
+    if isinstance(resource, Workflow):
+        return obj["__typename"] == "Blob" or bool(entries)
+    return any(entry["name"] in ACTION_FILENAMES for entry in entries or [])
+
+
+def _object_lookups(resources: list[Resource]) -> list[tuple[str, str, str]]:
+    return [(r.org, r.repo, f"HEAD:{r.subpath.lstrip('/')}") for r in resources]
+
+
+@stats.timed("validate_exists")
 def validate_exists(resource: Resource, client: github.Client) -> bool:
     try:
         contents = client.get_repo_contents(
@@ -43,36 +67,550 @@ def validate_exists(resource: Resource, client: github.Client) -> bool:
             return False
         raise
 
-    if isinstance(resource, Workflow):
-        return bool(contents)
-    elif isinstance(resource, Action):
-        return any(file["name"] in {"action.yml", "action.yaml"} for file in contents)
-    else:
-        raise ValueError(
-            f"Unsupported resource type or invalid path: expected a workflow or action at "
-            f"{resource.org}/{resource.repo}/{resource.subpath}, but none was found. "
-            "Ensure the path exists in the repository and contains a valid GitHub Action "
-            "(with 'action.yml' or 'action.yaml') or a workflow file."
+    return _contents_match(resource, contents)
+
+
+@stats.timed_async("validate_exists")
+async def validate_exists_async(resource: Resource, client: github.AsyncClient) -> bool:
+    try:
+        contents = await client.get_repo_contents(
+            org=resource.org, repo=resource.repo, subpath=resource.subpath
         )
+    except github.ClientStatusError as exc:
+        if exc.status_code == 404:
+            return False
+        raise
+
+    return _contents_match(resource, contents)
+
+
+@stats.timed("validate_exists_many")
+def validate_exists_many(
+    resources: list[Resource], client: github.Client
+) -> list[bool]:
+    """`validate_exists` for each resource, from a few GraphQL queries rather than a
+    request per resource. Falls back to the REST API if GraphQL isn't available."""
+    if client.token:
+        try:
+            objects = client.get_objects(_object_lookups(resources))
+        except (github.GraphQLError, github.ClientStatusError):
+            pass
+        else:
+            return [_object_match(r, obj) for r, obj in zip(resources, objects)]
+    return [validate_exists(resource, client) for resource in resources]
+
+
+@stats.timed_async("validate_exists_many")
+async def validate_exists_many_async(
+    resources: list[Resource], client: github.AsyncClient
+) -> list[bool]:
+    if client.token:
+        try:
+            objects = await client.get_objects(_object_lookups(resources))
+        except (github.GraphQLError, github.ClientStatusError):
+            pass
+        else:
+            return [_object_match(r, obj) for r, obj in zip(resources, objects)]
+    semaphore = asyncio.Semaphore(client.max_concurrency)
+
+    async def run(resource: Resource) -> bool:
+        async with semaphore:
+            return await validate_exists_async(resource, client)
+
+    return list(await asyncio.gather(*(run(resource) for resource in resources)))
+
+
+def _usage_query(target: str) -> str:
+    return f'"uses: {target}" language:YAML'
+
+
+def usage_search(
+    target: str, client: github.Client, text_match: bool = False
+) -> ShardedSearch:
+    return ShardedSearch(client, _usage_query(target), text_match=text_match)
+
+
+def iter_usage(
+    target: str, client: github.Client, search: Optional[Iterable[dict]] = None
+) -> Iterator[str]:
+    """Yield each repository referencing `target` the first time it shows up in search results"""
+    if search is None:
+        search = usage_search(target, client)
+    seen = set()
+    for item in search:
+        repo = item["repository"]["full_name"]
+        if repo not in seen:
+            seen.add(repo)
+            yield repo
+
+
+def find_usage(
+    target: str, client: github.Client, search: Optional[Iterable[dict]] = None
+):
+    return sorted(iter_usage(target, client, search))
+
+
+def _pinned_refs(content: bytes, target: str) -> list[str]:
+    """The refs a workflow or action file's `uses:` pin `target` to, if it uses it at all
+    ("" for no ref)"""
+    refs = (ref for used, ref in extract_uses(content) if used.lower() == target)
+    return list(dict.fromkeys(refs))
+
+
+def _verified(item: dict, refs: list[str]) -> Iterator[dict]:
+    if refs:
+        yield {**item, "verified_refs": refs}
+
+
+def verify_usage(
+    items: Iterable[dict], target: str, client: github.Client, max_workers: int = 8
+) -> Iterator[dict]:
+    """Pass through only the search results whose files really use `target`.
+
+    Code search also matches comments, docs and longer names sharing the prefix
+    (`my-org/my-action-v2`), so each file's blob is fetched and its `uses:` values
+    compared to `target` exactly. Blobs are fetched once per SHA, at most `max_workers`
+    at a time, while results keep coming in. Results are yielded as their blob is
+    checked, with the refs they pin `target` to in `verified_refs`.
+    """
+    key = classify_target(target).target.lower()
+    known: dict[str, list[str]] = {}
+    pending: dict[str, tuple[concurrent.futures.Future, list[dict]]] = {}
+
+    def fetch(item: dict) -> list[str]:
+        org, repo = item["repository"]["full_name"].split("/", 1)
+        try:
+            return _pinned_refs(client.get_blob(org, repo, item["sha"]), key)
+        except github.ClientStatusError:
+            return []
+
+    def settle(futures) -> Iterator[dict]:
+        for sha in [sha for sha, (future, _) in pending.items() if future in futures]:
+            future, waiting = pending.pop(sha)
+            known[sha] = future.result()
+            for item in waiting:
+                yield from _verified(item, known[sha])
+
+    fetch_in_span = stats.carry_context(fetch)
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+        for item in items:
+            sha = item["sha"]
+            if sha in known:
+                yield from _verified(item, known[sha])
+            elif sha in pending:
+                pending[sha][1].append(item)
+            else:
+                pending[sha] = (pool.submit(fetch_in_span, item), [item])
+            futures = [future for future, _ in pending.values()]
+            if len(pending) >= 2 * max_workers:
+                # enough queued up; wait for a fetch before reading more results
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+            else:
+                done = {future for future in futures if future.done()}
+            yield from settle(done)
+        while pending:
+            done, _ = concurrent.futures.wait(
+                [future for future, _ in pending.values()],
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            yield from settle(done)
+
+
+async def verify_usage_async(
+    items: list[dict],
+    target: str,
+    client: github.AsyncClient,
+    semaphore: asyncio.Semaphore,
+) -> list[dict]:
+    """As `verify_usage`, for results already collected, fetching blobs while holding
+    `semaphore` so several targets can share one cap"""
+    key = classify_target(target).target.lower()
+    by_sha = {item["sha"]: item for item in items}
+
+    async def fetch(item: dict) -> list[str]:
+        org, repo = item["repository"]["full_name"].split("/", 1)
+        try:
+            async with semaphore:
+                content = await client.get_blob(org, repo, item["sha"])
+        except github.ClientStatusError:
+            return []
+        return _pinned_refs(content, key)
+
+    refs = await asyncio.gather(*(fetch(item) for item in by_sha.values()))
+    known = dict(zip(by_sha, refs))
+    return [
+        verified for item in items for verified in _verified(item, known[item["sha"]])
+    ]
+
+
+USAGE_FORMATS = ("text", "json", "ndjson", "csv")
+USAGE_FIELDS = ("repo", "path", "html_url", "ref")
+VERSION_FIELDS = ("ref", "tags", "repos")
+
+# A ref that can only be a commit: a full SHA, or an abbreviated one
+SHA_REGEX = re.compile(r"^[0-9a-f]{7,40}$")
+
+
+def _ref_regex(target: str) -> re.Pattern:
+    # `uses: target@ref`, quoted or not, with the ref running up to whitespace, a
+    # closing quote or a comment
+    return re.compile(
+        rf"uses:\s*['\"]?{re.escape(target)}@(?P<ref>[^\s'\"#]+)", re.IGNORECASE
+    )
+
+
+def _refs(texts: Iterable[str], ref_regex: re.Pattern) -> list[str]:
+    """The distinct refs `texts` pin the target to, in the order they appear"""
+    refs = (match.group("ref") for text in texts for match in ref_regex.finditer(text))
+    return list(dict.fromkeys(refs))
 
 
-def find_usage(target: str, client: github.Client):
-    query = f'"uses: {target}" language:YAML'
-    items = client.search_code(query)
-    repos = {item["repository"]["full_name"] for item in items}
+def usage_hits(item: dict, ref_regex: re.Pattern) -> Iterator[dict]:
+    """Records for one search result, one per distinct ref its text matches (or its
+    verified contents) pin `target` to"""
+    if "verified_refs" in item:
+        refs = [ref or None for ref in item["verified_refs"]]
+    else:
+        fragments = (match["fragment"] for match in item.get("text_matches", []))
+        refs = _refs(fragments, ref_regex)
+    for ref in refs or [None]:
+        yield {
+            "repo": item["repository"]["full_name"],
+            "path": item["path"],
+            "html_url": item["html_url"],
+            "ref": ref,
+        }
+
+
+def iter_usage_hits(
+    target: str, client: github.Client, search: Optional[Iterable[dict]] = None
+) -> Iterator[dict]:
+    """Yield a record for each file referencing `target` as search results come in"""
+    if search is None:
+        search = usage_search(target, client, text_match=True)
+    ref_regex = _ref_regex(target)
+    seen = set()
+    for item in search:
+        key = (item["repository"]["full_name"], item["path"])
+        if key not in seen:
+            seen.add(key)
+            yield from usage_hits(item, ref_regex)
+
+
+def format_records(
+    hits: Iterable[dict], output_format: str, fields: Sequence[str] = USAGE_FIELDS
+) -> Iterator[str]:
+    """Render records as `json`, `ndjson` or `csv`, a chunk at a time as they arrive"""
+    if output_format == "ndjson":
+        for hit in hits:
+            yield json.dumps(hit) + "\n"
+    elif output_format == "json":
+        separator = "["
+        for hit in hits:
+            yield f"{separator}\n  {json.dumps(hit)}"
+            separator = ","
+        yield "[]\n" if separator == "[" else "\n]\n"
+    elif output_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fields, lineterminator="\n")
+
+        def written() -> str:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writeheader()
+        yield written()
+        for hit in hits:
+            writer.writerow(
+                {k: " ".join(v) if isinstance(v, list) else v for k, v in hit.items()}
+            )
+            yield written()
+    else:
+        raise ValueError(f"Unsupported output format {output_format!r}")
+
+
+def fill_missing_refs(
+    hits: Iterable[dict], target: str, client: github.Client, max_workers: int = 8
+) -> Iterator[dict]:
+    """Pass hits through, fetching the files of those whose text matches didn't show
+    the ref (at most `max_workers` at a time) to find the refs they pin instead"""
+    ref_regex = _ref_regex(target)
+    missing = []
+    for hit in hits:
+        if hit["ref"] is None:
+            missing.append(hit)
+        else:
+            yield hit
+
+    def fetch(hit: dict) -> list[str]:
+        org, repo = hit["repo"].split("/", 1)
+        try:
+            return _refs([client.get_file(org, repo, hit["path"])], ref_regex)
+        except github.ClientStatusError:
+            return []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+        refs_by_hit = pool.map(stats.carry_context(fetch), missing)
+        for hit, refs in zip(missing, refs_by_hit):
+            for ref in refs or [None]:
+                yield {**hit, "ref": ref}
+
+
+def tags_by_commit(tags: Iterable[dict]) -> dict[str, list[str]]:
+    commits = {}
+    for tag in tags:
+        commits.setdefault(tag["commit"]["sha"], []).append(tag["name"])
+    return commits
+
+
+def resolve_tags(ref: str, commits: dict[str, list[str]]) -> list[str]:
+    """The tags pointing at `ref`, if it's a commit SHA (full or abbreviated)"""
+    if not SHA_REGEX.match(ref):
+        return []
+    if ref in commits:
+        return commits[ref]
+    return [tag for sha, tags in commits.items() if sha.startswith(ref) for tag in tags]
+
+
+def version_histogram(
+    hits: Iterable[dict], commits: dict[str, list[str]]
+) -> list[dict]:
+    """How many consuming repositories pin each ref, most common first. A repository
+    pinning a ref in several files counts once; one pinning several refs counts for each."""
+    pins = {(hit["repo"], hit["ref"]) for hit in hits}
+    counts = Counter(ref for _, ref in pins)
+    return [
+        {"ref": ref, "tags": resolve_tags(ref, commits) if ref else [], "repos": count}
+        for ref, count in sorted(counts.items(), key=lambda rc: (-rc[1], rc[0] or ""))
+    ]
+
+
+def format_histogram(rows: list[dict], width: int = 40) -> Iterator[str]:
+    most = max((row["repos"] for row in rows), default=0)
+    labels = []
+    for row in rows:
+        label = row["ref"] or "(unknown)"
+        if row["tags"]:
+            label += f" ({', '.join(row['tags'])})"
+        labels.append(label)
+    label_width = max(map(len, labels), default=0)
+    for label, row in zip(labels, rows):
+        bar = "#" * max(1, round(row["repos"] / most * width))
+        yield f"{label:<{label_width}}  {row['repos']:>5}  {bar}\n"
+
+
+async def find_usage_async(
+    target: str,
+    client: github.AsyncClient,
+    search: Optional[ShardedSearch] = None,
+):
+    if search is None:
+        search = usage_search(target, client)
+    repos = set()
+    async for item in search:
+        repos.add(item["repository"]["full_name"])
     return sorted(repos)
 
 
-def _usage(target: str, token: str, client: Optional[github.Client] = None):
+def _report_shards(search: ShardedSearch) -> None:
+    if not search.sharded and search.complete:
+        return
+    for shard in search.report():
+        status = "complete" if shard["complete"] else "incomplete"
+        click.echo(
+            f"{shard['shard']}: {shard['fetched']}/{shard['total_count']} results ({status})",
+            err=True,
+        )
+
+
+def _usage(
+    target: str,
+    token: str,
+    client: Optional[github.Client] = None,
+    cache: Optional[ResponseCache] = None,
+    stream: bool = False,
+    output_format: str = "text",
+    versions: bool = False,
+    verify: bool = False,
+    verify_concurrency: int = 8,
+):
     if not client:
-        client = github.Client(token=token)
+        with github.Client(token, cache=cache) as client:
+            return _usage(
+                target,
+                token,
+                client,
+                stream=stream,
+                output_format=output_format,
+                versions=versions,
+                verify=verify,
+                verify_concurrency=verify_concurrency,
+            )
 
     target, *_ = target.partition("@")
     resource = classify_target(target)
     if not validate_exists(resource, client):
         raise click.ClickException(f"Could not find {target}")
-    repos = find_usage(target, client)
-    click.echo("\n".join(repos))
+    # results are searched for as they're printed, so the span covers both, in every
+    # output mode
+    with stats.span("find_usage", target=target):
+        search = usage_search(
+            target, client, text_match=versions or output_format != "text"
+        )
+        items = search
+        if verify:
+            items = verify_usage(search, target, client, verify_concurrency)
+        if versions:
+            hits = iter_usage_hits(target, client, items)
+            if not verify:
+                hits = fill_missing_refs(hits, target, client)
+            # one tag listing for the target's repository resolves every SHA
+            commits = tags_by_commit(client.iter_tags(resource.org, resource.repo))
+            rows = version_histogram(hits, commits)
+            if output_format == "text":
+                chunks = format_histogram(rows)
+            else:
+                chunks = format_records(rows, output_format, VERSION_FIELDS)
+            for chunk in chunks:
+                click.echo(chunk, nl=False)
+        elif output_format != "text":
+            hits = iter_usage_hits(target, client, items)
+            for chunk in format_records(hits, output_format):
+                click.echo(chunk, nl=False)
+        elif stream:
+            for repo in iter_usage(target, client, items):
+                click.echo(repo)
+        else:
+            click.echo("\n".join(find_usage(target, client, items)))
+    _report_shards(search)
+
+
+async def usage_record(
+    target: str,
+    client: github.AsyncClient,
+    exists: Optional[bool] = None,
+    verify: Optional[asyncio.Semaphore] = None,
+) -> dict:
+    """Look up one target for a batch run, reporting failures in the record rather than raising
+
+    `exists` skips checking the target exists, if that's already known. With `verify`,
+    results are checked with `verify_usage_async` under that semaphore.
+    """
+    target, *_ = target.partition("@")
+    record = {"target": target}
+    try:
+        resource = classify_target(target)
+        record["type"] = type(resource).__name__.lower()
+        if exists is None:
+            exists = await validate_exists_async(resource, client)
+        record["exists"] = exists
+        if record["exists"]:
+            search = usage_search(target, client)
+            with stats.span("find_usage", target=target):
+                if verify:
+                    items = [item async for item in search]
+                    items = await verify_usage_async(items, target, client, verify)
+                    repos = {item["repository"]["full_name"] for item in items}
+                    record["repos"] = sorted(repos)
+                else:
+                    record["repos"] = await find_usage_async(target, client, search)
+            if search.sharded:
+                record["shards"] = search.report()
+    except (ValueError, github.ClientStatusError, httpx.HTTPError) as exc:
+        record["error"] = str(exc)
+    return record
+
+
+async def _existing_targets(
+    targets: list[str], client: github.AsyncClient
+) -> dict[str, bool]:
+    """Check every valid target exists up front, in as few requests as possible.
+    Targets missing from the result are left for `usage_record` to check and report."""
+    resources = {}
+    for target in targets:
+        target, *_ = target.partition("@")
+        with contextlib.suppress(ValueError):
+            resources[target] = classify_target(target)
+    try:
+        exists = await validate_exists_many_async(list(resources.values()), client)
+    except (github.ClientStatusError, httpx.HTTPError):
+        return {}
+    return dict(zip(resources, exists))
+
+
+def read_targets(targets_file: TextIO) -> list[str]:
+    # read whole rather than iterated, which CliRunner's stdin doesn't always allow
+    lines = (line.strip() for line in targets_file.read().splitlines())
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+async def _usage_batch(
+    targets: list[str],
+    token: str,
+    concurrency: int,
+    client: Optional[github.AsyncClient] = None,
+    cache: Optional[ResponseCache] = None,
+    verify_concurrency: Optional[int] = None,
+):
+    if not client:
+        async with github.AsyncClient(token, cache=cache) as client:
+            return await _usage_batch(
+                targets,
+                token,
+                concurrency,
+                client,
+                verify_concurrency=verify_concurrency,
+            )
+
+    existing = await _existing_targets(targets, client)
+    semaphore = asyncio.Semaphore(concurrency)
+    # one cap on blob fetches, however many targets are being verified at once
+    verify = asyncio.Semaphore(verify_concurrency) if verify_concurrency else None
+
+    async def run(target: str) -> dict:
+        async with semaphore:
+            exists = existing.get(target.partition("@")[0])
+            return await usage_record(target, client, exists, verify)
+
+    # emit each result as soon as its target finishes
+    for record in asyncio.as_completed([run(target) for target in targets]):
+        click.echo(json.dumps(await record))
+    # remaining rate limit budget, for planning how many targets the next run can take
+    summary = {
+        "rate_limits": client.scheduler.state(),
+        "cache": client.cache.stats() if client.cache else None,
+    }
+    click.echo(json.dumps(summary), err=True)
+
+
+def _usage_offline(
+    targets: list[str], index_path: pathlib.Path, batch: bool, transitive: bool = False
+):
+    with UsageIndex(index_path) as usage_index:
+        graph = UsageGraph.from_index(usage_index) if transitive else None
+        for target in targets:
+            try:
+                if graph:
+                    dependents = graph.dependents(target)
+                    repos = sorted({dependent.repo for dependent in dependents})
+                else:
+                    repos = usage_index.find_usage(target)
+            except ValueError as exc:
+                if not batch:
+                    raise click.ClickException(str(exc))
+                click.echo(json.dumps({"target": target, "error": str(exc)}))
+                continue
+            if batch:
+                record = {"target": target, "repos": repos}
+                if graph:
+                    record["dependents"] = [d._asdict() for d in dependents]
+                click.echo(json.dumps(record))
+            else:
+                click.echo("\n".join(repos))
 
 
 @click.command(
@@ -81,18 +619,147 @@ def _usage(target: str, token: str, client: Optional[github.Client] = None):
       action-tools usage "my-org/my-repo/.github/workflows/build.yml"
       action-tools usage "my-org/my-action/action-dir"
       action-tools usage "my-org/my-action@v1.2.3"
+      action-tools usage --targets-file targets.txt
+      action-tools usage --index usage-index.sqlite3 "my-org/my-action"
+      action-tools usage --index usage-index.sqlite3 --transitive "my-org/my-action"
+      action-tools usage --format ndjson "my-org/my-action"
+      action-tools usage --versions "my-org/my-action"
+      action-tools usage --verify --format csv "my-org/my-action"
     
     \b
     Example Output:
       some-org/some-repo
       some-org/another-repo
+
+    \b
+    Example Output (--format ndjson):
+      {"repo": "some-org/some-repo", "path": ".github/workflows/ci.yml", "html_url": "https://github.com/...", "ref": "v1"}
     """
 )
-@click.argument("target", type=str)
+@click.argument("target", type=str, required=False)
 @click.option("--token", envvar="GITHUB_TOKEN", help="GitHub token for authentication")
-def usage(target, token):
+@click.option(
+    "--targets-file",
+    type=click.File("r"),
+    help="File with one TARGET per line (`-` for stdin); prints one JSON result per line",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of targets to look up at once with --targets-file",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(path_type=pathlib.Path, file_okay=False),
+    default=DEFAULT_CACHE_DIR,
+    show_default="~/.cache/action-tools",
+    help="Directory for the on-disk cache of GitHub API responses",
+)
+@click.option(
+    "--no-cache", is_flag=True, help="Don't read or write the on-disk response cache"
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Print each repository as soon as it's found instead of a sorted list at the end",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(USAGE_FORMATS),
+    default="text",
+    show_default=True,
+    help="json, ndjson and csv print one record per referencing file, with its "
+    "path, URL and pinned ref, streamed as results come in",
+)
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Fetch each matching file and keep only those whose `uses:` reference TARGET "
+    "exactly, dropping matches in comments, docs and longer names",
+)
+@click.option(
+    "--verify-concurrency",
+    type=click.IntRange(min=1),
+    default=8,
+    show_default=True,
+    help="Number of files to fetch at once with --verify",
+)
+@click.option(
+    "--versions",
+    is_flag=True,
+    help="Print how many repositories pin each ref of TARGET, with the tags of pinned SHAs",
+)
+@click.option(
+    "--index",
+    "index_path",
+    type=click.Path(path_type=pathlib.Path, exists=True, dir_okay=False),
+    help="Answer from an offline index built by `action-tools index build` instead of the GitHub API",
+)
+@click.option(
+    "--transitive",
+    is_flag=True,
+    help="With --index, also include repositories that use TARGET through other "
+    "reusable workflows and actions",
+)
+def usage(
+    target,
+    token,
+    targets_file,
+    concurrency,
+    cache_dir,
+    no_cache,
+    stream,
+    output_format,
+    verify,
+    verify_concurrency,
+    versions,
+    index_path,
+    transitive,
+):
     """Search GitHub for repositories that reference a reusable workflow or action.
 
     TARGET must be a reference to a GitHub Action or reusable workflow as would be specified in a job or step's `uses` directive.
     """
-    return _usage(target, token)
+    if bool(target) == bool(targets_file):
+        raise click.UsageError("Provide exactly one of TARGET or --targets-file")
+    if output_format != "text" and (targets_file or index_path):
+        raise click.UsageError(
+            "--format only applies to a single TARGET searched on GitHub"
+        )
+    if versions and (targets_file or index_path):
+        raise click.UsageError(
+            "--versions only applies to a single TARGET searched on GitHub"
+        )
+    if verify and index_path:
+        raise click.UsageError("--verify only applies to results from the GitHub API")
+    if transitive and not index_path:
+        raise click.UsageError("--transitive requires --index")
+    targets = read_targets(targets_file) if targets_file else [target]
+    if index_path:
+        return _usage_offline(
+            targets, index_path, batch=bool(targets_file), transitive=transitive
+        )
+    with contextlib.nullcontext() if no_cache else ResponseCache(cache_dir) as cache:
+        if targets_file:
+            return asyncio.run(
+                _usage_batch(
+                    targets,
+                    token,
+                    concurrency,
+                    cache=cache,
+                    verify_concurrency=verify_concurrency if verify else None,
+                )
+            )
+        return _usage(
+            target,
+            token,
+            cache=cache,
+            stream=stream,
+            output_format=output_format,
+            versions=versions,
+            verify=verify,
+            verify_concurrency=verify_concurrency,
+        )
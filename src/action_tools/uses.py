@@ -0,0 +1,129 @@
+import functools
+import re
+from typing import Iterable, Iterator, Optional
+
+from ruamel.yaml import YAML
+from ruamel.yaml.error import YAMLError
+
+from .models import Action, Resource, Uses, UsesReference, Workflow
+
+# Captures the way a reusable workflow would be specified in a `uses:` directive in a Github action workflow
+WORKFLOW_REGEX = re.compile(
+    r"^(?P<org>[\w.-]+)/(?P<repo>[\w.-]+)(?P<subpath>/\.github/workflows/.+\.(yaml|yml))(?:@.+)?$"
+)
+
+# Captures the way an action would be specified in a `uses:` directive in a Github action workflow
+ACTION_REGEX = re.compile(
+    r"^(?P<org>[\w.-]+)/(?P<repo>[\w.-]+)(?P<subpath>(?:/[\w.-]+)*)(?:@.+)?$"
+)
+
+
+# Every kind of `uses:` value in one alternation, so each is matched in a single pass:
+# a local action, a Docker image, a reusable workflow or an action, with an optional @ref
+USES_REGEX = re.compile(
+    r"""
+    ^(?:
+        (?P<local>\./.*)
+      | docker://(?P<image>.+)
+      | (?P<org>[\w.-]+)/(?P<repo>[\w.-]+)
+        (?:
+            (?P<workflow>/\.github/workflows/.+?\.(?:yaml|yml))
+          | (?P<subpath>(?:/[\w.-]+)*)
+        )
+        (?:@(?P<ref>.+))?
+    )$
+    """,
+    re.VERBOSE,
+)
+
+# Large enough for every distinct `uses:` in a sizeable org; the same few actions
+# (actions/checkout@v4, ...) make up most of them
+USES_CACHE_SIZE = 16384
+
+
+@functools.lru_cache(maxsize=USES_CACHE_SIZE)
+def classify_uses(uses: str) -> Optional[Uses]:
+    """Classify one `uses:` value, or return None if it isn't one we recognize"""
+    if not (match := USES_REGEX.match(uses.strip())):
+        return None
+    if local := match.group("local"):
+        return Uses("local", local, "")
+    if image := match.group("image"):
+        return Uses("docker", image, "")
+    org, repo, ref = match.group("org", "repo", "ref")
+    if workflow := match.group("workflow"):
+        kind, resource = "workflow", Workflow(org, repo, workflow)
+    else:
+        kind, resource = "action", Action(org, repo, match.group("subpath"))
+    return Uses(kind, resource.target, ref or "", resource)
+
+
+def classify_uses_many(values: Iterable[str]) -> Iterator[Optional[Uses]]:
+    """Classify many `uses:` values, as `classify_uses` does for each"""
+    return map(classify_uses, values)
+
+
+def classify_target(target: str) -> Resource:
+    if match := WORKFLOW_REGEX.match(target):
+        return Workflow(
+            org=match.group("org"),
+            repo=match.group("repo"),
+            subpath=match.group("subpath"),
+        )
+    if match := ACTION_REGEX.match(target):
+        return Action(
+            org=match.group("org"),
+            repo=match.group("repo"),
+            subpath=match.group("subpath"),
+        )
+    raise ValueError(f"target {target} does not appear to be an action or workflow")
+
+
+# Files without so much as the key can skip YAML parsing entirely
+USES_KEY_REGEX = re.compile(rb"\buses\s*:")
+
+# We only need plain data out of these files, not round-trip fidelity, so use the safe
+# loader, which is backed by libyaml when ruamel.yaml.clib is installed
+SAFE_YAML = YAML(typ="safe")
+
+
+def _steps(container: dict) -> list:
+    # a malformed file can have anything under `steps:`
+    steps = container.get("steps")
+    return steps if isinstance(steps, list) else []
+
+
+def iter_uses(document) -> Iterator[str]:
+    """Yield `uses:` values from a workflow's jobs and steps, or a composite action's steps"""
+    if not isinstance(document, dict):
+        return
+    steps = []
+    jobs = document.get("jobs")
+    if isinstance(jobs, dict):
+        for job in jobs.values():
+            if not isinstance(job, dict):
+                continue
+            if isinstance(job.get("uses"), str):
+                yield job["uses"]
+            steps.extend(_steps(job))
+    runs = document.get("runs")
+    if isinstance(runs, dict):
+        steps.extend(_steps(runs))
+    for step in steps:
+        if isinstance(step, dict) and isinstance(step.get("uses"), str):
+            yield step["uses"]
+
+
+def extract_uses(content: bytes) -> list[UsesReference]:
+    """Return each remote workflow or action a file uses"""
+    if not USES_KEY_REGEX.search(content):
+        return []
+    try:
+        document = SAFE_YAML.load(content)
+    except YAMLError:
+        return []
+    return [
+        UsesReference(uses.target, uses.ref)
+        for uses in classify_uses_many(iter_uses(document))
+        if uses is not None and uses.resource is not None
+    ]
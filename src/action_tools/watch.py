@@ -0,0 +1,76 @@
+import os
+import pathlib
+import stat
+import time
+from typing import Callable, Iterable, Iterator
+
+Snapshot = dict[pathlib.Path, tuple[int, int]]
+
+DEFAULT_INTERVAL = 0.2
+DEFAULT_DEBOUNCE = 0.3
+
+
+def snapshot(paths: Iterable[pathlib.Path]) -> Snapshot:
+    """Return the mtime and size of each path, and of the files directly inside any
+    that are directories. Missing paths are left out, so creating one is a change too."""
+    result = {}
+    for path in paths:
+        try:
+            path_stat = path.stat()
+        except OSError:
+            continue
+        result[path] = (path_stat.st_mtime_ns, path_stat.st_size)
+        if not stat.S_ISDIR(path_stat.st_mode):
+            continue
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    entry_stat = entry.stat()
+                    result[pathlib.Path(entry.path)] = (
+                        entry_stat.st_mtime_ns,
+                        entry_stat.st_size,
+                    )
+            except OSError:
+                continue
+    return result
+
+
+def changed_paths(before: Snapshot, after: Snapshot) -> set[pathlib.Path]:
+    return {
+        path
+        for path in before.keys() | after.keys()
+        if before.get(path) != after.get(path)
+    }
+
+
+def poll(
+    paths: Iterable[pathlib.Path],
+    interval: float = DEFAULT_INTERVAL,
+    debounce: float = DEFAULT_DEBOUNCE,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Iterator[set[pathlib.Path]]:
+    """Watch `paths` for changes, forever.
+
+    Polls with `stat` every `interval` seconds rather than relying on a platform's file
+    notifications. A burst of changes, like an editor's save or a `git checkout`, is
+    yielded as one set of changed paths once nothing has changed for `debounce` seconds.
+    """
+    paths = list(paths)
+    previous = snapshot(paths)
+    pending: set[pathlib.Path] = set()
+    last_change = clock()
+    while True:
+        sleep(interval)
+        current = snapshot(paths)
+        if changed := changed_paths(previous, current):
+            pending |= changed
+            last_change = clock()
+        previous = current
+        if pending and clock() - last_change >= debounce:
+            yield pending
+            pending = set()
@@ -0,0 +1,124 @@
+import httpx
+import pytest
+
+from action_tools.cache import ResponseCache
+from action_tools.github import Client
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    with ResponseCache(tmp_path / "cache", ttl=60, clock=clock) as cache:
+        yield cache
+
+
+@pytest.fixture
+def github_client(cache):
+    with Client(
+        base_url="https://www.example.com", token="fake-token", cache=cache
+    ) as client:
+        yield client
+
+
+CONTENTS_URL = "https://www.example.com/repos/testorg/testrepo/contents"
+
+
+def test_conditional_request_served_from_cache(github_client, cache, respx_mock):
+    route = respx_mock.get(CONTENTS_URL).mock(
+        side_effect=[
+            httpx.Response(
+                200, json=[{"name": "README.md"}], headers={"etag": '"abc"'}
+            ),
+            httpx.Response(304),
+        ]
+    )
+
+    assert github_client.get_repo_contents("testorg", "testrepo") == [
+        {"name": "README.md"}
+    ]
+    assert "If-None-Match" not in route.calls[0].request.headers
+
+    assert github_client.get_repo_contents("testorg", "testrepo") == [
+        {"name": "README.md"}
+    ]
+    assert route.calls[1].request.headers["If-None-Match"] == '"abc"'
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "bytes": 22}
+
+
+def test_changed_response_replaces_entry(github_client, cache, respx_mock):
+    respx_mock.get(CONTENTS_URL).mock(
+        side_effect=[
+            httpx.Response(200, json=[{"name": "a"}], headers={"etag": '"v1"'}),
+            httpx.Response(200, json=[{"name": "b"}], headers={"etag": '"v2"'}),
+            httpx.Response(304),
+        ]
+    )
+
+    github_client.get_repo_contents("testorg", "testrepo")
+    assert github_client.get_repo_contents("testorg", "testrepo") == [{"name": "b"}]
+    assert github_client.get_repo_contents("testorg", "testrepo") == [{"name": "b"}]
+
+
+def test_responses_without_validators_are_not_stored(github_client, cache, respx_mock):
+    route = respx_mock.get(CONTENTS_URL).respond(200, json=[])
+
+    github_client.get_repo_contents("testorg", "testrepo")
+    github_client.get_repo_contents("testorg", "testrepo")
+    assert "If-None-Match" not in route.calls.last.request.headers
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_not_revalidated(github_client, cache, clock, respx_mock):
+    route = respx_mock.get(CONTENTS_URL).respond(
+        200, json=[], headers={"last-modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+    )
+
+    github_client.get_repo_contents("testorg", "testrepo")
+    clock.now += 61
+    github_client.get_repo_contents("testorg", "testrepo")
+    assert "If-Modified-Since" not in route.calls.last.request.headers
+
+
+def test_evicts_least_recently_used_over_max_size(tmp_path, clock):
+    with ResponseCache(tmp_path, max_size=25, clock=clock) as cache:
+        for n in range(3):
+            clock.now += 1
+            request = httpx.Request("GET", f"https://www.example.com/{n}")
+            response = httpx.Response(
+                200, content=b"x" * 10, headers={"etag": str(n)}, request=request
+            )
+            cache.resolve(cache.key(request), None, response)
+
+        keys = [
+            cache.key(httpx.Request("GET", f"https://www.example.com/{n}"))
+            for n in range(3)
+        ]
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[1]) is not None
+        assert cache.get(keys[2]) is not None
+
+
+def test_blobs_are_served_without_a_request(github_client, cache, respx_mock):
+    route = respx_mock.get(
+        "https://www.example.com/repos/testorg/testrepo/git/blobs/abc123"
+    ).respond(200, content=b"on: push\n")
+
+    assert github_client.get_blob("testorg", "testrepo", "abc123") == b"on: push\n"
+    # the same blob in another repository, e.g. a fork
+    assert github_client.get_blob("other", "fork", "abc123") == b"on: push\n"
+
+    assert route.call_count == 1
+    assert cache.stats()["blob_hits"] == 1
+
+
+def test_evicts_least_recently_used_blobs_over_max_size(tmp_path, clock):
+    with ResponseCache(tmp_path, max_size=25, clock=clock) as cache:
+        for sha in ("a", "b", "c"):
+            clock.now += 1
+            cache.put_blob(sha, b"x" * 10)
+            if sha == "b":
+                clock.now += 1
+                cache.get_blob("a")
+
+        assert cache.get_blob("a") is not None
+        assert cache.get_blob("b") is None
+        assert cache.get_blob("c") is not None
@@ -0,0 +1,76 @@
+import importlib
+import subprocess
+import sys
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from action_tools.cli import SUBCOMMANDS, main
+
+HEAVY_MODULES = {"httpx", "jinja2", "pydantic", "ruamel"}
+
+# Import cost of action_tools.cli on top of click itself. Importing every subcommand
+# eagerly cost ~200ms, so this catches any heavy import creeping back in.
+IMPORT_BUDGET_MS = 60
+
+
+def run_cli(*args: str) -> tuple[set[str], dict[str, int]]:
+    """Run the CLI in a fresh interpreter, returning the modules it imported and the
+    cumulative import time (µs) of each module imported with an import statement"""
+    code = f"""
+import sys
+from action_tools.cli import main
+main({list(args)!r}, standalone_mode=False)
+print(*sys.modules, file=sys.stderr)
+"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    *lines, modules = result.stderr.splitlines()
+    times = {}
+    for line in lines:
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return set(modules.split()), times
+
+
+@pytest.mark.parametrize("name", SUBCOMMANDS)
+def test_stored_short_help_matches_command(name):
+    module_name, help = SUBCOMMANDS[name]
+    command = getattr(importlib.import_module(module_name), name)
+
+    for limit in (45, 200):
+        stored = click.Command(name, help=help).get_short_help_str(limit)
+        assert stored == command.get_short_help_str(limit)
+
+
+def test_help_matches_eager_group():
+    eager = click.Group(name="main", help=main.help, params=main.params)
+    for name, (module_name, _) in SUBCOMMANDS.items():
+        eager.add_command(getattr(importlib.import_module(module_name), name))
+
+    expected = CliRunner().invoke(eager, ["--help"])
+    result = CliRunner().invoke(main, ["--help"])
+
+    assert result.output == expected.output
+
+
+def test_help_imports_no_subcommands():
+    modules, times = run_cli("--help")
+
+    assert not {name.split(".")[0] for name in modules} & HEAVY_MODULES
+    assert not {f"action_tools.{name}" for name in SUBCOMMANDS} & modules
+    own_ms = (times["action_tools.cli"] - times["click"]) / 1000
+    assert own_ms < IMPORT_BUDGET_MS
+
+
+def test_gendocs_help_imports_no_heavy_modules():
+    modules, _ = run_cli("gendocs", "all", "--help")
+
+    assert "action_tools.gendocs" in modules
+    assert not {name.split(".")[0] for name in modules} & HEAVY_MODULES
@@ -2,8 +2,28 @@ import pathlib
 import shutil
 
 import pytest
+from click.testing import CliRunner
+from pydantic import ValidationError
 
-from action_tools.gendocs import generate_action_docs, get_action_path
+import action_tools.gendocs
+from action_tools import stats
+from action_tools.gendocs import (
+    TEMPLATE_NAME,
+    TEMPLATES_DIR,
+    DocsManifest,
+    compile_templates,
+    find_actions,
+    find_all_docs,
+    gendocs,
+    generate_action_docs,
+    generate_all_docs,
+    get_action_path,
+    get_environment,
+    load_template,
+    reload_templates,
+    render_all_docs,
+    watch_docs,
+)
 
 
 @pytest.fixture
@@ -98,3 +118,287 @@ def test_generate_action_docs_basic(tmp_path, mocker):
     expected_content = pathlib.Path("tests/__fixtures__/EXPECTED.md").read_text()
     actual_content = output_path.read_text()
     assert expected_content == actual_content
+
+
+@pytest.fixture
+def actions_monorepo(_base_git_repo):
+    fixture = pathlib.Path("tests/__fixtures__/action.yml")
+    for subdir in ["hello", "nested/hello", "node_modules/dep"]:
+        (_base_git_repo / subdir).mkdir(parents=True)
+        shutil.copy(fixture, _base_git_repo / subdir)
+    (_base_git_repo / "nested" / "broken").mkdir()
+    (_base_git_repo / "nested" / "broken" / "action.yaml").write_text("name: Broken\n")
+    return _base_git_repo
+
+
+def test_find_actions(actions_monorepo):
+    assert find_actions(actions_monorepo) == [
+        actions_monorepo / "hello" / "action.yml",
+        actions_monorepo / "nested" / "broken" / "action.yaml",
+        actions_monorepo / "nested" / "hello" / "action.yml",
+    ]
+
+
+def test_generate_all_docs_resolves_remote_once(actions_monorepo, mocker):
+    list_git_remotes = mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+
+    results = generate_all_docs(actions_monorepo / "nested", jobs=2)
+
+    list_git_remotes.assert_called_once_with(actions_monorepo.resolve())
+    assert results[actions_monorepo / "nested" / "hello" / "action.yml"] is True
+    assert isinstance(
+        results[actions_monorepo / "nested" / "broken" / "action.yaml"], Exception
+    )
+    readme = (actions_monorepo / "nested" / "hello" / "README.md").read_text()
+    assert "- uses: org/repo/nested/hello" in readme
+    assert not (actions_monorepo / "hello" / "README.md").exists()
+
+
+def test_render_all_docs_in_processes_matches_serial(actions_monorepo, mocker):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    docs = find_all_docs(actions_monorepo)
+
+    serial = render_all_docs(docs, jobs=1)
+    parallel = render_all_docs(docs, jobs=3)
+
+    assert [type(output) for output in parallel] == [bytes, ValidationError, bytes]
+    assert [output for output in parallel if isinstance(output, bytes)] == [
+        output for output in serial if isinstance(output, bytes)
+    ]
+
+
+@pytest.mark.parametrize(("jobs", "render_spans"), [(1, 3), (3, 0)])
+def test_generate_all_docs_spans(actions_monorepo, mocker, jobs, render_spans):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    recorder = stats.Recorder()
+    with stats.recording(recorder), stats.span("gendocs") as outer:
+        generate_all_docs(actions_monorepo, jobs=jobs)
+
+    spans = {span.span_id: span for span in recorder.spans}
+    (render_all,) = [span for span in spans.values() if span.name == "render_all_docs"]
+    assert render_all.parent_id == outer.span_id
+    assert render_all.attributes == {"actions": 3, "jobs": jobs}
+    renders = [span for span in spans.values() if span.name == "render_docs"]
+    assert len(renders) == render_spans
+    assert all(span.parent_id == render_all.span_id for span in renders)
+
+
+def test_generate_all_docs_only_renders_stale_readmes(
+    actions_monorepo, tmp_path, mocker
+):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    render = mocker.spy(action_tools.gendocs, "render_all_docs")
+    hello = actions_monorepo / "hello" / "action.yml"
+    with DocsManifest(tmp_path / "manifest.json") as manifest:
+        generate_all_docs(actions_monorepo, manifest=manifest)
+        (hello.parent / "README.md").write_text("hand edited")
+
+        results = generate_all_docs(actions_monorepo, manifest=manifest)
+
+    assert [doc.input_path for doc in render.call_args.args[0]] == [
+        hello,
+        actions_monorepo / "nested" / "broken" / "action.yaml",
+    ]
+    assert results[hello] is True
+    assert results[actions_monorepo / "nested" / "hello" / "action.yml"] is False
+
+
+def test_gendocs_all_matches_gendocs_action(actions_monorepo, mocker):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    (actions_monorepo / "nested" / "broken" / "action.yaml").unlink()
+    expected = actions_monorepo / "EXPECTED.md"
+    generate_action_docs(actions_monorepo / "hello" / "action.yml", expected)
+
+    result = CliRunner().invoke(gendocs, ["all", str(actions_monorepo), "--no-cache"])
+
+    assert result.exit_code == 0, result.output
+    assert len(result.output.splitlines()) == 2
+    readme = actions_monorepo / "hello" / "README.md"
+    assert readme.read_text() == expected.read_text()
+
+
+def test_gendocs_all_reports_failures(actions_monorepo, mocker):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+
+    result = CliRunner().invoke(gendocs, ["all", str(actions_monorepo), "--no-cache"])
+
+    assert result.exit_code == 1
+    assert "broken/action.yaml" in result.output
+    assert "1 of 3 actions failed" in result.output
+
+
+@pytest.fixture
+def generate_hello(actions_monorepo, tmp_path, mocker):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    render = mocker.spy(action_tools.gendocs, "render_action_docs")
+    input_path = actions_monorepo / "hello" / "action.yml"
+    output_path = actions_monorepo / "hello" / "README.md"
+
+    def generate(**kwargs):
+        with DocsManifest(tmp_path / "manifest.json") as manifest:
+            return generate_action_docs(
+                input_path, output_path, manifest=manifest, **kwargs
+            )
+
+    generate.render = render
+    generate.input_path = input_path
+    generate.output_path = output_path
+    return generate
+
+
+def test_generate_action_docs_skips_unchanged(generate_hello):
+    assert generate_hello() is True
+    mtime = generate_hello.output_path.stat().st_mtime_ns
+
+    assert generate_hello() is False
+    assert generate_hello.render.call_count == 1
+    assert generate_hello.output_path.stat().st_mtime_ns == mtime
+
+
+def test_generate_action_docs_rerenders_changed_inputs(generate_hello):
+    generate_hello()
+    with generate_hello.input_path.open("a") as f:
+        f.write("# trailing comment\n")
+
+    # re-rendered, but the output is the same so it isn't rewritten
+    assert generate_hello() is False
+    assert generate_hello.render.call_count == 2
+
+
+def test_generate_action_docs_check(generate_hello):
+    assert generate_hello(check=True) is True
+    assert not generate_hello.output_path.exists()
+
+    generate_hello()
+    assert generate_hello(check=True) is False
+
+    generate_hello.output_path.write_text("hand edited")
+    assert generate_hello(check=True) is True
+    assert generate_hello.output_path.read_text() == "hand edited"
+
+
+def test_gendocs_all_check(actions_monorepo, tmp_path, mocker):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    (actions_monorepo / "nested" / "broken" / "action.yaml").unlink()
+    args = ["all", str(actions_monorepo), "--cache-dir", str(tmp_path / "cache")]
+
+    result = CliRunner().invoke(gendocs, [*args, "--check"])
+    assert result.exit_code == 1
+    assert "2 of 2 READMEs are out of date" in result.output
+
+    assert CliRunner().invoke(gendocs, args).exit_code == 0
+    result = CliRunner().invoke(gendocs, [*args, "--check"])
+    assert result.exit_code == 0, result.output
+    assert result.output == ""
+
+
+class WatchStopped(Exception):
+    pass
+
+
+def test_watch_docs_regenerates_affected_readmes(actions_monorepo, clock, mocker):
+    mocker.patch(
+        "action_tools.gendocs.list_git_remotes",
+        return_value="origin\tgit@github.com:org/repo.git (fetch)\n",
+    )
+    (actions_monorepo / "nested" / "broken" / "action.yaml").unlink()
+    examples = actions_monorepo / "hello" / "usage-examples"
+    examples.mkdir()
+    docs = find_all_docs(actions_monorepo, "usage-examples")
+    hello = actions_monorepo / "hello"
+    load_action = mocker.spy(action_tools.gendocs, "load_action")
+
+    def edit_description():
+        action = (hello / "action.yml").read_text()
+        (hello / "action.yml").write_text(action.replace("Minimal", "Edited"))
+
+    steps = [
+        edit_description,
+        lambda: (examples / "basic.md").write_text("An example"),
+        lambda: None,
+        lambda: None,
+    ]
+
+    def sleep(seconds):
+        clock.now += seconds
+        if not steps:
+            raise WatchStopped
+        steps.pop(0)()
+
+    messages = []
+    with pytest.raises(WatchStopped):
+        watch_docs(
+            docs,
+            echo=lambda message, **kwargs: messages.append(message),
+            interval=0.2,
+            debounce=0.3,
+            clock=clock,
+            sleep=sleep,
+        )
+
+    assert len(messages) == 1
+    assert messages[0].startswith(f"{hello / 'README.md'} updated in ")
+    load_action.assert_called_once_with(hello / "action.yml")
+    readme = (hello / "README.md").read_text()
+    assert "Edited GitHub Action" in readme
+    assert "An example" in readme
+    assert not (actions_monorepo / "nested" / "hello" / "README.md").exists()
+
+
+def test_load_template_is_cached():
+    assert load_template() is load_template()
+
+
+@pytest.fixture
+def compiled_templates_dir(tmp_path, mocker):
+    compiled = tmp_path / "compiled"
+    compile_templates(compiled)
+    mocker.patch("action_tools.gendocs.COMPILED_TEMPLATES_DIR", compiled)
+    reload_templates()
+    yield compiled
+    mocker.stopall()
+    reload_templates()
+
+
+def test_load_template_uses_compiled_templates(compiled_templates_dir, mocker):
+    parse = mocker.spy(get_environment(), "_parse")
+
+    template = load_template()
+
+    parse.assert_not_called()
+    assert template.filename.startswith(str(compiled_templates_dir))
+    context = {"name": "Name", "description": "Description", "inputs": {}}
+    source = (TEMPLATES_DIR / TEMPLATE_NAME).read_text()
+    expected = get_environment().from_string(source)
+    assert template.render(**context) == expected.render(**context)
+
+
+def test_load_template_skips_stale_compiled_templates(compiled_templates_dir):
+    (compiled_templates_dir / "digests.json").write_text('{"other": "digest"}')
+    reload_templates()
+
+    assert not load_template().filename.startswith(str(compiled_templates_dir))
@@ -1,6 +1,17 @@
+import asyncio
+import json
+
+import httpx
 import pytest
 
-from action_tools.github import Client, ClientStatusError
+from action_tools.github import (
+    RAW_MEDIA_TYPE,
+    TEXT_MATCH_MEDIA_TYPE,
+    AsyncClient,
+    Client,
+    ClientStatusError,
+    GraphQLError,
+)
 
 
 @pytest.fixture
@@ -8,6 +19,16 @@ def github_client():
     return Client(base_url="https://www.example.com", token="fake-token")
 
 
+@pytest.fixture
+def async_github_client():
+    return AsyncClient(base_url="https://www.example.com", token="fake-token")
+
+
+def search_link_header(query_string: str, next_page: int, last_page: int) -> str:
+    url = "https://www.example.com/search/code?" + query_string
+    return f'<{url}&page={next_page}>; rel="next", <{url}&page={last_page}>; rel="last"'
+
+
 def test_get_repo_contents_success(github_client, respx_mock):
     mock_url = f"{github_client.base_url}/repos/testorg/testrepo/contents"
     respx_mock.get(mock_url).respond(200, json=[{"name": "README.md"}])
@@ -62,6 +83,62 @@ def test_search_code_pagination(github_client, respx_mock):
     assert results[-1]["name"] == "file200.py"
 
 
+def test_iter_search_code_fetches_pages_lazily(github_client, respx_mock):
+    query = "test"
+    url = f"{github_client.base_url}/search/code"
+    next_link = '<https://www.example.com/search/code?q=test&page=2>; rel="next"'
+    second_page = respx_mock.get(url, params={"q": query, "page": "2"}).respond(
+        200, json={"items": [{"name": "page2"}]}
+    )
+    respx_mock.get(url, params={"q": query}).respond(
+        200, json={"items": [{"name": "page1"}]}, headers={"link": next_link}
+    )
+
+    results = github_client.iter_search_code(query)
+    assert next(results) == {"name": "page1"}
+    assert second_page.call_count == 0
+    assert list(results) == [{"name": "page2"}]
+    assert second_page.call_count == 1
+
+
+def test_iter_search_code_pages_requests_text_matches(github_client, respx_mock):
+    route = respx_mock.get(f"{github_client.base_url}/search/code").respond(
+        200, json={"items": []}
+    )
+
+    list(github_client.iter_search_code_pages("test", text_match=True))
+    list(github_client.iter_search_code_pages("test"))
+
+    accepts = [call.request.headers["accept"] for call in route.calls]
+    assert accepts == [TEXT_MATCH_MEDIA_TYPE, "application/vnd.github+json"]
+
+
+def test_get_file_returns_raw_contents(github_client, respx_mock):
+    route = respx_mock.get(
+        f"{github_client.base_url}/repos/org/repo/contents/.github/workflows/ci.yml"
+    ).respond(200, text="on: push\n")
+
+    assert github_client.get_file("org", "repo", ".github/workflows/ci.yml") == (
+        "on: push\n"
+    )
+    assert route.calls[0].request.headers["accept"] == RAW_MEDIA_TYPE
+
+
+def test_iter_tags_follows_pages(github_client, respx_mock):
+    url = f"{github_client.base_url}/repos/org/repo/tags"
+    respx_mock.get(url, params={"page": "2"}).respond(200, json=[{"name": "v1"}])
+    respx_mock.get(url).respond(
+        200,
+        json=[{"name": "v2"}],
+        headers={"link": f'<{url}?per_page=100&page=2>; rel="next"'},
+    )
+
+    assert [tag["name"] for tag in github_client.iter_tags("org", "repo")] == [
+        "v2",
+        "v1",
+    ]
+
+
 def test_search_code_empty_results(github_client, respx_mock):
     query = "nonexistent"
     mock_url = f"{github_client.base_url}/search/code"
@@ -69,3 +146,188 @@ def test_search_code_empty_results(github_client, respx_mock):
 
     results = github_client.search_code(query)
     assert results == []
+
+
+def test_client_reuses_pooled_session(github_client, respx_mock):
+    mock_url = f"{github_client.base_url}/repos/testorg/testrepo/contents"
+    route = respx_mock.get(mock_url).respond(200, json=[{"name": "README.md"}])
+    session = github_client._session
+
+    github_client.get_repo_contents("testorg", "testrepo")
+    github_client.get_repo_contents("testorg", "testrepo")
+
+    assert route.call_count == 2
+    assert github_client._session is session
+    assert not session.is_closed
+    assert route.calls.last.request.headers["Authorization"] == "Bearer fake-token"
+
+
+def test_client_context_manager_closes_session():
+    with Client(token="fake-token") as client:
+        assert not client._session.is_closed
+    assert client._session.is_closed
+
+
+# ---------- AsyncClient ----------
+
+
+def test_async_get_repo_contents_success(async_github_client, respx_mock):
+    mock_url = f"{async_github_client.base_url}/repos/testorg/testrepo/contents"
+    respx_mock.get(mock_url).respond(200, json=[{"name": "README.md"}])
+
+    result = asyncio.run(async_github_client.get_repo_contents("testorg", "testrepo"))
+    assert result[0]["name"] == "README.md"
+
+
+def test_async_get_repo_contents_not_found(async_github_client, respx_mock):
+    mock_url = f"{async_github_client.base_url}/repos/testorg/testrepo/contents"
+    respx_mock.get(mock_url).respond(404, json={"message": "Not Found"})
+
+    with pytest.raises(ClientStatusError) as exc_info:
+        asyncio.run(async_github_client.get_repo_contents("testorg", "testrepo"))
+    assert exc_info.value.status_code == 404
+
+
+def test_async_search_code_fetches_remaining_pages_from_last_link(
+    async_github_client, respx_mock
+):
+    query = "test"
+    url = f"{async_github_client.base_url}/search/code"
+    for page in (3, 2):
+        respx_mock.get(url, params={"q": query, "page": str(page)}).respond(
+            200,
+            json={"items": [{"name": f"page{page}-{n}"} for n in range(2)]},
+        )
+    first_page = respx_mock.get(url, params={"q": query}).respond(
+        200,
+        json={"items": [{"name": f"page1-{n}"} for n in range(2)]},
+        headers={"link": search_link_header("q=test&per_page=100", 2, 3)},
+    )
+
+    results = asyncio.run(async_github_client.search_code(query))
+    assert [item["name"] for item in results] == [
+        "page1-0",
+        "page1-1",
+        "page2-0",
+        "page2-1",
+        "page3-0",
+        "page3-1",
+    ]
+    assert first_page.call_count == 1
+    assert len(respx_mock.calls) == 3
+
+
+def test_async_search_code_respects_max_pages(async_github_client, respx_mock):
+    query = "test"
+    url = f"{async_github_client.base_url}/search/code"
+    later_pages = respx_mock.get(url, params={"q": query, "page": "2"}).respond(
+        200, json={"items": [{"name": "page2"}]}
+    )
+    respx_mock.get(url, params={"q": query}).respond(
+        200,
+        json={"items": [{"name": "page1"}]},
+        headers={"link": search_link_header("q=test&per_page=100", 2, 10)},
+    )
+
+    results = asyncio.run(async_github_client.search_code(query, max_pages=2))
+    assert [item["name"] for item in results] == ["page1", "page2"]
+    assert later_pages.call_count == 1
+
+
+def test_async_search_code_follows_next_without_last(async_github_client, respx_mock):
+    query = "test"
+    url = f"{async_github_client.base_url}/search/code"
+    next_link = '<https://www.example.com/search/code?q=test&page=2>; rel="next"'
+    respx_mock.get(url, params={"q": query, "page": "2"}).respond(
+        200, json={"items": [{"name": "page2"}]}
+    )
+    respx_mock.get(url, params={"q": query}).respond(
+        200, json={"items": [{"name": "page1"}]}, headers={"link": next_link}
+    )
+
+    results = asyncio.run(async_github_client.search_code(query))
+    assert [item["name"] for item in results] == ["page1", "page2"]
+
+
+def test_client_retries_rate_limited_requests(github_client, respx_mock, mocker):
+    sleep = mocker.patch("action_tools.github.time.sleep")
+    mock_url = f"{github_client.base_url}/search/code"
+    respx_mock.get(mock_url).mock(
+        side_effect=[
+            httpx.Response(429, headers={"retry-after": "3"}),
+            httpx.Response(200, json={"items": [{"name": "file1.py"}]}),
+        ]
+    )
+
+    results = github_client.search_code("test")
+    assert results == [{"name": "file1.py"}]
+    sleep.assert_called_once_with(3.0)
+    assert github_client.scheduler.state()["retries"] == 1
+
+
+def graphql_objects(request: httpx.Request, found: dict) -> httpx.Response:
+    """Answer an objects query from `found`, keyed by (owner, name, expression)"""
+    variables = json.loads(request.content)["variables"]
+    data, errors = {}, []
+    for i in range(len(variables) // 3):
+        owner, name = variables[f"owner{i}"], variables[f"name{i}"]
+        key = (owner, name, variables[f"expr{i}"])
+        if not any(lookup[:2] == (owner, name) for lookup in found):
+            data[f"r{i}"] = None
+            errors.append({"type": "NOT_FOUND", "message": f"no {owner}/{name}"})
+        else:
+            data[f"r{i}"] = {"object": found.get(key)}
+    return httpx.Response(200, json={"data": data, "errors": errors or None})
+
+
+def test_get_objects_aliases_lookups_into_batched_queries(github_client, respx_mock):
+    found = {
+        ("org", "repo", "HEAD:.github/workflows/ci.yml"): {"__typename": "Blob"},
+        ("org", "repo", "HEAD:"): {
+            "__typename": "Tree",
+            "entries": [{"name": "action.yml"}],
+        },
+    }
+    route = respx_mock.post(f"{github_client.base_url}/graphql").mock(
+        side_effect=lambda request: graphql_objects(request, found)
+    )
+    lookups = [
+        ("org", "repo", "HEAD:.github/workflows/ci.yml"),
+        ("org", "repo", "HEAD:nope"),
+        ("org", "missing", "HEAD:"),
+        ("org", "repo", "HEAD:"),
+    ]
+
+    objects = github_client.get_objects(lookups, batch_size=3)
+
+    assert objects == [found[lookups[0]], None, None, found[lookups[3]]]
+    assert route.call_count == 2
+    query = json.loads(route.calls[0].request.content)["query"]
+    assert "r2: repository(owner: $owner2, name: $name2)" in query
+
+
+def test_graphql_raises_errors_other_than_not_found(github_client, respx_mock):
+    respx_mock.post(f"{github_client.base_url}/graphql").respond(
+        200,
+        json={
+            "data": None,
+            "errors": [{"type": "RATE_LIMITED", "message": "slow down"}],
+        },
+    )
+
+    with pytest.raises(GraphQLError, match="slow down") as exc_info:
+        github_client.get_objects([("org", "repo", "HEAD:")])
+    assert exc_info.value.errors[0]["type"] == "RATE_LIMITED"
+
+
+def test_async_get_objects(async_github_client, respx_mock):
+    found = {("org", "repo", "HEAD:"): {"__typename": "Tree", "entries": []}}
+    route = respx_mock.post(f"{async_github_client.base_url}/graphql").mock(
+        side_effect=lambda request: graphql_objects(request, found)
+    )
+    lookups = [("org", "repo", "HEAD:"), ("org", "other", "HEAD:")] * 3
+
+    objects = asyncio.run(async_github_client.get_objects(lookups, batch_size=2))
+
+    assert objects == [found[lookups[0]], None] * 3
+    assert route.call_count == 3
@@ -0,0 +1,107 @@
+import subprocess
+
+import pytest
+
+from action_tools import gitmeta
+from action_tools.gendocs import list_git_remotes
+
+
+def git(*args, cwd):
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    path = tmp_path / "checkout"
+    path.mkdir()
+    git("init", "-q", cwd=path)
+    git("remote", "add", "upstream", "https://github.com/org/upstream.git", cwd=path)
+    git("remote", "add", "origin", "git@github.com:me/fork.git", cwd=path)
+    git("remote", "set-url", "--add", "--push", "origin", "git@example.com:b", cwd=path)
+    git("commit", "-q", "--allow-empty", "-m", "initial", cwd=path)
+    return path
+
+
+def test_reads_checkout_remotes_like_git(checkout):
+    assert gitmeta.format_remotes(gitmeta.read_remotes(checkout)) == git(
+        "remote", "-v", cwd=checkout
+    )
+
+
+def test_reads_worktree_remotes(checkout, tmp_path):
+    worktree = tmp_path / "worktree"
+    git("worktree", "add", "-q", str(worktree), cwd=checkout)
+
+    assert (worktree / ".git").is_file()
+    assert gitmeta.format_remotes(gitmeta.read_remotes(worktree)) == git(
+        "remote", "-v", cwd=checkout
+    )
+
+
+def test_reads_bare_remotes(checkout, tmp_path):
+    bare = tmp_path / "bare.git"
+    git("clone", "-q", "--mirror", str(checkout), str(bare), cwd=tmp_path)
+
+    assert gitmeta.format_remotes(gitmeta.read_remotes(bare)) == git(
+        "remote", "-v", cwd=bare
+    )
+
+
+def test_list_git_remotes_does_not_spawn_git(checkout, mocker):
+    run = mocker.spy(subprocess, "run")
+
+    assert "origin\tgit@github.com:me/fork.git (fetch)" in list_git_remotes(checkout)
+    run.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        '[include]\n\tpath = other.config\n[remote "origin"]\n\turl = a\n',
+        '[url "git@github.com:"]\n\tinsteadOf = gh:\n[remote "origin"]\n\turl = gh:o/r\n',
+        '[remote "origin"]\n\turl = "quoted"\n',
+        "[remote.origin]\n\turl = a\n",
+    ],
+)
+def test_exotic_config_falls_back_to_git(tmp_path, mocker, config):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "config").write_text(config)
+    run = mocker.patch(
+        "subprocess.run",
+        return_value=subprocess.CompletedProcess([], 0, stdout="from git\n"),
+    )
+
+    assert gitmeta.read_remotes(tmp_path) is None
+    assert list_git_remotes(tmp_path) == "from git\n"
+    run.assert_called_once()
+
+
+def test_parse_remotes():
+    config = """\
+# comment
+[core]
+\tbare = false
+[Remote "origin"] url = git@github.com:org/repo.git ; trailing comment
+\tfetch = +refs/heads/*:refs/remotes/origin/*
+[remote "no-url"]
+\tfetch = +refs/heads/*:refs/remotes/no-url/*
+"""
+    assert gitmeta.parse_remotes(config) == {
+        "origin": {"url": ["git@github.com:org/repo.git"], "pushurl": []}
+    }
+
+
+def test_find_git_root_is_memoized(tmp_path):
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    (tmp_path / ".git").mkdir()
+
+    assert gitmeta.find_git_root(nested) == tmp_path
+    (tmp_path / ".git").rmdir()
+    assert gitmeta.find_git_root(nested / "..") == tmp_path
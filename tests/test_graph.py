@@ -0,0 +1,122 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from action_tools.graph import Dependent, UsageGraph, file_target
+from action_tools.index import UsageIndex
+from action_tools.usage import usage
+
+BUILD = "org/shared/.github/workflows/build.yml"
+
+
+@pytest.fixture
+def graph():
+    graph = UsageGraph()
+    # leaf action <- composite action <- reusable workflow <- consumers
+    graph.add_file("org/composite", "action.yml", ["org/leaf@v1", "actions/checkout"])
+    graph.add_file("org/shared", ".github/workflows/build.yml", ["org/composite@v2"])
+    graph.add_file("app/one", ".github/workflows/ci.yml", [f"{BUILD}@v1"])
+    graph.add_file("app/two", ".github/workflows/ci.yml", [BUILD, "org/leaf"])
+    graph.add_file("app/two", "deploy/action.yaml", ["org/composite"])
+    return graph
+
+
+@pytest.mark.parametrize(
+    ("repo", "path", "expected"),
+    [
+        ("Org/Repo", ".github/workflows/ci.yml", "org/repo/.github/workflows/ci.yml"),
+        ("org/repo", "action.yml", "org/repo"),
+        ("org/repo", "some/dir/action.yaml", "org/repo/some/dir"),
+    ],
+)
+def test_file_target(repo, path, expected):
+    assert file_target(repo, path) == expected
+
+
+def test_dependents_follow_uses_edges_transitively(graph):
+    assert graph.dependents("org/leaf@v1") == [
+        Dependent("app/two", ".github/workflows/ci.yml", 1),
+        Dependent("org/composite", "action.yml", 1),
+        Dependent("app/two", "deploy/action.yaml", 2),
+        Dependent("org/shared", ".github/workflows/build.yml", 2),
+        Dependent("app/one", ".github/workflows/ci.yml", 3),
+    ]
+    assert graph.find_usage("Org/Leaf") == [
+        "app/one",
+        "app/two",
+        "org/composite",
+        "org/shared",
+    ]
+    assert graph.find_usage(BUILD) == ["app/one", "app/two"]
+    assert graph.find_usage("nobody/uses-this") == []
+
+
+def test_dependents_terminate_on_cycles():
+    graph = UsageGraph()
+    graph.add_file("org/a", "action.yml", ["org/b"])
+    graph.add_file("org/b", "action.yml", ["org/a"])
+
+    assert graph.dependents("org/a") == [Dependent("org/b", "action.yml", 1)]
+
+
+def test_queries_are_memoized_until_the_graph_changes(graph, mocker):
+    bfs = mocker.spy(graph, "_bfs")
+    first = graph.dependents("org/leaf")
+    assert graph.dependents("org/leaf") == first
+    assert len(graph._dependents) == 1
+
+    graph.add_file("app/three", "action.yml", ["org/leaf"])
+
+    assert "app/three" in graph.find_usage("org/leaf")
+    assert bfs.call_count == 2
+
+
+def test_add_content():
+    graph = UsageGraph()
+    graph.add_content(
+        "app/one",
+        ".github/workflows/ci.yml",
+        b"jobs:\n  build:\n    uses: org/shared/.github/workflows/build.yml@v1\n",
+    )
+
+    assert graph.find_usage(BUILD) == ["app/one"]
+    assert graph.edges == 1
+
+
+def test_usage_transitive_from_index(tmp_path):
+    index_path = tmp_path / "index.sqlite3"
+    with UsageIndex(index_path) as usage_index:
+        usage_index._db.executemany(
+            "INSERT INTO refs VALUES (?, ?, ?, 'v1')",
+            [
+                ("org/leaf", "org/shared", ".github/workflows/build.yml"),
+                (BUILD, "app/one", ".github/workflows/ci.yml"),
+            ],
+        )
+        usage_index._db.commit()
+
+    direct = CliRunner().invoke(usage, ["org/leaf", "--index", str(index_path)])
+    assert direct.output == "org/shared\n"
+
+    transitive = CliRunner().invoke(
+        usage,
+        ["--targets-file", "-", "--index", str(index_path), "--transitive"],
+        input="org/leaf\n",
+    )
+    assert transitive.exit_code == 0
+    assert json.loads(transitive.output) == {
+        "target": "org/leaf",
+        "repos": ["app/one", "org/shared"],
+        "dependents": [
+            {"repo": "org/shared", "path": ".github/workflows/build.yml", "hops": 1},
+            {"repo": "app/one", "path": ".github/workflows/ci.yml", "hops": 2},
+        ],
+    }
+
+
+def test_usage_transitive_requires_index():
+    result = CliRunner().invoke(usage, ["org/leaf", "--transitive"])
+
+    assert result.exit_code == 2
+    assert "--transitive requires --index" in result.output
@@ -0,0 +1,190 @@
+import subprocess
+
+import pytest
+from click.testing import CliRunner
+
+from action_tools import uses as uses_module
+from action_tools.index import UsageIndex, is_indexed_path, parse_files
+from action_tools.usage import usage
+from action_tools.uses import extract_uses
+
+WORKFLOW = b"""\
+on: push
+jobs:
+  build:
+    uses: my-org/workflows/.github/workflows/build.yml@v1
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - uses: ./local-action
+      - uses: docker://alpine:3
+      - run: 'echo "uses: not-a/reference"'
+      - uses: My-Org/My-Action/sub-dir@54a43938e6d916589114e065d055a5d42c131e70
+"""
+
+COMPOSITE_ACTION = b"""\
+name: Composite
+description: Uses another action
+runs:
+  using: composite
+  steps:
+    - uses: actions/setup-python@v5
+"""
+
+
+def git(*args, cwd):
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def repos_root(tmp_path):
+    root = tmp_path / "repos"
+    checkout = root / "checkout"
+    (checkout / ".github" / "workflows").mkdir(parents=True)
+    (checkout / ".github" / "workflows" / "ci.yml").write_bytes(WORKFLOW)
+    (checkout / "nested").mkdir()
+    (checkout / "nested" / "action.yml").write_bytes(COMPOSITE_ACTION)
+    git("init", "-q", cwd=checkout)
+    git("remote", "add", "origin", "git@github.com:some-org/checkout.git", cwd=checkout)
+
+    # a bare repository, as mirrored with `git clone --mirror`
+    source = tmp_path / "source"
+    (source / ".github" / "workflows").mkdir(parents=True)
+    (source / ".github" / "workflows" / "release.yaml").write_bytes(
+        b"jobs:\n  release:\n    steps:\n      - uses: actions/checkout@v3\n"
+    )
+    git("init", "-q", cwd=source)
+    git("add", ".", cwd=source)
+    git("commit", "-q", "-m", "initial", cwd=source)
+    git("clone", "-q", "--bare", str(source), str(root / "mirror.git"), cwd=tmp_path)
+    return root
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        (".github/workflows/ci.yml", True),
+        (".github/workflows/ci.yaml", True),
+        (".github/workflows/nested/ci.yml", False),
+        ("action.yml", True),
+        ("some/dir/action.yaml", True),
+        ("docs/example.yml", False),
+    ],
+)
+def test_is_indexed_path(path, expected):
+    assert is_indexed_path(path) == expected
+
+
+def test_extract_uses_workflow():
+    assert extract_uses(WORKFLOW) == [
+        ("my-org/workflows/.github/workflows/build.yml", "v1"),
+        ("actions/checkout", "v4"),
+        ("My-Org/My-Action/sub-dir", "54a43938e6d916589114e065d055a5d42c131e70"),
+    ]
+
+
+def test_extract_uses_composite_action():
+    assert extract_uses(COMPOSITE_ACTION) == [("actions/setup-python", "v5")]
+
+
+def test_extract_uses_invalid_yaml():
+    assert extract_uses(b"jobs: [unclosed") == []
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (
+            b"jobs:\n  build:\n    steps: true\n"
+            b"  call:\n    uses: org/repo/.github/workflows/ci.yml@v1\n",
+            [("org/repo/.github/workflows/ci.yml", "v1")],
+        ),
+        (b"# uses: below\njobs:\n  build:\n    steps: 5\n", []),
+        (b"jobs:\n  build:\n    steps: {uses: actions/checkout@v4}\n", []),
+        (b"jobs: [uses: actions/checkout@v4]\n", []),
+        (b"# uses: below\nruns:\n  using: composite\n  steps: uses\n", []),
+    ],
+)
+def test_extract_uses_skips_malformed_structure(content, expected):
+    # each has a `uses:` somewhere, so it's parsed rather than skipped outright
+    assert extract_uses(content) == expected
+
+
+def test_extract_uses_skips_parsing_without_uses_key(mocker):
+    load = mocker.spy(uses_module.SAFE_YAML, "load")
+    assert extract_uses(b"name: Docs\ndescription: no references here\n") == []
+    load.assert_not_called()
+
+
+def test_parse_files_in_processes_matches_serial(tmp_path):
+    items = []
+    for n in range(10):
+        path = tmp_path / f"{n}.yml"
+        path.write_bytes(WORKFLOW if n % 2 else COMPOSITE_ACTION)
+        items.append(("org/repo", path.name, str(path)))
+    items.append(("org/bare", "action.yml", COMPOSITE_ACTION))
+
+    serial = list(parse_files(items, jobs=1))
+    assert list(parse_files(items, jobs=2, batch_size=3)) == serial
+    assert serial[-1] == ("org/bare", "action.yml", [("actions/setup-python", "v5")])
+
+
+def test_index_checkouts_and_bare_repos(repos_root, tmp_path):
+    with UsageIndex(tmp_path / "index.sqlite3") as usage_index:
+        stats = usage_index.update(repos_root)
+
+        assert stats.repositories == 2
+        assert stats.parsed == 3
+        assert usage_index.find_usage("actions/checkout@v4") == [
+            "mirror",
+            "some-org/checkout",
+        ]
+        assert usage_index.query("my-org/my-action/sub-dir") == [
+            (
+                "some-org/checkout",
+                ".github/workflows/ci.yml",
+                "54a43938e6d916589114e065d055a5d42c131e70",
+            )
+        ]
+        assert usage_index.query("actions/setup-python") == [
+            ("some-org/checkout", "nested/action.yml", "v5")
+        ]
+
+
+def test_index_update_is_incremental(repos_root, tmp_path):
+    with UsageIndex(tmp_path / "index.sqlite3") as usage_index:
+        usage_index.update(repos_root)
+
+        assert usage_index.update(repos_root).parsed == 0
+
+        workflow = repos_root / "checkout" / ".github" / "workflows" / "ci.yml"
+        workflow.write_bytes(
+            b"jobs:\n  build:\n    uses: other/repo/.github/workflows/x.yml@v2\n"
+        )
+        (repos_root / "checkout" / "nested" / "action.yml").unlink()
+        stats = usage_index.update(repos_root)
+
+        assert (stats.parsed, stats.removed) == (1, 1)
+        assert usage_index.find_usage("actions/checkout") == ["mirror"]
+        assert usage_index.find_usage("actions/setup-python") == []
+        assert usage_index.find_usage("other/repo/.github/workflows/x.yml") == [
+            "some-org/checkout"
+        ]
+
+
+def test_usage_from_index(repos_root, tmp_path):
+    index_path = tmp_path / "index.sqlite3"
+    with UsageIndex(index_path) as usage_index:
+        usage_index.update(repos_root)
+
+    result = CliRunner().invoke(
+        usage, ["actions/checkout@v4", "--index", str(index_path)]
+    )
+    assert result.exit_code == 0
+    assert result.output == "mirror\nsome-org/checkout\n"
@@ -1,6 +1,6 @@
 import pytest
 
-from action_tools.models import ActionInput
+from action_tools.models import Action, ActionInput, UsesReference, Workflow
 
 
 def test_required_input_without_default_or_example():
@@ -13,3 +13,23 @@ def test_required_input_without_default_or_example():
             default=None,
             example=None,
         )
+
+
+def test_resources_are_compact_values():
+    action = Action(org="org", repo="repo", subpath="/sub")
+
+    assert not hasattr(action, "__dict__")
+    assert action == Action("org", "repo", "/sub")
+    assert action != Workflow("org", "repo", "/sub")
+    assert len({action, Action("org", "repo", "/sub")}) == 1
+    assert action.target == "org/repo/sub"
+    with pytest.raises(AttributeError):
+        action.org = "other"
+
+
+def test_uses_reference_is_a_tuple():
+    reference = UsesReference("actions/checkout", "v4")
+
+    assert reference == ("actions/checkout", "v4")
+    assert reference.target == "actions/checkout"
+    assert reference.ref == "v4"
@@ -0,0 +1,122 @@
+import httpx
+import pytest
+
+from action_tools.ratelimit import RateLimitScheduler, resource_for
+
+
+@pytest.fixture
+def scheduler(clock):
+    return RateLimitScheduler(clock=clock)
+
+
+def rate_limit_headers(limit: int, remaining: int, reset: float, resource: str):
+    return {
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(int(reset)),
+        "x-ratelimit-resource": resource,
+    }
+
+
+@pytest.mark.parametrize(
+    ("endpoint", "expected"),
+    [
+        ("/search/code", "code_search"),
+        ("/search/commits", "search"),
+        ("/repos/org/repo/contents", "core"),
+        ("/graphql", "graphql"),
+    ],
+)
+def test_resource_for(endpoint, expected):
+    assert resource_for(endpoint) == expected
+
+
+def test_reserve_unknown_budget_does_not_wait(scheduler):
+    assert scheduler.reserve("search") == 0
+
+
+def test_reserve_waits_for_reset_once_bucket_is_empty(scheduler, clock):
+    headers = rate_limit_headers(10, 2, clock.now + 30, "search")
+    scheduler.update("search", httpx.Response(200, headers=headers))
+
+    assert scheduler.reserve("search") == 0
+    assert scheduler.reserve("search") == 0
+    assert scheduler.reserve("search") == pytest.approx(31)
+    # other resources have their own budget
+    assert scheduler.reserve("core") == 0
+
+    clock.now += 31
+    assert scheduler.reserve("search") == 0
+    state = scheduler.state()
+    assert state["waits"] == 1
+    assert state["resources"]["search"]["remaining"] == 9
+
+
+def test_code_search_is_paced_by_its_own_bucket(scheduler, clock):
+    # as GitHub sends it for /search/code
+    headers = rate_limit_headers(10, 0, clock.now + 20, "code_search")
+    scheduler.update(resource_for("/search/code"), httpx.Response(200, headers=headers))
+
+    assert scheduler.reserve(resource_for("/search/code")) == pytest.approx(21)
+    assert scheduler.reserve(resource_for("/search/commits")) == 0
+
+
+def test_update_uses_callers_resource_over_header(scheduler, clock):
+    headers = rate_limit_headers(10, 0, clock.now + 20, "something_else")
+    scheduler.update("core", httpx.Response(200, headers=headers))
+
+    assert set(scheduler.buckets) == {"core"}
+    assert scheduler.reserve("core") == pytest.approx(21)
+
+
+def test_update_same_window_keeps_local_reservations(scheduler, clock):
+    reset = clock.now + 30
+    scheduler.update(
+        "search",
+        httpx.Response(200, headers=rate_limit_headers(10, 5, reset, "search")),
+    )
+    scheduler.reserve("search")
+    scheduler.reserve("search")
+    # a response for a request sent before the reservations above
+    scheduler.update(
+        "search",
+        httpx.Response(200, headers=rate_limit_headers(10, 4, reset, "search")),
+    )
+    assert scheduler.buckets["search"].remaining == 3
+
+    # a new window replaces the bucket outright
+    scheduler.update(
+        "search",
+        httpx.Response(200, headers=rate_limit_headers(10, 9, reset + 60, "search")),
+    )
+    assert scheduler.buckets["search"].remaining == 9
+
+
+def test_retry_delay_uses_retry_after(scheduler):
+    resp = httpx.Response(403, headers={"retry-after": "7"})
+    assert scheduler.retry_delay(resp, attempt=0) == 7
+    assert scheduler.state()["retries"] == 1
+
+
+def test_retry_delay_waits_for_primary_reset(scheduler, clock):
+    headers = rate_limit_headers(10, 0, clock.now + 20, "search")
+    resp = httpx.Response(403, headers=headers)
+    assert scheduler.retry_delay(resp, attempt=0) == pytest.approx(21)
+
+
+def test_retry_delay_backs_off_secondary_limits(scheduler):
+    resp = httpx.Response(
+        403, json={"message": "You have exceeded a secondary rate limit."}
+    )
+    for attempt in range(4):
+        delay = scheduler.retry_delay(resp, attempt=attempt)
+        assert 2**attempt / 2 <= delay <= 2**attempt
+
+
+def test_retry_delay_gives_up(scheduler):
+    assert scheduler.retry_delay(httpx.Response(404), attempt=0) is None
+    assert (
+        scheduler.retry_delay(httpx.Response(403, text="Forbidden"), attempt=0) is None
+    )
+    too_many = httpx.Response(429)
+    assert scheduler.retry_delay(too_many, attempt=scheduler.max_retries) is None
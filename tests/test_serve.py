@@ -0,0 +1,212 @@
+import asyncio
+import socket
+import threading
+from unittest.mock import MagicMock
+
+import click
+import httpx
+import pytest
+from click.testing import CliRunner
+
+from action_tools import github
+from action_tools.ratelimit import RateLimitScheduler
+from action_tools.serve import (
+    UsageHTTPServer,
+    UsageService,
+    UsageUnixServer,
+    running_loop,
+    serve,
+)
+
+
+@pytest.fixture
+def client():
+    client = MagicMock(spec=github.AsyncClient)
+    client.scheduler = RateLimitScheduler()
+    client.cache = None
+    return client
+
+
+@pytest.fixture
+def lookups(mocker):
+    """Stands in for `usage_record`, recording each lookup it's asked for"""
+    calls = []
+
+    async def fake_usage_record(target, client, exists=None, verify=None):
+        calls.append((target, exists, verify is not None))
+        await asyncio.sleep(0.01)
+        if target.startswith("bad/"):
+            return {"target": target, "error": "boom"}
+        return {"target": target, "exists": True, "repos": ["org/consumer"]}
+
+    mocker.patch("action_tools.serve.usage_record", side_effect=fake_usage_record)
+    return calls
+
+
+def test_concurrent_lookups_share_one_search(client, lookups):
+    service = UsageService(client)
+
+    async def burst():
+        return await asyncio.gather(
+            *(service.lookup("org/action@v1") for _ in range(5)),
+            service.lookup("org/action", verify=True),
+        )
+
+    records = asyncio.run(burst())
+
+    assert records[0] == {
+        "target": "org/action",
+        "exists": True,
+        "repos": ["org/consumer"],
+    }
+    assert all(record is records[0] for record in records[:5])
+    assert lookups == [("org/action", None, False), ("org/action", None, True)]
+    assert (service.misses, service.coalesced) == (2, 4)
+
+
+def test_results_expire_after_ttl(client, lookups, clock):
+    service = UsageService(client, ttl=60, clock=clock)
+
+    async def lookup():
+        return await service.lookup("org/action")
+
+    asyncio.run(lookup())
+    clock.now += 59
+    asyncio.run(lookup())
+    assert len(lookups) == 1
+    assert service.hits == 1
+
+    clock.now += 1
+    assert service.cached("org/action") is None
+    asyncio.run(lookup())
+    assert len(lookups) == 2
+
+
+def test_failed_lookups_are_not_remembered(client, lookups):
+    service = UsageService(client)
+
+    async def lookup():
+        return await service.lookup("bad/action")
+
+    assert asyncio.run(lookup())["error"] == "boom"
+    asyncio.run(lookup())
+    assert len(lookups) == 2
+
+
+def test_lookup_many_checks_existence_in_bulk(client, lookups, mocker):
+    existing = mocker.patch(
+        "action_tools.serve._existing_targets",
+        return_value={"org/new": False},
+    )
+    service = UsageService(client)
+    service._results[("org/cached", False)] = (float("inf"), {"target": "org/cached"})
+
+    records = asyncio.run(service.lookup_many(["org/cached", "org/new@v2"]))
+
+    assert [record["target"] for record in records] == ["org/cached", "org/new"]
+    existing.assert_called_once_with(["org/new@v2"], client)
+    assert lookups == [("org/new", False, False)]
+
+
+@pytest.fixture
+def running_server(client, lookups, mocker):
+    mocker.patch("action_tools.serve._existing_targets", return_value={})
+    with running_loop() as loop:
+        server = UsageHTTPServer(("127.0.0.1", 0), UsageService(client), loop)
+        with server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            yield server
+            server.shutdown()
+
+
+def test_http_endpoints(running_server):
+    base_url = "http://{}:{}".format(*running_server.server_address)
+    with httpx.Client(base_url=base_url) as http:
+        response = http.get("/usage", params={"target": "org/action"})
+        assert response.json()["repos"] == ["org/consumer"]
+
+        response = http.post("/usage", json={"targets": ["org/action", "org/other"]})
+        assert [record["target"] for record in response.json()] == [
+            "org/action",
+            "org/other",
+        ]
+
+        assert http.get("/stats").json()["results"] == {
+            "entries": 2,
+            "in_flight": 0,
+            "hits": 1,
+            "misses": 2,
+            "coalesced": 0,
+        }
+        assert http.get("/usage").status_code == 400
+        assert http.post("/usage", json=["org/action"]).status_code == 400
+        response = http.post("/usage", json={"targets": ["a/b"], "verify": "false"})
+        assert response.status_code == 400
+        assert http.get("/nope").status_code == 404
+
+
+def test_post_verify(running_server, lookups):
+    base_url = "http://{}:{}".format(*running_server.server_address)
+    with httpx.Client(base_url=base_url) as http:
+        http.post("/usage", json={"targets": ["org/action"], "verify": True})
+        http.post("/usage", json={"targets": ["org/other"], "verify": False})
+
+    assert lookups == [("org/action", None, True), ("org/other", None, False)]
+
+
+def test_unix_socket_replaces_only_stale_sockets(client, tmp_path):
+    stale = tmp_path / "stale.sock"
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.bind(str(stale))
+    not_a_socket = tmp_path / "important.txt"
+    not_a_socket.write_text("keep me")
+
+    with running_loop() as loop:
+        UsageUnixServer(stale, UsageService(client), loop).server_close()
+        with pytest.raises(click.UsageError, match="isn't a socket"):
+            UsageUnixServer(not_a_socket, UsageService(client), loop)
+
+    assert not_a_socket.read_text() == "keep me"
+
+
+def test_unix_socket_refuses_a_socket_in_use(client, tmp_path):
+    live = tmp_path / "live.sock"
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.bind(str(live))
+        sock.listen()
+        with running_loop() as loop:
+            with pytest.raises(click.UsageError, match="already in use"):
+                UsageUnixServer(live, UsageService(client), loop)
+
+        assert live.exists()
+
+
+def test_unix_socket(client, lookups, tmp_path):
+    socket_path = tmp_path / "usage.sock"
+    with running_loop() as loop:
+        server = UsageUnixServer(socket_path, UsageService(client), loop)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        transport = httpx.HTTPTransport(uds=str(socket_path))
+        try:
+            with httpx.Client(transport=transport, base_url="http://local") as http:
+                response = http.get("/usage", params={"target": "org/action"})
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    assert response.json()["target"] == "org/action"
+    assert not socket_path.exists()
+
+
+def test_serve_command_closes_cleanly(mocker):
+    serve_forever = mocker.patch.object(
+        UsageHTTPServer, "serve_forever", side_effect=KeyboardInterrupt
+    )
+
+    result = CliRunner().invoke(
+        serve, ["--no-cache", "--port", "0", "--token", "fake-token"]
+    )
+
+    assert result.exit_code == 0
+    assert "Serving usage queries on http://127.0.0.1:" in result.stderr
+    serve_forever.assert_called_once()
@@ -0,0 +1,110 @@
+import asyncio
+import re
+
+import pytest
+
+from action_tools.shards import SEARCH_RESULT_CAP, Shard, ShardedSearch
+
+SIZE_REGEX = re.compile(r"size:(?P<low>\d+)\.\.(?P<high>\d+)")
+
+
+class FakeSearch:
+    """Serves search pages over files of known sizes, capped like the real Search API"""
+
+    def __init__(self, sizes: list[int]):
+        self.files = [
+            {
+                "path": f"file{n}.yml",
+                "size": size,
+                "repository": {"full_name": f"org/repo{n}"},
+            }
+            for n, size in enumerate(sizes)
+        ]
+        self.queries = []
+
+    def _pages(self, query: str) -> list[dict]:
+        self.queries.append(query)
+        matches = self.files
+        if match := SIZE_REGEX.search(query):
+            low, high = int(match.group("low")), int(match.group("high"))
+            matches = [item for item in matches if low <= item["size"] <= high]
+        capped = matches[:SEARCH_RESULT_CAP]
+        pages = [capped[start : start + 100] for start in range(0, len(capped), 100)]
+        return [
+            {"total_count": len(matches), "items": items} for items in pages or [[]]
+        ]
+
+    def iter_search_code_pages(self, query: str, max_pages=10, text_match=False):
+        yield from self._pages(query)
+
+
+class FakeAsyncSearch(FakeSearch):
+    async def iter_search_code_pages(self, query: str, max_pages=10, text_match=False):
+        for page in self._pages(query):
+            yield page
+
+
+def test_under_the_cap_is_not_sharded():
+    client = FakeSearch([100] * 250)
+    search = ShardedSearch(client, "query")
+
+    assert len(list(search)) == 250
+    assert client.queries == ["query"]
+    assert not search.sharded
+    assert search.report() == [
+        {"shard": "all", "total_count": 250, "fetched": 250, "complete": True}
+    ]
+
+
+def test_over_the_cap_is_split_into_disjoint_shards():
+    sizes = [n % 3000 for n in range(2500)]
+    client = FakeSearch(sizes)
+    search = ShardedSearch(client, "query")
+
+    items = list(search)
+    assert sorted(item["path"] for item in items) == sorted(
+        item["path"] for item in client.files
+    )
+    assert search.sharded
+    assert search.complete
+    assert sum(shard["fetched"] for shard in search.report()) == 2500
+    assert "query size:0..1023" in client.queries
+
+
+def test_unsplittable_shard_is_reported_incomplete():
+    client = FakeSearch([500] * 1200)
+    search = ShardedSearch(client, "query")
+
+    assert len(list(search)) == SEARCH_RESULT_CAP
+    assert not search.complete
+    incomplete = [shard for shard in search.report() if not shard["complete"]]
+    assert incomplete == [
+        {
+            "shard": "size:500..500",
+            "total_count": 1200,
+            "fetched": 1000,
+            "complete": False,
+        }
+    ]
+
+
+def test_async_iteration_matches_sync():
+    sizes = [n % 3000 for n in range(2500)]
+    search = ShardedSearch(FakeAsyncSearch(sizes), "query")
+
+    async def collect():
+        return [item async for item in search]
+
+    assert len(asyncio.run(collect())) == 2500
+    assert search.complete
+
+
+@pytest.mark.parametrize(
+    ("shard", "expected"),
+    [
+        (Shard(0, 1023), [Shard(0, 511), Shard(512, 1023)]),
+        (Shard(7, 7), []),
+    ],
+)
+def test_shard_children(shard, expected):
+    assert shard.children() == expected
@@ -0,0 +1,214 @@
+import asyncio
+import concurrent.futures
+import json
+
+import httpx
+import pytest
+from click.testing import CliRunner
+
+from action_tools import stats
+from action_tools.cache import ResponseCache
+from action_tools.cli import main
+from action_tools.github import AsyncClient, Client
+from action_tools.index import UsageIndex
+from action_tools.usage import _usage
+
+CONTENTS_URL = "https://www.example.com/repos/testorg/testrepo/contents"
+
+
+@pytest.fixture
+def recorder(clock):
+    recorder = stats.Recorder(clock=clock)
+    with stats.recording(recorder):
+        yield recorder
+
+
+def test_spans_nest_and_time_calls(recorder, clock):
+    @stats.timed("inner")
+    def inner():
+        clock.now += 2
+        return "result"
+
+    with stats.span("outer", target="org/repo"):
+        assert inner() == "result"
+        clock.now += 1
+
+    inner_span, outer_span = recorder.spans
+    assert (outer_span.name, outer_span.duration) == ("outer", 3)
+    assert outer_span.attributes == {"target": "org/repo"}
+    assert (inner_span.name, inner_span.duration) == ("inner", 2)
+    assert inner_span.parent_id == outer_span.span_id
+
+
+def test_nothing_is_recorded_when_inactive():
+    @stats.timed("noop")
+    def noop():
+        return stats.active()
+
+    assert noop() is None
+    with stats.span("noop") as span:
+        assert span is None
+
+
+def test_carry_context_keeps_worker_threads_in_the_span(recorder):
+    def work(n):
+        with stats.span("work"):
+            return n
+
+    with stats.span("outer") as outer:
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            assert list(pool.map(stats.carry_context(work), range(4))) == [0, 1, 2, 3]
+
+    workers = [span for span in recorder.spans if span.name == "work"]
+    assert [span.parent_id for span in workers] == [outer.span_id] * 4
+
+
+def test_trace_times_request_phases(clock):
+    record = stats.RequestRecord(1, None, "GET", "/", "core", clock())
+    trace = stats.RequestTrace(record, clock)
+    for event, elapsed in [
+        ("connection.connect_tcp.started", 0),
+        ("connection.connect_tcp.complete", 5),
+        ("connection.start_tls.started", 0),
+        ("connection.start_tls.complete", 7),
+        ("http11.send_request_headers.started", 0),
+        ("http11.send_request_headers.complete", 1),
+        ("http11.receive_response_headers.started", 0),
+        ("http11.receive_response_headers.complete", 20),
+    ]:
+        clock.now += elapsed
+        trace(event, {})
+    trace.finish(200, 512)
+
+    assert (record.connect, record.tls, record.ttfb) == (5, 7, 21)
+    assert (record.duration, record.status, record.bytes) == (33, 200, 512)
+
+
+def test_client_records_requests(recorder, respx_mock, mocker, tmp_path):
+    mocker.patch("action_tools.github.time.sleep")
+    respx_mock.get(CONTENTS_URL).mock(
+        side_effect=[
+            httpx.Response(429, headers={"retry-after": "1"}),
+            httpx.Response(200, json=[], headers={"etag": '"abc"'}),
+            httpx.Response(304),
+        ]
+    )
+    with (
+        ResponseCache(tmp_path) as cache,
+        Client(
+            base_url="https://www.example.com", token="fake-token", cache=cache
+        ) as client,
+    ):
+        with stats.span("lookups"):
+            client.get_repo_contents("testorg", "testrepo")
+            client.get_repo_contents("testorg", "testrepo")
+
+    span = recorder.spans[0]
+    assert [
+        (r.status, r.attempt, r.cache_hit, r.parent_id) for r in recorder.requests
+    ] == [
+        (429, 0, False, span.span_id),
+        (200, 1, False, span.span_id),
+        (304, 0, True, span.span_id),
+    ]
+    assert {r.resource for r in recorder.requests} == {"core"}
+    assert recorder.requests[1].bytes == len(b"[]")
+
+    lines = recorder.summary()
+    assert lines[1].split()[:2] == ["lookups", "1"]
+    core = next(line for line in lines if line.startswith("core"))
+    # 3 requests, 1 cached, 1 retried
+    assert core.split()[1] == "3"
+    assert core.split()[-2:] == ["1", "1"]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [{}, {"stream": True}, {"output_format": "ndjson"}, {"versions": True}],
+)
+def test_usage_search_is_one_span_in_every_mode(recorder, respx_mock, options):
+    base_url = "https://www.example.com"
+    respx_mock.get(f"{base_url}/repos/org/action/contents").respond(
+        200, json=[{"name": "action.yml", "type": "file"}]
+    )
+    respx_mock.get(f"{base_url}/repos/org/action/tags").respond(200, json=[])
+    respx_mock.get(f"{base_url}/search/code").respond(
+        200,
+        json={
+            "total_count": 1,
+            "items": [
+                {
+                    "repository": {"full_name": "app/one"},
+                    "path": ".github/workflows/ci.yml",
+                    "html_url": "https://github.com/app/one",
+                    "sha": "abc",
+                    "text_matches": [{"fragment": "uses: org/action@v1"}],
+                }
+            ],
+        },
+    )
+
+    with Client(base_url=base_url, token="fake-token") as client:
+        _usage("org/action", "fake-token", client, **options)
+
+    (search,) = [span for span in recorder.spans if span.name == "find_usage"]
+    pages = [span for span in recorder.spans if span.name == "page"]
+    search_pages = [p for p in pages if p.attributes["endpoint"] == "/search/code"]
+    assert len(search_pages) == 1
+    assert all(page.parent_id == search.span_id for page in pages)
+
+
+def test_async_client_records_requests(recorder, respx_mock):
+    respx_mock.get(CONTENTS_URL).respond(200, json=[])
+
+    async def run():
+        async with AsyncClient(
+            base_url="https://www.example.com", token="fake-token"
+        ) as client:
+            await client.get_repo_contents("testorg", "testrepo")
+
+    asyncio.run(run())
+    assert [r.status for r in recorder.requests] == [200]
+
+
+def test_write_trace(recorder, clock):
+    with stats.span("outer"):
+        clock.now += 1
+    recorder.start_request("GET", "/search/code", "search", 0, 0.0).finish(200, 10)
+
+    out = []
+
+    class Out:
+        def write(self, text):
+            out.append(text)
+
+    recorder.write_trace(Out())
+    spans = json.loads("".join(out))["spans"]
+    assert [span["name"] for span in spans] == ["outer", "GET /search/code"]
+    assert len({span["trace_id"] for span in spans}) == 1
+    assert spans[0]["end_time_unix_nano"] - spans[0]["start_time_unix_nano"] == 1e9
+    assert spans[1]["attributes"]["resource"] == "search"
+
+
+def test_cli_stats_and_trace_file(tmp_path):
+    index_path = tmp_path / "index.sqlite3"
+    UsageIndex(index_path).close()
+    trace_path = tmp_path / "trace.json"
+
+    result = CliRunner().invoke(
+        main,
+        [
+            "--stats",
+            "--trace-file",
+            str(trace_path),
+            "usage",
+            "--index",
+            str(index_path),
+            "org/repo",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert result.stderr.splitlines()[1].split()[:2] == ["usage", "1"]
+    spans = json.loads(trace_path.read_text())["spans"]
+    assert [span["name"] for span in spans] == ["usage"]
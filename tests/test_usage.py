@@ -1,11 +1,38 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
 from unittest.mock import MagicMock
 
 import pytest
 
 from action_tools import github
 from action_tools import usage as usage_module
-from action_tools.models import Action, Workflow
-from action_tools.usage import classify_target, find_usage, validate_exists
+from action_tools.models import Action, Uses, Workflow
+from action_tools.ratelimit import RateLimitScheduler
+from action_tools.usage import (
+    _usage,
+    _usage_batch,
+    fill_missing_refs,
+    find_usage,
+    find_usage_async,
+    format_histogram,
+    format_records,
+    iter_usage,
+    iter_usage_hits,
+    read_targets,
+    resolve_tags,
+    tags_by_commit,
+    usage_record,
+    validate_exists,
+    validate_exists_async,
+    validate_exists_many,
+    verify_usage,
+    verify_usage_async,
+    version_histogram,
+)
+from action_tools.uses import classify_target, classify_uses, classify_uses_many
 
 
 @pytest.fixture
@@ -13,6 +40,21 @@ def mock_github_client():
     return MagicMock(spec=github.Client)
 
 
+@pytest.fixture
+def mock_async_github_client():
+    return MagicMock(spec=github.AsyncClient)
+
+
+def search_pages(*repos: str) -> list[dict]:
+    items = [{"repository": {"full_name": repo}} for repo in repos]
+    return [{"total_count": len(items), "items": items}]
+
+
+async def async_search_pages(*repos: str):
+    for page in search_pages(*repos):
+        yield page
+
+
 # ---------- classify_target ----------
 
 
@@ -75,6 +117,70 @@ def test_classify_target_invalid():
         classify_target("invalid-target")
 
 
+# ---------- classify_uses ----------
+
+
+@pytest.mark.parametrize(
+    ("uses", "expected"),
+    [
+        (
+            "actions/checkout@v4",
+            Uses("action", "actions/checkout", "v4", Action("actions", "checkout", "")),
+        ),
+        (
+            "  my-org/my-repo/sub/dir@v1@weird  ",
+            Uses(
+                "action",
+                "my-org/my-repo/sub/dir",
+                "v1@weird",
+                Action("my-org", "my-repo", "/sub/dir"),
+            ),
+        ),
+        (
+            "my-org/my-repo/.github/workflows/build.yml@main",
+            Uses(
+                "workflow",
+                "my-org/my-repo/.github/workflows/build.yml",
+                "main",
+                Workflow("my-org", "my-repo", "/.github/workflows/build.yml"),
+            ),
+        ),
+        (
+            "my-org/my-repo",
+            Uses("action", "my-org/my-repo", "", Action("my-org", "my-repo", "")),
+        ),
+        ("./.github/actions/setup", Uses("local", "./.github/actions/setup", "")),
+        ("docker://alpine:3.20", Uses("docker", "alpine:3.20", "")),
+        ("not-a-reference", None),
+        ("", None),
+    ],
+)
+def test_classify_uses(uses, expected):
+    assert classify_uses(uses) == expected
+
+
+@pytest.mark.parametrize(
+    "target",
+    [
+        "my-org/my-repo/.github/workflows/build.yaml@v1",
+        "my-org/my-repo/action-dir@v1",
+        "my-org/my-repo",
+    ],
+)
+def test_classify_uses_agrees_with_classify_target(target):
+    assert classify_uses(target).resource == classify_target(target)
+
+
+def test_classify_uses_many_caches_repeats():
+    classify_uses.cache_clear()
+
+    results = list(classify_uses_many(["actions/checkout@v4"] * 100 + ["./local"]))
+
+    assert len(results) == 101
+    assert results[0] is results[99]
+    assert classify_uses.cache_info().misses == 2
+
+
 # ---------- validate_exists ----------
 
 
@@ -124,21 +230,510 @@ def test_validate_exists_another_status_error(mock_github_client):
         validate_exists(resource, mock_github_client)
 
 
+def test_validate_exists_async(mock_async_github_client):
+    resource = Action(org="org", repo="repo", subpath="/some-action")
+    mock_async_github_client.get_repo_contents.return_value = [{"name": "action.yml"}]
+
+    assert asyncio.run(validate_exists_async(resource, mock_async_github_client))
+
+
+def test_validate_exists_async_not_found(mock_async_github_client):
+    resource = Action(org="org", repo="repo", subpath="/nope")
+    mock_async_github_client.get_repo_contents.side_effect = github.ClientStatusError(
+        "Not Found", status_code=404, request=None, response=None
+    )
+
+    assert not asyncio.run(validate_exists_async(resource, mock_async_github_client))
+
+
+BULK_RESOURCES = [
+    Workflow(org="org", repo="repo", subpath="/.github/workflows/ci.yml"),
+    Action(org="org", repo="repo", subpath=""),
+    Action(org="org", repo="repo", subpath="/not-an-action"),
+    Action(org="org", repo="gone", subpath="/action"),
+]
+BULK_OBJECTS = [
+    {"__typename": "Blob"},
+    {"__typename": "Tree", "entries": [{"name": "action.yaml"}]},
+    {"__typename": "Tree", "entries": [{"name": "README.md"}]},
+    None,
+]
+BULK_CONTENTS = [
+    {"name": "ci.yml"},
+    [{"name": "action.yaml"}],
+    [{"name": "README.md"}],
+    github.ClientStatusError("Not Found", status_code=404, request=None, response=None),
+]
+
+
+def test_validate_exists_many_agrees_with_validate_exists(mock_github_client):
+    mock_github_client.token = "token"
+    mock_github_client.get_objects.return_value = BULK_OBJECTS
+    mock_github_client.get_repo_contents.side_effect = BULK_CONTENTS
+
+    bulk = validate_exists_many(BULK_RESOURCES, mock_github_client)
+
+    assert bulk == [validate_exists(r, mock_github_client) for r in BULK_RESOURCES]
+    assert bulk == [True, True, False, False]
+    mock_github_client.get_objects.assert_called_once_with(
+        [
+            ("org", "repo", "HEAD:.github/workflows/ci.yml"),
+            ("org", "repo", "HEAD:"),
+            ("org", "repo", "HEAD:not-an-action"),
+            ("org", "gone", "HEAD:action"),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        github.GraphQLError("nope", errors=[]),
+        github.ClientStatusError(
+            "Forbidden", status_code=403, request=None, response=None
+        ),
+    ],
+)
+def test_validate_exists_many_falls_back_to_rest(mock_github_client, error):
+    mock_github_client.token = "token"
+    mock_github_client.get_objects.side_effect = error
+    mock_github_client.get_repo_contents.side_effect = BULK_CONTENTS
+
+    assert validate_exists_many(BULK_RESOURCES, mock_github_client) == [
+        True,
+        True,
+        False,
+        False,
+    ]
+
+
+def test_validate_exists_many_without_token_uses_rest(mock_github_client):
+    mock_github_client.token = None
+    mock_github_client.get_repo_contents.side_effect = BULK_CONTENTS
+
+    assert validate_exists_many(BULK_RESOURCES, mock_github_client)[0]
+    mock_github_client.get_objects.assert_not_called()
+
+
+def test_validate_exists_many_against_graphql(respx_mock):
+    client = github.Client(token="token", base_url="https://www.example.com")
+    respx_mock.post("https://www.example.com/graphql").respond(
+        200,
+        json={"data": {f"r{i}": {"object": obj} for i, obj in enumerate(BULK_OBJECTS)}},
+    )
+
+    assert validate_exists_many(BULK_RESOURCES, client) == [True, True, False, False]
+
+
 # ---------- find_usage ----------
 
 
 def test_find_usage_returns_sorted_repos(mock_github_client):
-    mock_github_client.search_code.return_value = [
-        {"repository": {"full_name": "z-org/z-repo"}},
-        {"repository": {"full_name": "a-org/a-repo"}},
-    ]
+    mock_github_client.iter_search_code_pages.return_value = iter(
+        search_pages("z-org/z-repo", "a-org/a-repo")
+    )
 
     repos = find_usage("my-org/my-repo/path", mock_github_client)
     assert repos == ["a-org/a-repo", "z-org/z-repo"]
 
 
 def test_find_usage_returns_no_usage(mock_github_client):
-    mock_github_client.search_code.return_value = []
+    mock_github_client.iter_search_code_pages.return_value = iter(search_pages())
 
     repos = find_usage("my-org/my-repo/path", mock_github_client)
     assert repos == []
+
+
+def test_find_usage_async_returns_sorted_repos(mock_async_github_client):
+    mock_async_github_client.iter_search_code_pages.return_value = async_search_pages(
+        "z-org/z-repo", "a-org/a-repo", "z-org/z-repo"
+    )
+
+    repos = asyncio.run(
+        find_usage_async("my-org/my-repo/path", mock_async_github_client)
+    )
+    assert repos == ["a-org/a-repo", "z-org/z-repo"]
+
+
+def test_iter_usage_yields_new_repos_in_search_order(mock_github_client):
+    mock_github_client.iter_search_code_pages.return_value = iter(
+        search_pages("z-org/z-repo", "a-org/a-repo", "z-org/z-repo")
+    )
+
+    repos = iter_usage("my-org/my-repo/path", mock_github_client)
+    assert list(repos) == ["z-org/z-repo", "a-org/a-repo"]
+
+
+def search_hit(repo: str, path: str, *fragments: str) -> dict:
+    return {
+        "repository": {"full_name": repo},
+        "path": path,
+        "html_url": f"https://github.com/{repo}/blob/main/{path}",
+        "text_matches": [{"fragment": fragment} for fragment in fragments],
+    }
+
+
+def test_iter_usage_hits_parses_pinned_refs(mock_github_client):
+    items = [
+        search_hit("org/a", "ci.yml", "- uses: my-org/my-action@v1 # pinned"),
+        search_hit(
+            "org/b",
+            "ci.yml",
+            "uses: 'My-Org/my-action@abc123'\n      uses: my-org/my-action@v2",
+            "uses: my-org/my-action@v2",
+        ),
+        search_hit("org/c", "ci.yml", "uses: my-org/my-action/sub@v1"),
+        search_hit("org/a", "ci.yml", "- uses: my-org/my-action@v1"),
+    ]
+    mock_github_client.iter_search_code_pages.return_value = iter(
+        [{"total_count": len(items), "items": items}]
+    )
+
+    hits = list(iter_usage_hits("my-org/my-action", mock_github_client))
+
+    mock_github_client.iter_search_code_pages.assert_called_once_with(
+        '"uses: my-org/my-action" language:YAML', text_match=True
+    )
+    assert [(hit["repo"], hit["ref"]) for hit in hits] == [
+        ("org/a", "v1"),
+        ("org/b", "abc123"),
+        ("org/b", "v2"),
+        ("org/c", None),
+    ]
+    assert hits[0] == {
+        "repo": "org/a",
+        "path": "ci.yml",
+        "html_url": "https://github.com/org/a/blob/main/ci.yml",
+        "ref": "v1",
+    }
+
+
+HITS = [
+    {"repo": "org/a", "path": "ci.yml", "html_url": "https://a", "ref": "v1"},
+    {"repo": "org/b", "path": "x, y.yml", "html_url": "https://b", "ref": None},
+]
+
+
+def test_format_records_json():
+    assert json.loads("".join(format_records(HITS, "json"))) == HITS
+    assert json.loads("".join(format_records([], "json"))) == []
+
+
+def test_format_records_ndjson():
+    lines = "".join(format_records(HITS, "ndjson")).splitlines()
+    assert [json.loads(line) for line in lines] == HITS
+
+
+def test_format_records_csv():
+    rows = csv.DictReader(io.StringIO("".join(format_records(HITS, "csv"))))
+    assert [row["path"] for row in rows] == ["ci.yml", "x, y.yml"]
+
+
+def test_format_records_streams():
+    def hits():
+        yield HITS[0]
+        raise RuntimeError("the rest of the sweep")
+
+    # the first record is written before the next is asked for
+    for output_format, chunks in [("json", 1), ("ndjson", 1), ("csv", 2)]:
+        written = format_records(hits(), output_format)
+        assert "org/a" in "".join(itertools.islice(written, chunks))
+
+
+# ---------- verify ----------
+
+BLOBS = {
+    "exact": b"jobs:\n  a:\n    steps:\n      - uses: my-org/my-action@v1\n",
+    "unpinned": b"jobs:\n  a:\n    steps:\n      - uses: My-Org/My-Action\n",
+    "comment": b"# uses: my-org/my-action@v1\njobs:\n  a:\n    runs-on: x\n",
+    "prefix": b"jobs:\n  a:\n    steps:\n      - uses: my-org/my-action-v2@v1\n",
+}
+
+
+def blob_hit(repo: str, sha: str) -> dict:
+    return {**search_hit(repo, "ci.yml"), "sha": sha}
+
+
+def test_verify_usage_keeps_only_exact_references(mock_github_client):
+    mock_github_client.get_blob.side_effect = lambda org, repo, sha: BLOBS[sha]
+    items = [
+        blob_hit("org/a", "exact"),
+        blob_hit("org/b", "comment"),
+        blob_hit("org/c", "prefix"),
+        blob_hit("org/d", "unpinned"),
+        blob_hit("org/e", "exact"),
+    ]
+
+    verified = list(verify_usage(items, "my-org/my-action", mock_github_client))
+
+    assert sorted(
+        (item["repository"]["full_name"], item["verified_refs"]) for item in verified
+    ) == [
+        ("org/a", ["v1"]),
+        ("org/d", [""]),
+        ("org/e", ["v1"]),
+    ]
+    # fetched once per blob SHA
+    assert mock_github_client.get_blob.call_count == 4
+
+
+def test_verify_usage_streams_with_bounded_fetches(mock_github_client):
+    mock_github_client.get_blob.return_value = BLOBS["exact"]
+
+    def items():
+        for n in range(100):
+            yield blob_hit(f"org/repo{n}", f"sha{n}")
+        raise RuntimeError("the rest of the sweep")
+
+    verified = verify_usage(items(), "my-org/my-action", mock_github_client, 2)
+
+    assert len(list(itertools.islice(verified, 10))) == 10
+    # at most 2 * max_workers fetches queued ahead of what's been read
+    assert mock_github_client.get_blob.call_count < 20
+
+
+def test_verify_usage_drops_files_that_cant_be_fetched(mock_github_client):
+    mock_github_client.get_blob.side_effect = github.ClientStatusError(
+        "Not Found", status_code=404, request=None, response=None
+    )
+
+    items = [blob_hit("org/a", "gone")]
+    assert list(verify_usage(items, "my-org/my-action", mock_github_client)) == []
+
+
+def test_verify_usage_async(mock_async_github_client):
+    async def get_blob(org, repo, sha):
+        return BLOBS[sha]
+
+    mock_async_github_client.get_blob.side_effect = get_blob
+    items = [blob_hit("org/a", "exact"), blob_hit("org/b", "prefix")]
+
+    verified = asyncio.run(
+        verify_usage_async(
+            items, "my-org/my-action", mock_async_github_client, asyncio.Semaphore(2)
+        )
+    )
+
+    assert [item["repository"]["full_name"] for item in verified] == ["org/a"]
+
+
+def test_usage_verify_reports_exact_refs(mock_github_client, capsys):
+    mock_github_client.get_repo_contents.return_value = [{"name": "action.yml"}]
+    mock_github_client.get_blob.side_effect = lambda org, repo, sha: BLOBS[sha]
+    items = [blob_hit("org/a", "unpinned"), blob_hit("org/b", "prefix")]
+    mock_github_client.iter_search_code_pages.return_value = iter(
+        [{"total_count": len(items), "items": items}]
+    )
+
+    _usage(
+        "my-org/my-action",
+        "token",
+        mock_github_client,
+        output_format="ndjson",
+        verify=True,
+    )
+
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(record["repo"], record["ref"]) for record in records] == [("org/a", None)]
+
+
+# ---------- versions ----------
+
+SHA = "54a43938e6d916589114e065d055a5d42c131e70"
+TAGS = [
+    {"name": "v1.2.3", "commit": {"sha": SHA}},
+    {"name": "v1", "commit": {"sha": SHA}},
+    {"name": "v1.2.2", "commit": {"sha": "0" * 40}},
+]
+
+
+@pytest.mark.parametrize(
+    ("ref", "tags"),
+    [
+        (SHA, ["v1.2.3", "v1"]),
+        (SHA[:7], ["v1.2.3", "v1"]),
+        ("ffffffff", []),
+        ("v1", []),
+        ("main", []),
+    ],
+)
+def test_resolve_tags(ref, tags):
+    assert resolve_tags(ref, tags_by_commit(TAGS)) == tags
+
+
+def test_fill_missing_refs_fetches_only_files_without_a_ref(mock_github_client):
+    hits = [
+        {"repo": "org/a", "path": "ci.yml", "html_url": "", "ref": "v1"},
+        {"repo": "org/b", "path": "ci.yml", "html_url": "", "ref": None},
+        {"repo": "org/c", "path": "gone.yml", "html_url": "", "ref": None},
+    ]
+
+    def get_file(org, repo, path):
+        if path == "gone.yml":
+            raise github.ClientStatusError(
+                "Not Found", status_code=404, request=None, response=None
+            )
+        return "steps:\n  - uses: my-org/my-action@v2\n  - uses: my-org/my-action@v3\n"
+
+    mock_github_client.get_file.side_effect = get_file
+
+    filled = list(fill_missing_refs(hits, "my-org/my-action", mock_github_client))
+
+    assert [(hit["repo"], hit["ref"]) for hit in filled] == [
+        ("org/a", "v1"),
+        ("org/b", "v2"),
+        ("org/b", "v3"),
+        ("org/c", None),
+    ]
+    assert mock_github_client.get_file.call_count == 2
+
+
+def test_version_histogram_counts_repositories():
+    hits = [
+        {"repo": "org/a", "ref": "v1"},
+        {"repo": "org/a", "ref": "v1"},
+        {"repo": "org/b", "ref": "v1"},
+        {"repo": "org/b", "ref": SHA},
+        {"repo": "org/c", "ref": None},
+    ]
+
+    rows = version_histogram(hits, tags_by_commit(TAGS))
+
+    assert rows == [
+        {"ref": "v1", "tags": [], "repos": 2},
+        {"ref": None, "tags": [], "repos": 1},
+        {"ref": SHA, "tags": ["v1.2.3", "v1"], "repos": 1},
+    ]
+    lines = list(format_histogram(rows, width=4))
+    assert [line.split() for line in lines] == [
+        ["v1", "2", "####"],
+        ["(unknown)", "1", "##"],
+        [SHA, "(v1.2.3,", "v1)", "1", "##"],
+    ]
+    assert len({line.index("#") for line in lines}) == 1
+
+
+def test_usage_versions(mock_github_client, capsys):
+    mock_github_client.get_repo_contents.return_value = [{"name": "action.yml"}]
+    mock_github_client.iter_tags.return_value = iter(TAGS)
+    items = [
+        search_hit("org/a", "ci.yml", f"uses: my-org/my-action@{SHA}"),
+        search_hit("org/b", "ci.yml", "uses: my-org/my-action@v1"),
+    ]
+    mock_github_client.iter_search_code_pages.return_value = iter(
+        [{"total_count": len(items), "items": items}]
+    )
+
+    _usage(
+        "my-org/my-action",
+        "token",
+        mock_github_client,
+        output_format="ndjson",
+        versions=True,
+    )
+
+    mock_github_client.iter_tags.assert_called_once_with("my-org", "my-action")
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert rows == [
+        {"ref": SHA, "tags": ["v1.2.3", "v1"], "repos": 1},
+        {"ref": "v1", "tags": [], "repos": 1},
+    ]
+
+
+# ---------- batch ----------
+
+
+def test_read_targets_skips_blanks_and_comments():
+    targets_file = io.StringIO("# nightly audit\nmy-org/a@v1\n\n  my-org/b  \n")
+    assert read_targets(targets_file) == ["my-org/a@v1", "my-org/b"]
+
+
+def test_usage_record(mock_async_github_client):
+    mock_async_github_client.get_repo_contents.return_value = [{"name": "action.yml"}]
+    mock_async_github_client.iter_search_code_pages.return_value = async_search_pages(
+        "a-org/a-repo"
+    )
+
+    record = asyncio.run(usage_record("my-org/my-action@v1", mock_async_github_client))
+    assert record == {
+        "target": "my-org/my-action",
+        "type": "action",
+        "exists": True,
+        "repos": ["a-org/a-repo"],
+    }
+
+
+def test_usage_record_verify(mock_async_github_client):
+    async def get_blob(org, repo, sha):
+        return BLOBS[sha]
+
+    async def pages():
+        items = [blob_hit("org/a", "exact"), blob_hit("org/b", "comment")]
+        yield {"total_count": len(items), "items": items}
+
+    mock_async_github_client.get_blob.side_effect = get_blob
+    mock_async_github_client.iter_search_code_pages.return_value = pages()
+
+    record = asyncio.run(
+        usage_record(
+            "my-org/my-action",
+            mock_async_github_client,
+            exists=True,
+            verify=asyncio.Semaphore(2),
+        )
+    )
+    assert record["repos"] == ["org/a"]
+
+
+def test_usage_record_reports_errors(mock_async_github_client):
+    mock_async_github_client.get_repo_contents.side_effect = github.ClientStatusError(
+        "Gulp.", status_code=500, request=None, response=None
+    )
+
+    assert asyncio.run(usage_record("invalid-target", mock_async_github_client)) == {
+        "target": "invalid-target",
+        "error": "target invalid-target does not appear to be an action or workflow",
+    }
+    record = asyncio.run(usage_record("my-org/my-action", mock_async_github_client))
+    assert record["error"] == "Gulp."
+
+
+def test_usage_batch_emits_one_line_per_target(mock_async_github_client, capsys):
+    mock_async_github_client.get_repo_contents.return_value = []
+    mock_async_github_client.scheduler = RateLimitScheduler()
+    mock_async_github_client.cache = None
+    mock_async_github_client.token = None
+    mock_async_github_client.max_concurrency = 5
+    targets = ["my-org/a", "my-org/b", "my-org/c"]
+
+    asyncio.run(_usage_batch(targets, "token", 2, client=mock_async_github_client))
+
+    out, err = capsys.readouterr()
+    assert json.loads(err)["rate_limits"]["waits"] == 0
+    lines = out.splitlines()
+    records = sorted((json.loads(line) for line in lines), key=lambda r: r["target"])
+    assert records == [
+        {"target": target, "type": "action", "exists": False} for target in targets
+    ]
+
+
+def test_usage_batch_checks_targets_exist_in_one_query(
+    mock_async_github_client, capsys
+):
+    mock_async_github_client.scheduler = RateLimitScheduler()
+    mock_async_github_client.cache = None
+    mock_async_github_client.token = "token"
+    mock_async_github_client.get_objects.return_value = [None, None]
+    targets = ["my-org/a@v1", "not a target", "my-org/b"]
+
+    asyncio.run(_usage_batch(targets, "token", 2, client=mock_async_github_client))
+
+    mock_async_github_client.get_objects.assert_called_once_with(
+        [("my-org", "a", "HEAD:"), ("my-org", "b", "HEAD:")]
+    )
+    mock_async_github_client.get_repo_contents.assert_not_called()
+    lines = capsys.readouterr().out.splitlines()
+    records = {record["target"]: record for record in map(json.loads, lines)}
+    assert records["my-org/a"]["exists"] is False
+    assert records["my-org/b"]["exists"] is False
+    assert "error" in records["not a target"]
@@ -0,0 +1,62 @@
+import pytest
+
+from action_tools.watch import poll
+
+
+class Done(Exception):
+    pass
+
+
+class Ticks:
+    """A fake `sleep` that advances the clock and runs one scripted step per call"""
+
+    def __init__(self, clock, steps):
+        self.clock = clock
+        self.steps = list(steps)
+
+    def __call__(self, seconds):
+        self.clock.now += seconds
+        if not self.steps:
+            raise Done
+        self.steps.pop(0)()
+
+
+def test_poll_debounces_bursts(tmp_path, clock):
+    action = tmp_path / "action.yml"
+    action.write_text("name: a\n")
+    examples = tmp_path / "examples"
+    examples.mkdir()
+    sleep = Ticks(
+        clock,
+        [
+            lambda: action.write_text("name: ab\n"),
+            lambda: (examples / "basic.md").write_text("example"),
+            lambda: None,
+            lambda: None,
+            lambda: action.write_text("name: abc\n"),
+            lambda: None,
+            lambda: None,
+        ],
+    )
+
+    batches = []
+
+    def watch():
+        for changed in poll([action, examples], 0.2, 0.3, clock, sleep):
+            batches.append((clock.now, changed))
+
+    with pytest.raises(Done):
+        watch()
+
+    assert [now for now, _ in batches] == [pytest.approx(1000.8), pytest.approx(1001.4)]
+    assert {action, examples / "basic.md"} <= batches[0][1]
+    assert batches[1][1] == {action}
+
+
+def test_poll_notices_missing_paths_appearing(tmp_path, clock):
+    action = tmp_path / "action.yml"
+    sleep = Ticks(
+        clock, [lambda: action.write_text("name: a\n"), lambda: None, lambda: None]
+    )
+
+    assert next(poll([action], 0.2, 0.3, clock, sleep)) == {action}